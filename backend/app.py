@@ -1,16 +1,105 @@
 from fastapi import FastAPI, HTTPException, Request, Form, Query
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Union
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from contextlib import asynccontextmanager, contextmanager
+from collections import OrderedDict, deque
+from datetime import date
 import psycopg2
+import psycopg2.extensions
 from psycopg2.extras import RealDictCursor
+import asyncio
+import bisect
+import csv
+import functools
 import hashlib
 import html
+import inspect
+import io
+import itertools
 import json
+import logging
+import os
+import re
+import select
+import sys
+import threading
 import time
+import zlib
 
-app = FastAPI(title="SportNormativ API")
+try:
+    import asyncpg
+except ImportError:  # асинхронный драйвер необязателен: без него чтение идёт через пул psycopg2
+    asyncpg = None
+
+try:
+    import orjson
+except ImportError:  # без orjson ответы сериализуются стандартным json
+    orjson = None
+
+try:
+    import numpy
+except ImportError:  # без numpy пакетная оценка результатов идёт через bisect
+    numpy = None
+
+try:
+    import openpyxl
+except ImportError:  # без openpyxl импорт актов принимает только CSV
+    openpyxl = None
+
+logger = logging.getLogger("sportnormativ")
+
+
+# === Сериализация JSON ===
+def _encode_json(data) -> bytes:
+    """
+    Сериализует ответ так же, как JSONResponse (байт-в-байт).
+    С orjson — без промежуточного прохода jsonable_encoder: он вызывается только
+    для типов, которых orjson не знает (Decimal, pydantic-модели и т.п.).
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(data),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse, сериализующий через _encode_json (orjson, если установлен)."""
+
+    def render(self, content) -> bytes:
+        return _encode_json(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Открывает пулы соединений при старте приложения и закрывает при остановке."""
+    try:
+        open_pool()
+        await open_async_pool()
+        await run_in_threadpool(schema_ready)
+    except Exception as e:
+        # БД недоступна при старте — пулы будут созданы при первом запросе
+        logger.warning("connection pool not opened at startup: %s", e)
+    if DB_LISTEN:
+        catalog_listener.start()
+    warmup_task = asyncio.create_task(warm_up()) if CACHE_WARMUP else None
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    catalog_listener.stop()
+    await close_async_pool()
+    close_pool()
+
+
+app = FastAPI(title="SportNormativ API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # --- Разрешаем CORS ---
 origins = [
@@ -42,13 +131,256 @@ DB_CONFIG = {
     "port": "5432"
 }
 
+# === Пул соединений ===
+# Размер пула и таймауты настраиваются через переменные окружения.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))       # ожидание свободного соединения, сек
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))  # простой, после которого проверяем SELECT 1, сек
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2.
+
+    В отличие от psycopg2.pool.ThreadedConnectionPool, не закрывает соединения
+    сверх minconn при возврате: все свободные соединения (до maxconn) переиспользуются.
+    Число открытых соединений ограничено maxconn; если все заняты, getconn ждёт
+    до timeout секунд и бросает PoolTimeout.
+
+    При выдаче соединение проверяется: закрытые отбрасываются, а простоявшие
+    дольше ping_after секунд проверяются запросом SELECT 1.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, ping_after, **conn_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._conn_kwargs = conn_kwargs
+        self._idle = deque()  # (conn, время возврата в пул)
+        self._size = 0        # открытые соединения: свободные + выданные
+        self._cond = threading.Condition()
+        self.closed = False
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(**self._conn_kwargs)
+
+    def _is_alive(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self.closed:
+                        raise PoolTimeout(f"no free connection in {self.timeout}s (max {self.maxconn})")
+                    self._cond.wait(remaining)
+                if self.closed:
+                    raise PoolTimeout("connection pool is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self._size += 1  # резервируем место, соединяемся вне блокировки
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_alive(conn, idle_since):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """Возвращает соединение в пул, откатывая незавершённую транзакцию."""
+        if not conn.closed:
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                conn.close()
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    conn.close()
+        if conn.closed or self.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self.closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+                self._size -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min": self.minconn,
+                "max": self.maxconn,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def open_pool() -> ConnectionPool:
+    """Создаёт пул при первом обращении (или при старте приложения)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = ConnectionPool(
+                        DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_PING_AFTER,
+                        cursor_factory=RealDictCursor, **DB_CONFIG
+                    )
+                except Exception as e:
+                    raise Exception(f"Database connection error: {e}")
+    return _pool
+
 
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
 def get_conn():
+    """
+    Соединение из пула на время блока with.
+    По выходе незакоммиченная транзакция откатывается, соединение возвращается в пул.
+    Если свободных соединений нет дольше DB_POOL_TIMEOUT — 503.
+    """
+    pool = open_pool()
     try:
-        conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-        return conn
-    except Exception as e:
+        conn = pool.getconn()
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=f"Database pool exhausted: {e}")
+    except psycopg2.Error as e:
         raise Exception(f"Database connection error: {e}")
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+# === Асинхронный пул (asyncpg) для горячих эндпоинтов чтения ===
+# DB_ASYNC=0 отключает asyncpg: те же запросы выполняются через пул psycopg2 в threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "1") == "1" and asyncpg is not None
+DB_ASYNC_POOL_MIN = int(os.getenv("DB_ASYNC_POOL_MIN", "2"))
+DB_ASYNC_POOL_MAX = int(os.getenv("DB_ASYNC_POOL_MAX", "20"))
+
+_async_pool = None
+_async_pool_lock = None  # asyncio.Lock создаётся внутри работающего event loop
+
+
+async def _init_async_connection(conn):
+    """json/jsonb из asyncpg приходят строкой — декодируем, как это делает psycopg2."""
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+async def open_async_pool():
+    global _async_pool, _async_pool_lock
+    if not DB_ASYNC:
+        return None
+    if _async_pool is None:
+        if _async_pool_lock is None:
+            _async_pool_lock = asyncio.Lock()
+        async with _async_pool_lock:
+            if _async_pool is None:
+                _async_pool = await asyncpg.create_pool(
+                    database=DB_CONFIG["dbname"],
+                    user=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    host=DB_CONFIG["host"],
+                    port=int(DB_CONFIG["port"]),
+                    min_size=DB_ASYNC_POOL_MIN,
+                    max_size=DB_ASYNC_POOL_MAX,
+                    init=_init_async_connection,
+                )
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+@functools.lru_cache(maxsize=None)
+def _numbered_placeholders(query: str) -> str:
+    """Переводит плейсхолдеры psycopg2 (%s) в нумерованные asyncpg ($1, $2, ...)."""
+    counter = itertools.count(1)
+    return re.sub(r"%s", lambda _: f"${next(counter)}", query)
+
+
+def _fetch_rows_sync(query, args):
+    with get_conn() as conn:
+        cur = conn.cursor()  # RealDictRow: row["column"], как у asyncpg.Record
+        cur.execute(query, args)
+        return cur.fetchall()
+
+
+async def fetch_rows(query: str, *args):
+    """
+    Выполняет SELECT и возвращает все строки.
+    Строки поддерживают доступ row["column"] — как RealDictRow, так и asyncpg.Record.
+    """
+    pool = await open_async_pool()
+    if pool is None:
+        return await run_in_threadpool(_fetch_rows_sync, query, args)
+    async with pool.acquire() as conn:
+        return await conn.fetch(_numbered_placeholders(query), *args)
 
 
 def row_to_dict(row, cursor=None):
@@ -58,6 +390,426 @@ def row_to_dict(row, cursor=None):
     return dict(row)
 
 
+def tuple_cursor(conn):
+    """
+    Курсор, возвращающий строки кортежами (в обход RealDictCursor пула).
+    Обработчики читают колонки по позиции и собирают элементы ответа прямо
+    из кортежей — без промежуточного dict на строку.
+    """
+    return conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+
+
+# =============================================================================
+# Кеш ответов справочных эндпоинтов (TTL + ETag)
+# =============================================================================
+# Эндпоинт подключается к кешу одной строкой — декоратором @cached(...) под @app.get.
+# Ключ — namespace + аргументы обработчика. В кеше лежит уже сериализованный JSON,
+# поэтому попадание не трогает БД и не сериализует ответ заново.
+
+# Пока работает слушатель LISTEN/NOTIFY (DB_LISTEN=1), записи сбрасываются сразу после
+# изменения данных, и TTL служит лишь страховкой — поэтому по умолчанию он длинный.
+DB_LISTEN = os.getenv("DB_LISTEN", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "3600" if DB_LISTEN else "300"))  # секунды
+# Сколько ещё после истечения TTL запись можно отдавать, пока её обновляет фоновая задача.
+# Если обновление всё это время падает, запись окончательно истекает (жёсткий срок).
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "3600"))  # секунды
+
+
+class _CacheEntry:
+    __slots__ = ("body", "etag", "expires", "stale_until")
+
+    def __init__(self, body: bytes, ttl: float, stale_ttl: float):
+        self.body = body
+        self.etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        self.expires = time.monotonic() + ttl
+        self.stale_until = self.expires + stale_ttl
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    LRU-кеш сериализованных ответов с TTL на каждый ключ.
+    Ключ — кортеж (namespace, аргументы). Счётчики попаданий/промахов ведутся по namespace.
+
+    Промахи по одному ключу схлопываются (single-flight): пока идёт загрузка,
+    остальные запросы с тем же ключом ждут её результат, а не идут в БД сами.
+
+    Stale-while-revalidate: запись с истёкшим TTL ещё stale_ttl секунд отдаётся
+    как есть, а обновляет её одна фоновая задача.
+
+    Поколения: invalidate() увеличивает счётчик namespace (без namespace — общий).
+    Загрузка, начатая до сброса, результат в кеш не кладёт и новые промахи к себе
+    не присоединяет — иначе ответ, прочитанный до COMMIT, пережил бы NOTIFY и жил бы до TTL.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._inflight: Dict[tuple, tuple] = {}  # key → (future, поколение); только из event loop
+        self._refresh_tasks: Dict[tuple, asyncio.Task] = {}
+        self._generation = 0
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, namespace: str) -> tuple:
+        return self._generation, self._generations.get(namespace, 0)
+
+    def _count(self, namespace: str, counter: str):
+        ns = self._stats.setdefault(namespace, {
+            "hits": 0, "misses": 0, "not_modified": 0, "coalesced": 0, "stale": 0, "refresh_errors": 0,
+        })
+        ns[counter] += 1
+
+    def get(self, key: tuple) -> Optional[_CacheEntry]:
+        """Запись, которую можно отдать: свежая или устаревшая в пределах stale_ttl."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= time.monotonic():
+                self._count(key[0], "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(key[0], "hits" if entry.is_fresh() else "stale")
+            return entry
+
+    def put(self, key: tuple, body: bytes, ttl: float, stale_ttl: float = 0,
+            generation: Optional[tuple] = None) -> _CacheEntry:
+        """Кладёт тело в кеш; если generation задано и с тех пор был сброс — только возвращает запись."""
+        entry = _CacheEntry(body, ttl, stale_ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation(key[0]):
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def load(self, key: tuple, loader, ttl: float, stale_ttl: float = 0):
+        """
+        Загружает значение для key через loader() ровно один раз на все одновременные промахи.
+        loader возвращает сериализованное тело (bytes) — оно кладётся в кеш — либо готовый
+        Response, который отдаётся как есть и не кешируется.
+        """
+        generation = self.generation(key[0])
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[1] == generation:
+            with self._lock:
+                self._count(key[0], "coalesced")
+            return await asyncio.shield(inflight[0])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (future, generation)
+        try:
+            body = await loader()
+            result = body if isinstance(body, Response) else self.put(key, body, ttl, stale_ttl, generation)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ожидающих может не быть — не логируем "exception never retrieved"
+            raise
+        finally:
+            # после сброса ключ мог занять более новый загрузчик
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
+
+    def revalidate(self, key: tuple, loader, ttl: float, stale_ttl: float):
+        """Запускает фоновое обновление устаревшей записи, если оно ещё не идёт."""
+        if key in self._inflight or key in self._refresh_tasks:
+            return
+
+        async def refresh():
+            try:
+                await self.load(key, loader, ttl, stale_ttl)
+            except Exception as e:
+                with self._lock:
+                    self._count(key[0], "refresh_errors")
+                logger.warning("cache refresh failed for %s: %s", key, e)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+
+    def not_modified(self, namespace: str):
+        with self._lock:
+            self._count(namespace, "not_modified")
+
+    def invalidate(self, namespace: Optional[str] = None, **match) -> int:
+        """
+        Удаляет записи namespace (все, если namespace=None), у которых аргументы
+        совпадают с match, и увеличивает поколение namespace (для match — тоже
+        целиком: идущие загрузки не кладут результат в кеш). Возвращает число удалённых записей.
+        """
+        with self._lock:
+            if namespace is None:
+                self._generation += 1
+            else:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            doomed = [
+                key for key in self._entries
+                if (namespace is None or key[0] == namespace)
+                and all(dict(key[1]).get(k) == v for k, v in match.items())
+            ]
+            for key in doomed:
+                del self._entries[key]
+            return len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "namespaces": {ns: dict(c) for ns, c in self._stats.items()},
+            }
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES)
+
+
+def cached(namespace: str, ttl: float = CATALOG_CACHE_TTL, stale_ttl: float = CACHE_STALE_TTL,
+           bypass: Optional[Callable[[dict], bool]] = None):
+    """
+    Декоратор GET-обработчика: кеширует ответ на ttl секунд и отдаёт ETag.
+    Ещё stale_ttl секунд после этого отдаётся прежний ответ, пока он обновляется в фоне.
+    Повторный запрос с совпадающим If-None-Match получает 304.
+    Обработчик может быть как def, так и async def; если ему не нужен Request,
+    декоратор добавляет этот параметр в сигнатуру сам.
+    bypass(kwargs) → True: запрос идёт прямо в обработчик, мимо кеша и single-flight
+    (например, потоковые ответы, которые нельзя отдать нескольким клиентам).
+    """
+    def decorator(func):
+        sig = inspect.signature(func)
+        wants_request = "request" in sig.parameters
+        params = list(sig.parameters.values())
+        if not wants_request:
+            params.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        is_async = inspect.iscoroutinefunction(func)
+
+        # значения по умолчанию входят в ключ: warm(sport_id=1) и запрос без query-параметров
+        # попадают в одну запись; Query(False) → False
+        defaults = {
+            name: getattr(p.default, "default", p.default)
+            for name, p in sig.parameters.items()
+            if p.default is not inspect.Parameter.empty and name != "request"
+        }
+
+        def make_key(kwargs):
+            args = {**defaults, **kwargs}
+            args.pop("request", None)
+            return (namespace, tuple(sorted(args.items())))
+
+        def make_loader(kwargs):
+            # обработчик получает те же значения по умолчанию, что вошли в ключ:
+            # warm() без query-параметров иначе передал бы ему сами Query(...)
+            call_kwargs = {**defaults, **kwargs}
+
+            async def loader():
+                if is_async:
+                    result = await func(**call_kwargs)
+                else:
+                    result = await run_in_threadpool(func, **call_kwargs)
+                if isinstance(result, StoredJSONResponse):
+                    return result.body
+                return result if isinstance(result, Response) else _encode_json(result)
+            return loader
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            request = kwargs["request"] if wants_request else kwargs.pop("request")
+            if bypass is not None and bypass(kwargs):
+                call_kwargs = {**defaults, **kwargs}
+                if is_async:
+                    return await func(**call_kwargs)
+                return await run_in_threadpool(func, **call_kwargs)
+            key = make_key(kwargs)
+            loader = make_loader(kwargs)
+
+            entry = response_cache.get(key)
+            if entry is None:
+                entry = await response_cache.load(key, loader, ttl, stale_ttl)
+                if isinstance(entry, Response):
+                    return entry
+            elif not entry.is_fresh():
+                response_cache.revalidate(key, loader, ttl, stale_ttl)
+            response = entry.response(request)
+            if response.status_code == 304:
+                response_cache.not_modified(namespace)
+            return response
+
+        async def warm(**kwargs):
+            """Загружает ответ в кеш без запроса. Аргументы — как у обработчика, явно."""
+            key = make_key(kwargs)
+            if response_cache.get(key) is None:
+                await response_cache.load(key, make_loader(kwargs), ttl, stale_ttl)
+
+        wrapper.__signature__ = sig.replace(parameters=params)
+        wrapper.warm = warm
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# Инвалидация кеша по LISTEN/NOTIFY
+# =============================================================================
+# Каждый изменяющий эндпоинт внутри своей транзакции вызывает publish_catalog_change():
+# NOTIFY доставляется только после COMMIT. Каждый воркер держит слушателя, который
+# сбрасывает ровно те записи кеша, что зависят от изменённых таблиц (и вида спорта).
+
+CATALOG_CHANNEL = "catalog_changes"
+
+# namespace кеша → таблицы, от которых зависит ответ
+CACHE_DEPENDENCIES: Dict[str, set] = {
+    "sports": {"ref_sports", "ref_sport_types", "sport_ministry_act"},
+    "sport_disciplines": {"ref_disciplines", "sport_ministry_act"},
+    "parameters": {"ref_parameters", "ref_parameters_types"},
+    "parameter_types": {"ref_parameters_types"},
+    "requirement_types": {"ref_requirements_types"},
+    "requirements": {"ref_requirements", "ref_requirements_types"},
+    "ranks": {"ref_ranks"},
+    "ldp": {"lnk_discipline_parameters", "ref_disciplines", "ref_parameters"},
+}
+_NORMATIVES_TABLES = {
+    "ref_sports", "sport_ministry_act", "ref_disciplines", "lnk_discipline_parameters",
+    "ref_parameters", "ref_parameters_types", "groups", "normatives", "ref_ranks",
+    "conditions", "ref_requirements",
+}
+CACHE_DEPENDENCIES["sport_normatives"] = _NORMATIVES_TABLES
+CACHE_DEPENDENCIES["sport_normatives_v1"] = _NORMATIVES_TABLES
+CACHE_DEPENDENCIES["sport_bundle"] = _NORMATIVES_TABLES | {"ref_sport_types"}
+
+# namespace, ключи которых содержат sport_id: при известном виде спорта чистим только его
+SPORT_SCOPED_NAMESPACES = {"sport_disciplines", "sport_normatives", "sport_normatives_v1", "sport_bundle"}
+
+
+def publish_catalog_change(cur, tables: List[str], sport_id: Optional[int] = None):
+    """Публикует NOTIFY об изменении таблиц; уходит клиентам при COMMIT текущей транзакции."""
+    payload = json.dumps({"tables": tables, "sport_id": sport_id})
+    cur.execute("SELECT pg_notify(%s, %s)", (CATALOG_CHANNEL, payload))
+
+
+def apply_catalog_change(change: dict):
+    """
+    Сбрасывает записи кеша, зависящие от изменённых таблиц.
+    Каталог в памяти обновляется раньше кеша, чтобы кеш не наполнился снова из старых данных.
+    """
+    tables = set(change.get("tables") or [])
+    sport_id = change.get("sport_id")
+    catalog_engine.apply_change(tables, sport_id)
+    threshold_index.apply_change(tables, sport_id)
+    search_index.apply_change(tables)
+    normatives_filter_index.apply_change(tables, sport_id)
+    for namespace, deps in CACHE_DEPENDENCIES.items():
+        if not deps & tables:
+            continue
+        if namespace in SPORT_SCOPED_NAMESPACES and sport_id is not None:
+            response_cache.invalidate(namespace, sport_id=sport_id)
+        else:
+            response_cache.invalidate(namespace)
+
+
+def sport_id_for_discipline(cur, discipline_id: int) -> Optional[int]:
+    cur.execute("""
+        SELECT a.sport_id
+        FROM ref_disciplines d
+        JOIN sport_ministry_act a ON a.id = d.sport_act_id
+        WHERE d.id = %s
+    """, (discipline_id,))
+    row = cur.fetchone()
+    return row["sport_id"] if row else None
+
+
+def sport_id_for_act(cur, act_id: int) -> Optional[int]:
+    cur.execute("SELECT sport_id FROM sport_ministry_act WHERE id = %s", (act_id,))
+    row = cur.fetchone()
+    return row["sport_id"] if row else None
+
+
+def sport_id_for_normative(cur, normative_id: int) -> Optional[int]:
+    cur.execute("""
+        SELECT a.sport_id
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        JOIN ref_disciplines d ON d.id = ldp.discipline_id
+        JOIN sport_ministry_act a ON a.id = d.sport_act_id
+        WHERE g.normative_id = %s
+        LIMIT 1
+    """, (normative_id,))
+    row = cur.fetchone()
+    return row["sport_id"] if row else None
+
+
+class CatalogListener:
+    """
+    Фоновый поток с отдельным соединением (вне пула), выполняющим LISTEN catalog_changes.
+    После (пере)подключения кеш сбрасывается целиком, а каталог в памяти
+    перезагружается: уведомления, пришедшие во время обрыва, потеряны.
+    """
+
+    RECONNECT_DELAY = 5  # секунды
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.RECONNECT_DELAY + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**DB_CONFIG)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                if CATALOG_ENGINE:
+                    catalog_engine.reload()
+                search_index.invalidate()
+                response_cache.invalidate()
+                self._listen(conn)
+            except Exception as e:
+                logger.warning("catalog listener error: %s", e)
+                self._stop.wait(self.RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 1.0) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    apply_catalog_change(json.loads(notify.payload))
+                except ValueError:
+                    logger.warning("bad catalog notification: %r", notify.payload)
+
+
+catalog_listener = CatalogListener(CATALOG_CHANNEL)
+
+
 # ====== Pydantic модели для входящих POST-запросов ======
 
 class DisciplinesIn(BaseModel):
@@ -110,6 +862,30 @@ class LinkDeletePayload(BaseModel):
     parameter_id: int
 
 
+class NormativesBatchIn(BaseModel):
+    ids: List[int]
+
+
+class EvaluateIn(BaseModel):
+    parameters: Dict[str, str] = {}       # тип параметра → значение, например {"Пол": "Мужчины"}
+    result: Union[float, str]              # 10.85, "1:23.45", "6,20"
+    requirement: Optional[str] = None      # только нормативы этого требования (например, "Время")
+
+
+class EvaluateBatchRow(EvaluateIn):
+    discipline_id: Optional[int] = None
+    discipline_code: Optional[str] = None  # код дисциплины действующего акта, если нет discipline_id
+
+
+class EvaluateBatchIn(BaseModel):
+    rows: List[EvaluateBatchRow]
+
+
+class ActCloneIn(BaseModel):
+    act_details: str
+    start_date: Optional[date] = None  # по умолчанию — сегодня
+
+
 # =============================================================================
 # GET — справочники (не зависят от схемы дисциплин)
 # =============================================================================
@@ -117,16 +893,18 @@ class LinkDeletePayload(BaseModel):
 @app.get("/sports")
 def get_sports_json():
     """Плоский список всех видов спорта."""
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT s.id, s.sport_name, s.image_url, t.type_name
-        FROM ref_sports s
-        LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
-        ORDER BY s.sport_name
-    """)
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT s.id, s.sport_name, s.image_url, t.type_name
+            FROM ref_sports s
+            LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
+            ORDER BY s.sport_name
+        """)
+        rows = [
+            {"id": r[0], "sport_name": r[1], "image_url": r[2], "type_name": r[3]}
+            for r in cur.fetchall()
+        ]
     return {"sports": rows}
 
 
@@ -136,72 +914,53 @@ def get_sports_v1_json():
     Виды спорта вместе с дисциплинами из ДЕЙСТВУЮЩИХ актов (end_date IS NULL).
     Используется фронтендом для первоначальной загрузки списка.
     """
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT
-            s.id        AS sport_id,
-            s.sport_name,
-            s.image_url,
-            t.type_name,
-            d.id        AS discipline_id,
-            d.discipline_name
-        FROM ref_sports s
-        LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
-        LEFT JOIN sport_ministry_act a ON a.sport_id = s.id AND a.end_date IS NULL
-        LEFT JOIN ref_disciplines d ON d.sport_act_id = a.id
-        ORDER BY s.id, d.discipline_name
-    """)
-    rows = cur.fetchall()
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT
+                s.id        AS sport_id,
+                s.sport_name,
+                s.image_url,
+                t.type_name,
+                d.id        AS discipline_id,
+                d.discipline_name
+            FROM ref_sports s
+            LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
+            LEFT JOIN sport_ministry_act a ON a.sport_id = s.id AND a.end_date IS NULL
+            LEFT JOIN ref_disciplines d ON d.sport_act_id = a.id
+            ORDER BY s.id, d.discipline_name
+        """)
+        rows = cur.fetchall()
 
     sports_map = {}
-    for row in rows:
-        sid = row["sport_id"]
+    for sid, sport_name, image_url, type_name, discipline_id, discipline_name in rows:
         if sid not in sports_map:
             sports_map[sid] = {
                 "id": sid,
-                "sport_name": row["sport_name"],
-                "sport_type": row["type_name"],
-                "image_url": row["image_url"],
+                "sport_name": sport_name,
+                "sport_type": type_name,
+                "image_url": image_url,
                 "disciplines": []
             }
-        if row["discipline_id"] is not None:
+        if discipline_id is not None:
             sports_map[sid]["disciplines"].append({
-                "discipline_id": row["discipline_id"],
-                "discipline_name": row["discipline_name"]
+                "discipline_id": discipline_id,
+                "discipline_name": discipline_name
             })
 
     return {"sports": list(sports_map.values())}
 
 
-_sports_v2_cache: dict = {"data": None, "etag": None, "expires": 0.0}
-_SPORTS_V2_TTL = 300  # секунды
-
-
 @app.get("/v_2/sports")
-def get_sports_v2_json(request: Request):
+@cached("sports")
+async def get_sports_v2_json():
     """
     Виды спорта из действующих актов, без дисциплин.
-    Серверный кеш (TTL 5 мин) + ETag для браузера:
-    - в рамках TTL 304 отдаётся без обращения к БД
-    - после истечения TTL данные обновляются из БД и ETag пересчитывается
-    """
-    now = time.time()
-    if_none_match = request.headers.get("if-none-match")
-
-    if _sports_v2_cache["data"] is not None and now < _sports_v2_cache["expires"]:
-        etag = _sports_v2_cache["etag"]
-        if if_none_match == etag:
-            return Response(status_code=304)
-        return JSONResponse(
-            content=_sports_v2_cache["data"],
-            headers={"ETag": etag, "Cache-Control": "no-cache"},
-        )
-
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
+    Серверный кеш (CATALOG_CACHE_TTL) + ETag для браузера:
+    - пока запись в кеше, 304 отдаётся без обращения к БД
+    - запись сбрасывается по NOTIFY после изменения актов/видов спорта или по истечении TTL
+    """
+    rows = [row_to_dict(r) for r in await fetch_rows("""
         SELECT DISTINCT
             s.id,
             s.sport_name,
@@ -211,30 +970,13 @@ def get_sports_v2_json(request: Request):
         LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
         INNER JOIN sport_ministry_act a ON a.sport_id = s.id AND a.end_date IS NULL
         ORDER BY s.sport_name
-    """)
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
-
-    data = {"sports": rows}
-    etag = '"' + hashlib.md5(
-        json.dumps(data, ensure_ascii=False, sort_keys=True).encode()
-    ).hexdigest() + '"'
-
-    _sports_v2_cache["data"] = data
-    _sports_v2_cache["etag"] = etag
-    _sports_v2_cache["expires"] = now + _SPORTS_V2_TTL
-
-    if if_none_match == etag:
-        return Response(status_code=304)
-
-    return JSONResponse(
-        content=data,
-        headers={"ETag": etag, "Cache-Control": "no-cache"},
-    )
+    """)]
+    return {"sports": rows}
 
 
 @app.get("/v_2/sports/{sport_id}/disciplines")
-def get_disciplines_for_sport_v2(
+@cached("sport_disciplines")
+async def get_disciplines_for_sport_v2(
     sport_id: int,
     include_expired: bool = Query(
         False,
@@ -250,8 +992,6 @@ def get_disciplines_for_sport_v2(
     При include_expired=true возвращает дисциплины из всех актов —
     используется в административном интерфейсе.
     """
-    conn = get_conn()
-    cur = conn.cursor()
     try:
         query = """
             SELECT
@@ -273,8 +1013,7 @@ def get_disciplines_for_sport_v2(
 
         query += " ORDER BY d.discipline_name"
 
-        cur.execute(query, params)
-        rows = [row_to_dict(r) for r in cur.fetchall()]
+        rows = [row_to_dict(r) for r in await fetch_rows(query, *params)]
         return {
             "sport_id": sport_id,
             "disciplines": rows,
@@ -283,8 +1022,6 @@ def get_disciplines_for_sport_v2(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 # --- Устаревшие эндпоинты дисциплин (оставлены для обратной совместимости) ---
@@ -297,31 +1034,32 @@ def list_disciplines_json(
     УСТАРЕЛ. Использовать GET /v_2/sports/{sport_id}/disciplines.
     Оставлен для обратной совместимости. Фильтрует по действующим актам.
     """
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        if sport_id is not None:
-            cur.execute("""
-                SELECT d.id, d.discipline_name, d.discipline_code, a.sport_id
-                FROM ref_disciplines d
-                JOIN sport_ministry_act a ON a.id = d.sport_act_id
-                WHERE a.sport_id = %s AND a.end_date IS NULL
-                ORDER BY d.discipline_name
-            """, (sport_id,))
-        else:
-            cur.execute("""
-                SELECT d.id, d.discipline_name, d.discipline_code, a.sport_id
-                FROM ref_disciplines d
-                JOIN sport_ministry_act a ON a.id = d.sport_act_id
-                WHERE a.end_date IS NULL
-                ORDER BY d.discipline_name
-            """)
-        rows = [row_to_dict(r) for r in cur.fetchall()]
-        return {"disciplines": rows, "total_count": len(rows)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        try:
+            if sport_id is not None:
+                cur.execute("""
+                    SELECT d.id, d.discipline_name, d.discipline_code, a.sport_id
+                    FROM ref_disciplines d
+                    JOIN sport_ministry_act a ON a.id = d.sport_act_id
+                    WHERE a.sport_id = %s AND a.end_date IS NULL
+                    ORDER BY d.discipline_name
+                """, (sport_id,))
+            else:
+                cur.execute("""
+                    SELECT d.id, d.discipline_name, d.discipline_code, a.sport_id
+                    FROM ref_disciplines d
+                    JOIN sport_ministry_act a ON a.id = d.sport_act_id
+                    WHERE a.end_date IS NULL
+                    ORDER BY d.discipline_name
+                """)
+            rows = [
+                {"id": r[0], "discipline_name": r[1], "discipline_code": r[2], "sport_id": r[3]}
+                for r in cur.fetchall()
+            ]
+            return {"disciplines": rows, "total_count": len(rows)}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/v_1/disciplines/{sport_id}")
@@ -330,22 +1068,23 @@ def list_disciplines_for_sport_v1_json(sport_id: int):
     УСТАРЕЛ. Использовать GET /v_2/sports/{sport_id}/disciplines.
     Оставлен для обратной совместимости. Возвращает только действующие дисциплины.
     """
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("""
-            SELECT d.id AS discipline_id, d.discipline_name, d.discipline_code
-            FROM ref_disciplines d
-            JOIN sport_ministry_act a ON a.id = d.sport_act_id
-            WHERE a.sport_id = %s AND a.end_date IS NULL
-            ORDER BY d.discipline_name
-        """, (sport_id,))
-        rows = [row_to_dict(r) for r in cur.fetchall()]
-        return {"sport_id": sport_id, "disciplines": rows, "total_count": len(rows)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        try:
+            cur.execute("""
+                SELECT d.id AS discipline_id, d.discipline_name, d.discipline_code
+                FROM ref_disciplines d
+                JOIN sport_ministry_act a ON a.id = d.sport_act_id
+                WHERE a.sport_id = %s AND a.end_date IS NULL
+                ORDER BY d.discipline_name
+            """, (sport_id,))
+            rows = [
+                {"discipline_id": r[0], "discipline_name": r[1], "discipline_code": r[2]}
+                for r in cur.fetchall()
+            ]
+            return {"sport_id": sport_id, "disciplines": rows, "total_count": len(rows)}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 # =============================================================================
@@ -353,100 +1092,111 @@ def list_disciplines_for_sport_v1_json(sport_id: int):
 # =============================================================================
 
 @app.get("/parameters")
+@cached("parameters")
 def list_parameters_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT p.id, p.parameter_type_id, t.type_name AS parameter_type_name, p.parameter_value
-        FROM ref_parameters p
-        LEFT JOIN ref_parameters_types t ON p.parameter_type_id = t.id
-        ORDER BY t.type_name, p.parameter_value
-    """)
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT p.id, p.parameter_type_id, t.type_name AS parameter_type_name, p.parameter_value
+            FROM ref_parameters p
+            LEFT JOIN ref_parameters_types t ON p.parameter_type_id = t.id
+            ORDER BY t.type_name, p.parameter_value
+        """)
+        rows = [
+            {"id": r[0], "parameter_type_id": r[1], "parameter_type_name": r[2], "parameter_value": r[3]}
+            for r in cur.fetchall()
+        ]
     return {"parameters": rows}
 
 
 @app.get("/parameter_types")
+@cached("parameter_types")
 def list_parameter_types_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, type_name AS parameter_type_name FROM ref_parameters_types")
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("SELECT id, type_name AS parameter_type_name FROM ref_parameters_types")
+        rows = [{"id": r[0], "parameter_type_name": r[1]} for r in cur.fetchall()]
     return {"parameter_types": rows}
 
 
 @app.get("/requirement_types")
+@cached("requirement_types")
 def list_requirement_types_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, type_name AS requirement_type_name FROM ref_requirements_types")
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("SELECT id, type_name AS requirement_type_name FROM ref_requirements_types")
+        rows = [{"id": r[0], "requirement_type_name": r[1]} for r in cur.fetchall()]
     return {"requirements_types": rows}
 
 
 @app.get("/requirements")
+@cached("requirements")
 def list_requirements_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT p.id, p.requirement_type_id, t.type_name AS requirement_type_name, p.requirement_value
-        FROM ref_requirements p
-        LEFT JOIN ref_requirements_types t ON p.requirement_type_id = t.id
-        ORDER BY t.type_name, p.requirement_value
-    """)
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT p.id, p.requirement_type_id, t.type_name AS requirement_type_name, p.requirement_value
+            FROM ref_requirements p
+            LEFT JOIN ref_requirements_types t ON p.requirement_type_id = t.id
+            ORDER BY t.type_name, p.requirement_value
+        """)
+        rows = [
+            {"id": r[0], "requirement_type_id": r[1], "requirement_type_name": r[2], "requirement_value": r[3]}
+            for r in cur.fetchall()
+        ]
     return {"requirements": rows}
 
 
 @app.get("/ldp")
+@cached("ldp")
 def list_ldp_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT l.id, l.discipline_id, d.discipline_name, l.parameter_id, p.parameter_value
-        FROM lnk_discipline_parameters l
-        LEFT JOIN ref_disciplines d ON l.discipline_id = d.id
-        LEFT JOIN ref_parameters p ON l.parameter_id = p.id
-        ORDER BY d.discipline_name, p.parameter_value
-    """)
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT l.id, l.discipline_id, d.discipline_name, l.parameter_id, p.parameter_value
+            FROM lnk_discipline_parameters l
+            LEFT JOIN ref_disciplines d ON l.discipline_id = d.id
+            LEFT JOIN ref_parameters p ON l.parameter_id = p.id
+            ORDER BY d.discipline_name, p.parameter_value
+        """)
+        rows = [
+            {"id": r[0], "discipline_id": r[1], "discipline_name": r[2], "parameter_id": r[3], "parameter_value": r[4]}
+            for r in cur.fetchall()
+        ]
     return {"lnk_discipline_parameters": rows}
 
 
 @app.get("/discipline-parameters/{discipline_id}")
 def list_ldp_for_discipline(discipline_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT
-            l.id AS ldp_id,
-            p.id,
-            pt.type_name AS parameter_type_name,
-            p.parameter_type_id,
-            p.parameter_value
-        FROM lnk_discipline_parameters l
-        JOIN ref_parameters p ON l.parameter_id = p.id
-        JOIN ref_parameters_types pt ON p.parameter_type_id = pt.id
-        WHERE l.discipline_id = %s
-        ORDER BY pt.type_name, p.parameter_value
-    """, (discipline_id,))
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT
+                l.id AS ldp_id,
+                p.id,
+                pt.type_name AS parameter_type_name,
+                p.parameter_type_id,
+                p.parameter_value
+            FROM lnk_discipline_parameters l
+            JOIN ref_parameters p ON l.parameter_id = p.id
+            JOIN ref_parameters_types pt ON p.parameter_type_id = pt.id
+            WHERE l.discipline_id = %s
+            ORDER BY pt.type_name, p.parameter_value
+        """, (discipline_id,))
+        rows = [
+            {"ldp_id": r[0], "id": r[1], "parameter_type_name": r[2], "parameter_type_id": r[3], "parameter_value": r[4]}
+            for r in cur.fetchall()
+        ]
     return {"lnk_discipline_parameters": rows}
 
 
 @app.get("/ranks")
+@cached("ranks")
 def list_ranks_json():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, short_name, full_name, prestige FROM ref_ranks ORDER BY prestige DESC")
-    rows = [row_to_dict(r) for r in cur.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("SELECT id, short_name, full_name, prestige FROM ref_ranks ORDER BY prestige DESC")
+        rows = [{"id": r[0], "short_name": r[1], "full_name": r[2], "prestige": r[3]} for r in cur.fetchall()]
     return {"ranks": rows}
 
 
@@ -457,50 +1207,49 @@ def list_ranks_json():
 @app.get("/sports/{sport_id}", response_class=HTMLResponse)
 def get_normatives_for_sport_html(sport_id: int):
     """HTML-представление нормативов для вида спорта. Только действующие акты."""
-    conn = get_conn()
-    cur = conn.cursor()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
 
-    query = """
-        SELECT
-            rs.sport_name                                                        AS sport_name,
-            rd.discipline_name                                                   AS discipline_name,
-            rd.discipline_code                                                   AS discipline_code,
-            STRING_AGG(
-                rpt.type_name || ': ' || rp.parameter_value, ', '
-                ORDER BY rpt.type_name, rp.parameter_value
-            )                                                                    AS discipline_parameters,
-            rr.short_name                                                        AS rank_short,
-            rr.full_name                                                         AS rank_full,
-            rr.prestige                                                          AS rank_prestige,
-            rreq.requirement_value                                               AS requirement_short,
-            rreq.description                                                     AS requirement_desc,
-            c.condition                                                          AS condition_value,
-            rr.id                                                                AS rank_id,
-            rd.id                                                                AS discipline_id,
-            n.id                                                                 AS normative_id
-        FROM conditions c
-        JOIN normatives n       ON c.normative_id = n.id
-        JOIN ref_ranks rr       ON n.rank_id = rr.id
-        JOIN ref_requirements rreq ON c.requirement_id = rreq.id
-        JOIN groups g           ON n.id = g.normative_id
-        JOIN lnk_discipline_parameters ldp ON g.discipline_parameter_id = ldp.id
-        JOIN ref_disciplines rd ON ldp.discipline_id = rd.id
-        JOIN ref_parameters rp  ON ldp.parameter_id = rp.id
-        JOIN ref_parameters_types rpt ON rp.parameter_type_id = rpt.id
-        JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
-        JOIN ref_sports rs      ON rs.id = sma.sport_id
-        WHERE rs.id = %s
-          AND sma.end_date IS NULL
-        GROUP BY
-            rs.sport_name, rd.discipline_name, rd.discipline_code,
-            rr.short_name, rr.full_name, rr.prestige,
-            rreq.requirement_value, rreq.description,
-            c.condition, rr.id, rd.id, n.id
-        ORDER BY rd.discipline_name, rr.prestige DESC, rr.id
-    """
-    cur.execute(query, (sport_id,))
-    rows = cur.fetchall()
-    conn.close()
+        query = """
+            SELECT
+                rs.sport_name                                                        AS sport_name,
+                rd.discipline_name                                                   AS discipline_name,
+                rd.discipline_code                                                   AS discipline_code,
+                STRING_AGG(
+                    rpt.type_name || ': ' || rp.parameter_value, ', '
+                    ORDER BY rpt.type_name, rp.parameter_value
+                )                                                                    AS discipline_parameters,
+                rr.short_name                                                        AS rank_short,
+                rr.full_name                                                         AS rank_full,
+                rr.prestige                                                          AS rank_prestige,
+                rreq.requirement_value                                               AS requirement_short,
+                rreq.description                                                     AS requirement_desc,
+                c.condition                                                          AS condition_value,
+                rr.id                                                                AS rank_id,
+                rd.id                                                                AS discipline_id,
+                n.id                                                                 AS normative_id
+            FROM conditions c
+            JOIN normatives n       ON c.normative_id = n.id
+            JOIN ref_ranks rr       ON n.rank_id = rr.id
+            JOIN ref_requirements rreq ON c.requirement_id = rreq.id
+            JOIN groups g           ON n.id = g.normative_id
+            JOIN lnk_discipline_parameters ldp ON g.discipline_parameter_id = ldp.id
+            JOIN ref_disciplines rd ON ldp.discipline_id = rd.id
+            JOIN ref_parameters rp  ON ldp.parameter_id = rp.id
+            JOIN ref_parameters_types rpt ON rp.parameter_type_id = rpt.id
+            JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
+            JOIN ref_sports rs      ON rs.id = sma.sport_id
+            WHERE rs.id = %s
+              AND sma.end_date IS NULL
+            GROUP BY
+                rs.sport_name, rd.discipline_name, rd.discipline_code,
+                rr.short_name, rr.full_name, rr.prestige,
+                rreq.requirement_value, rreq.description,
+                c.condition, rr.id, rd.id, n.id
+            ORDER BY rd.discipline_name, rr.prestige DESC, rr.id
+        """
+        cur.execute(query, (sport_id,))
+        rows = cur.fetchall()
 
     if not rows:
         return HTMLResponse(
@@ -508,7 +1257,7 @@ def get_normatives_for_sport_html(sport_id: int):
             status_code=200
         )
 
-    sport_name = rows[0]["sport_name"]
+    sport_name = rows[0][0]
     header = f"""
     <html><head><meta charset="utf-8"><title>Нормативы</title></head><body>
     <h2>Нормативы для вида спорта: {html.escape(sport_name)}</h2>
@@ -525,20 +1274,17 @@ def get_normatives_for_sport_html(sport_id: int):
       <tbody>
     """
     body_rows = ""
-    for r in rows:
-        params = r["discipline_parameters"] or ""
-        req = r["requirement_short"] or ""
-        req_desc = r["requirement_desc"] or ""
-        req_cell = html.escape(req)
+    for row_sport, discipline, _, params, rank_short, _, _, req, req_desc, condition_value, *_ in rows:
+        req_cell = html.escape(req or "")
         if req_desc:
             req_cell += f" ({html.escape(req_desc)})"
         body_rows += (
             f"<tr>"
-            f"<td>{html.escape(r['sport_name'])}</td>"
-            f"<td>{html.escape(r['discipline_name'])} ({html.escape(params)})</td>"
-            f"<td>{html.escape(r['rank_short'])}</td>"
+            f"<td>{html.escape(row_sport)}</td>"
+            f"<td>{html.escape(discipline)} ({html.escape(params or '')})</td>"
+            f"<td>{html.escape(rank_short)}</td>"
             f"<td>{req_cell}</td>"
-            f"<td>{html.escape(r['condition_value'])}</td>"
+            f"<td>{html.escape(condition_value)}</td>"
             f"</tr>"
         )
     footer = "</tbody></table></body></html>"
@@ -546,19 +1292,1243 @@ def get_normatives_for_sport_html(sport_id: int):
 
 
 # =============================================================================
-# GET — нормативы по виду спорта (JSON)
+# Нормативы: агрегированные запросы (json_agg)
 # =============================================================================
-
-@app.get("/sports/{sport_id}/normatives")
-def get_normatives_for_sport_json(sport_id: int):
-    """Нормативы по виду спорта. Только действующие акты (end_date IS NULL)."""
-    conn = get_conn()
-    cur = conn.cursor()
-
-    query = """
+# Плоский JOIN нормативов возвращает (параметры × условия) строк на каждый
+# норматив, и дальше Python сворачивает это декартово произведение обратно.
+# В режиме "aggregated" Postgres отдаёт одну строку на норматив: параметры —
+# json_object_agg, условия — json_agg(json_build_object(...)). Порядок строк и
+# ключей повторяет то, что получалось из JOIN, поэтому ответ совпадает байт в байт.
+# При повторяющемся типе параметра json_object_agg выдаёт дублирующиеся ключи,
+# а json.loads оставляет позицию первого и значение последнего — ровно как
+# перезапись ключа в словаре в JOIN-режиме.
+# NORMATIVES_QUERY_MODE=join возвращает прежние запросы (для сравнения и отката).
+NORMATIVES_QUERY_MODE = os.getenv("NORMATIVES_QUERY_MODE", "aggregated")
+
+# Нормативы дисциплины: DISTINCT, т.к. норматив связан с дисциплиной через
+# несколько групп (по одной на параметр)
+_DISCIPLINE_NORMATIVES_LATERAL = """
+    CROSS JOIN LATERAL (
+        SELECT DISTINCT g.normative_id
+        FROM lnk_discipline_parameters ldp
+        JOIN groups g ON g.discipline_parameter_id = ldp.id
+        WHERE ldp.discipline_id = rd.id
+    ) dn
+    JOIN normatives n           ON n.id = dn.normative_id
+    JOIN ref_ranks rr           ON rr.id = n.rank_id
+"""
+
+# Параметры норматива в рамках дисциплины; пустые тип/значение в словарь не попадают
+_PARAMETERS_OBJECT_LATERAL = """
+    CROSS JOIN LATERAL (
         SELECT
-            rs.sport_name,
-            rd.id                   AS discipline_id,
+            COUNT(*)            AS params_count,
+            MIN(rpt.type_name)  AS first_param_type,
+            COALESCE(
+                json_object_agg(rpt.type_name, rp.parameter_value ORDER BY rpt.type_name)
+                    FILTER (WHERE rpt.type_name <> '' AND rp.parameter_value <> ''),
+                '{}'
+            )                   AS params
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
+        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+        WHERE g.normative_id = n.id AND ldp.discipline_id = rd.id
+    ) p
+"""
+
+NORMATIVES_FOR_SPORT_AGG_QUERY = """
+    SELECT
+        rs.sport_name,
+        rd.id                   AS discipline_id,
+        rd.discipline_name,
+        rd.discipline_code,
+        n.id                    AS normative_id,
+        rr.id                   AS rank_id,
+        rr.short_name           AS rank_short,
+        rr.prestige,
+        p.params,
+        c.conditions
+    FROM ref_sports rs
+    JOIN sport_ministry_act sma ON sma.sport_id = rs.id AND sma.end_date IS NULL
+    JOIN ref_disciplines rd     ON rd.sport_act_id = sma.id
+""" + _DISCIPLINE_NORMATIVES_LATERAL + _PARAMETERS_OBJECT_LATERAL + """
+    CROSS JOIN LATERAL (
+        SELECT
+            json_agg(json_build_object(
+                'id', c.id,
+                'type', rreq.requirement_value,
+                'value', c.condition,
+                'is_competition', COALESCE(rreq.requirement_type_id = 16, false),
+                'parent_id', c.parent_id
+            ) ORDER BY c.parent_id NULLS FIRST, c.id) AS conditions,
+            (array_agg(c.parent_id ORDER BY c.parent_id NULLS FIRST, c.id))[1] AS first_parent_id,
+            (array_agg(c.id ORDER BY c.parent_id NULLS FIRST, c.id))[1]        AS first_condition_id
+        FROM conditions c
+        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+        WHERE c.normative_id = n.id
+    ) c
+    WHERE rs.id = %s AND p.params_count > 0 AND c.conditions IS NOT NULL
+    ORDER BY rd.discipline_name, rr.prestige DESC, p.first_param_type,
+             c.first_parent_id NULLS FIRST, c.first_condition_id
+"""
+
+NORMATIVES_FOR_SPORT_V1_AGG_QUERY = """
+    SELECT
+        rs.id                   AS sport_id,
+        rs.sport_name,
+        rd.id                   AS discipline_id,
+        rd.discipline_name,
+        rd.discipline_code,
+        rr.id                   AS rank_id,
+        rr.short_name           AS rank_short,
+        rr.full_name            AS rank_full,
+        rr.prestige             AS rank_prestige,
+        n.id                    AS normative_id,
+        p.params,
+        c.conditions
+    FROM ref_sports rs
+    JOIN sport_ministry_act sma ON sma.sport_id = rs.id AND sma.end_date IS NULL
+    JOIN ref_disciplines rd     ON rd.sport_act_id = sma.id
+""" + _DISCIPLINE_NORMATIVES_LATERAL + _PARAMETERS_OBJECT_LATERAL + """
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS conditions_count,
+            COALESCE(
+                json_object_agg(rreq.requirement_value, c.condition
+                                ORDER BY c.parent_id NULLS FIRST, c.id)
+                    FILTER (WHERE rreq.requirement_value <> '' AND c.condition <> ''),
+                '{}'
+            ) AS conditions
+        FROM conditions c
+        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+        WHERE c.normative_id = n.id
+    ) c
+    WHERE rs.id = %s AND p.params_count > 0 AND c.conditions_count > 0
+    ORDER BY rd.discipline_name, rr.prestige DESC, n.id
+"""
+
+NORMATIVES_BY_DISCIPLINE_AGG_QUERY = """
+    SELECT
+        rs.id                       AS sport_id,
+        rs.sport_name,
+        rd.id                       AS discipline_id,
+        rd.discipline_name,
+        rd.discipline_code,
+        n.id                        AS normative_id,
+        rr.id                       AS rank_id,
+        rr.short_name               AS rank_short,
+        rr.full_name                AS rank_full,
+        rr.prestige                 AS rank_prestige,
+        p.params,
+        c.conditions
+    FROM ref_disciplines rd
+    JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
+    JOIN ref_sports rs          ON rs.id = sma.sport_id
+""" + _DISCIPLINE_NORMATIVES_LATERAL + """
+    CROSS JOIN LATERAL (
+        -- первый встретившийся параметр каждого типа, как при дедупликации в JOIN-режиме
+        SELECT
+            COUNT(*) AS params_count,
+            COALESCE(
+                json_agg(json_build_object('type', t.type_name, 'value', t.parameter_value)
+                         ORDER BY t.type_name) FILTER (WHERE t.type_name <> ''),
+                '[]'
+            ) AS params
+        FROM (
+            SELECT DISTINCT ON (rpt.type_name) rpt.type_name, rp.parameter_value
+            FROM groups g
+            JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+            JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
+            JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+            WHERE g.normative_id = n.id AND ldp.discipline_id = rd.id
+            ORDER BY rpt.type_name, rp.parameter_value
+        ) t
+    ) p
+    CROSS JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id', c.id,
+            'type', CASE rreq.requirement_type_id
+                        WHEN 1 THEN 'norm' WHEN 2 THEN 'comp' ELSE 'other' END,
+            'name', rreq.requirement_value,
+            'value', c.condition,
+            'parent_id', c.parent_id,
+            'additional', json_build_array()
+        ) ORDER BY c.parent_id NULLS FIRST, c.id) AS conditions
+        FROM conditions c
+        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+        WHERE c.normative_id = n.id
+    ) c
+    WHERE rd.id = %s AND p.params_count > 0 AND c.conditions IS NOT NULL
+    ORDER BY n.id
+"""
+
+
+def build_condition_tree(all_conds: dict) -> list:
+    """Раскладывает плоские условия {id: cond} в дерево по parent_id, возвращает корни."""
+    roots = []
+    for cond in all_conds.values():
+        pid = cond["parent_id"]
+        if pid and pid in all_conds:
+            all_conds[pid]["additional"].append(cond)
+        else:
+            roots.append(cond)
+    return roots
+
+
+def sport_normative_item(row) -> dict:
+    """Элемент normatives ответа /sports/{sport_id}/normatives из строки NORMATIVES_FOR_SPORT_AGG_QUERY."""
+    return {
+        "id": row["normative_id"],
+        "discipline_id": row["discipline_id"],
+        "discipline_name": row["discipline_name"],
+        "discipline_code": row["discipline_code"],
+        "discipline_parameters": row["params"],
+        "rank_short": row["rank_short"],
+        "rank_prestige": row["prestige"],
+        "condition": row["conditions"],
+    }
+
+
+def sport_normative_v1_item(row) -> dict:
+    """Элемент normatives ответа /v_1/sports/{sport_id}/normatives из строки NORMATIVES_FOR_SPORT_V1_AGG_QUERY."""
+    return {
+        "id": row["normative_id"],
+        "discipline_id": row["discipline_id"],
+        "discipline_name": row["discipline_name"],
+        "discipline_code": row["discipline_code"],
+        "rank": {
+            "id": row["rank_id"],
+            "short": row["rank_short"],
+            "full": row["rank_full"],
+            "prestige": row["rank_prestige"]
+        },
+        "discipline_parameters": row["params"],
+        "conditions": row["conditions"]
+    }
+
+
+def discipline_normative_item(row) -> dict:
+    """Элемент normatives ответа /v_1/disciplines/{id}/normatives из строки NORMATIVES_BY_DISCIPLINE_AGG_QUERY."""
+    roots = build_condition_tree({cond["id"]: cond for cond in row["conditions"]})
+    return {
+        "id": row["normative_id"],
+        "rank": {
+            "id": row["rank_id"],
+            "short": row["rank_short"],
+            "full": row["rank_full"],
+            "prestige": row["rank_prestige"],
+        },
+        "discipline_parameters": row["params"],
+        "conditions": roots,
+        "is_competitive": any(c["type"] == "comp" for c in roots),
+    }
+
+
+def sport_normatives_payload(sport_id: int, rows) -> dict:
+    """Ответ /sports/{sport_id}/normatives из строк NORMATIVES_FOR_SPORT_AGG_QUERY."""
+    if not rows:
+        return {
+            "sport_id": sport_id,
+            "sport_name": "Неизвестный вид спорта",
+            "normatives": [],
+            "total_count": 0
+        }
+
+    normatives_data = [sport_normative_item(row) for row in rows]
+    return {
+        "sport_id": sport_id,
+        "sport_name": rows[0]["sport_name"],
+        "normatives": normatives_data,
+        "total_count": len(normatives_data)
+    }
+
+
+def sport_normatives_v1_payload(sport_id: int, rows) -> Optional[dict]:
+    """Ответ /v_1/sports/{sport_id}/normatives из строк NORMATIVES_FOR_SPORT_V1_AGG_QUERY; None — 404."""
+    if not rows:
+        return None
+
+    normatives_list = [sport_normative_v1_item(row) for row in rows]
+    return {
+        "sport_id": rows[0]["sport_id"],
+        "sport_name": rows[0]["sport_name"],
+        "normatives": normatives_list,
+        "total_count": len(normatives_list)
+    }
+
+
+async def _normatives_for_sport_aggregated(sport_id: int):
+    rows = await fetch_rows(NORMATIVES_FOR_SPORT_AGG_QUERY, sport_id)
+    return sport_normatives_payload(sport_id, rows)
+
+
+def _normatives_for_sport_v1_aggregated(sport_id: int):
+    rows = _fetch_rows_sync(NORMATIVES_FOR_SPORT_V1_AGG_QUERY, (sport_id,))
+    payload = sport_normatives_v1_payload(sport_id, rows)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Sport or normatives not found")
+    return payload
+
+
+async def _normatives_by_discipline_aggregated(discipline_id: int):
+    rows = await fetch_rows(NORMATIVES_BY_DISCIPLINE_AGG_QUERY, discipline_id)
+    if not rows:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Discipline {discipline_id} not found or has no normatives"
+        )
+
+    normatives = [discipline_normative_item(row) for row in rows]
+    first = rows[0]
+    return {
+        "sport_id": first["sport_id"],
+        "sport_name": first["sport_name"],
+        "discipline_id": first["discipline_id"],
+        "discipline_name": first["discipline_name"],
+        "discipline_code": first["discipline_code"],
+        "normatives": normatives,
+        "total_count": len(normatives),
+    }
+
+
+# =============================================================================
+# Материализованные документы нормативов (normatives_documents)
+# =============================================================================
+# /sports/{id}/normatives — самая посещаемая страница. Готовый JSON каждого
+# вида спорта хранится в normatives_documents: одна строка на (вид спорта,
+# версию ответа), act_id — действующий акт на момент сборки. Чтение сводится
+# к выборке по первичному ключу. Изменяющие эндпоинты пересобирают документы
+# своего вида спорта в той же транзакции, что и само изменение. Удаление
+# глобальных справочников удаляет все документы: они пересоберутся при
+# следующем чтении.
+# NORMATIVES_DOCUMENTS=0 — всегда собирать ответ запросом к БД.
+#
+# Служебные таблицы, колонки и триггеры (SCHEMA_STATEMENTS) создаёт отдельный
+# шаг деплоя, а не сервер:
+#     python app.py migrate
+#     docker compose run --rm backend python app.py migrate
+# Сервер только проверяет один раз на процесс, что миграция выполнена
+# (schema_ready); без неё работают запасные пути: ответы собираются запросами,
+# дедупликация нормативов идёт через GROUP BY, а импорт актов недоступен.
+NORMATIVES_DOCUMENTS = os.getenv("NORMATIVES_DOCUMENTS", "1") == "1"
+
+SCHEMA_STATEMENTS = [
+    # несколько воркеров стартуют одновременно — DDL выполняет один из них
+    "SELECT pg_advisory_xact_lock(hashtext('sportnormativ_schema'))",
+    """
+    CREATE TABLE IF NOT EXISTS normatives_documents (
+        sport_id    integer     NOT NULL,
+        version     text        NOT NULL,
+        act_id      integer,
+        body        bytea       NOT NULL,
+        etag        text        NOT NULL,
+        updated_at  timestamptz NOT NULL DEFAULT now(),
+        PRIMARY KEY (sport_id, version)
+    )
+    """,
+    # Postgres не индексирует внешние ключи сам. Агрегированные запросы нормативов
+    # собирают параметры и условия подзапросом на каждый норматив — без этих
+    # индексов каждый такой подзапрос читает groups/conditions целиком.
+    "CREATE INDEX IF NOT EXISTS groups_normative_id_idx ON groups (normative_id)",
+    "CREATE INDEX IF NOT EXISTS groups_discipline_parameter_id_idx ON groups (discipline_parameter_id)",
+    "CREATE INDEX IF NOT EXISTS conditions_normative_id_idx ON conditions (normative_id)",
+    # normatives.ldp_signature — отсортированные id связей дисциплина × параметр
+    # (groups.discipline_parameter_id) норматива. Дедупликация в POST /normatives
+    # ищет по индексу (rank_id, ldp_signature) вместо GROUP BY по всем нормативам
+    # разряда. Подпись поддерживают триггеры на groups, так что её не нужно
+    # пересчитывать в каждом месте, где меняются groups (в т.ч. каскадом).
+    # Индекс не уникальный: удаление связи может сделать подписи двух
+    # нормативов одинаковыми, и такое удаление не должно падать.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'normatives' AND column_name = 'ldp_signature'
+        ) THEN
+            ALTER TABLE normatives ADD COLUMN ldp_signature integer[];
+            UPDATE normatives n
+            SET ldp_signature = s.signature
+            FROM (
+                SELECT normative_id,
+                       array_agg(DISTINCT discipline_parameter_id ORDER BY discipline_parameter_id) AS signature
+                FROM groups
+                GROUP BY normative_id
+            ) s
+            WHERE s.normative_id = n.id;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS normatives_rank_signature_idx ON normatives (rank_id, ldp_signature)",
+    # Разобранное значение условия (см. parse_condition); существующие строки
+    # заполняет python app.py backfill-conditions
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'conditions' AND column_name = 'condition_numeric'
+        ) THEN
+            ALTER TABLE conditions
+                ADD COLUMN condition_numeric double precision,
+                ADD COLUMN condition_unit text,
+                ADD COLUMN condition_direction text;
+        END IF;
+    END $$
+    """,
+    # индекс (requirement_id, condition_numeric) ни одним запросом не использовался
+    "DROP INDEX IF EXISTS conditions_requirement_numeric_idx",
+    """
+    CREATE OR REPLACE FUNCTION normatives_refresh_ldp_signature() RETURNS trigger AS $$
+    BEGIN
+        UPDATE normatives n
+        SET ldp_signature = (
+            SELECT array_agg(DISTINCT g.discipline_parameter_id ORDER BY g.discipline_parameter_id)
+            FROM groups g
+            WHERE g.normative_id = n.id
+        )
+        WHERE n.id IN (SELECT normative_id FROM changed_groups);
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'groups_ldp_signature_ins') THEN
+            CREATE TRIGGER groups_ldp_signature_ins AFTER INSERT ON groups
+                REFERENCING NEW TABLE AS changed_groups
+                FOR EACH STATEMENT EXECUTE FUNCTION normatives_refresh_ldp_signature();
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'groups_ldp_signature_del') THEN
+            CREATE TRIGGER groups_ldp_signature_del AFTER DELETE ON groups
+                REFERENCING OLD TABLE AS changed_groups
+                FOR EACH STATEMENT EXECUTE FUNCTION normatives_refresh_ldp_signature();
+        END IF;
+    END $$
+    """,
+]
+
+# Нормативы разрядов rank_ids с набором ldp ровно %s — одним запросом на все разряды.
+# Без миграции (schema_ready() — False) — тот же поиск через GROUP BY по groups.
+FIND_NORMATIVES_BY_SIGNATURE = """
+    SELECT DISTINCT ON (rank_id) rank_id, id
+    FROM normatives
+    WHERE rank_id = ANY(%s) AND ldp_signature = %s::int[]
+    ORDER BY rank_id, id
+"""
+FIND_NORMATIVES_BY_GROUPS = """
+    SELECT DISTINCT ON (n.rank_id) n.rank_id, n.id
+    FROM normatives n
+    JOIN groups g ON g.normative_id = n.id
+    WHERE n.rank_id = ANY(%s)
+    GROUP BY n.id
+    HAVING array_agg(DISTINCT g.discipline_parameter_id ORDER BY g.discipline_parameter_id) = %s::int[]
+    ORDER BY n.rank_id, n.id
+"""
+
+# Всё, что создаёт SCHEMA_STATEMENTS: если есть последний объект каждого вида, миграция прошла
+SCHEMA_CHECK_QUERY = """
+    SELECT to_regclass('normatives_documents') IS NOT NULL
+       AND EXISTS (
+           SELECT 1 FROM information_schema.columns
+           WHERE table_name = 'normatives' AND column_name = 'ldp_signature'
+       )
+       AND EXISTS (
+           SELECT 1 FROM information_schema.columns
+           WHERE table_name = 'conditions' AND column_name = 'condition_direction'
+       )
+       AND EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'groups_ldp_signature_del')
+"""
+
+# None — ещё не проверяли; True/False — результат проверки, до конца жизни процесса
+_schema_state: Optional[bool] = None
+
+
+def schema_ready(cur=None) -> bool:
+    """
+    Выполнена ли миграция (python app.py migrate). Проверяется одним запросом
+    к каталогу один раз на процесс; отрицательный результат тоже запоминается —
+    после миграции сервер нужно перезапустить. cur — курсор вызывающего, если
+    тот уже держит соединение: второе соединение из пула не берётся.
+    Ошибка соединения (БД недоступна) не запоминается и пробрасывается.
+    """
+    global _schema_state
+    if _schema_state is None:
+        if cur is not None:
+            check = tuple_cursor(cur.connection)
+            check.execute(SCHEMA_CHECK_QUERY)
+            ready = check.fetchone()[0]
+        else:
+            with get_conn() as conn:
+                check = tuple_cursor(conn)
+                check.execute(SCHEMA_CHECK_QUERY)
+                ready = check.fetchone()[0]
+        if not ready:
+            logger.warning("schema is not migrated, run `python app.py migrate` and restart")
+        _schema_state = bool(ready)
+    return _schema_state
+
+
+def migrate() -> bool:
+    """Создаёт служебные таблицы, колонки и триггеры (SCHEMA_STATEMENTS) одной транзакцией."""
+    global _schema_state
+    with get_conn() as conn:
+        cur = conn.cursor()
+        for statement in SCHEMA_STATEMENTS:
+            cur.execute(statement)
+        conn.commit()
+        _schema_state = None
+        return schema_ready(cur)
+
+
+def migrate_cli(argv: List[str]) -> int:
+    """python app.py migrate — шаг деплоя перед запуском (или перезапуском) сервера."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="app.py migrate", description=migrate.__doc__)
+    parser.parse_args(argv)
+    ready = migrate()
+    print("schema is up to date" if ready else "schema check failed after migration")
+    return 0 if ready else 1
+
+
+# версия ответа → (запрос, сборщик ответа из строк)
+NORMATIVES_DOCUMENT_VERSIONS = {
+    "v0": (NORMATIVES_FOR_SPORT_AGG_QUERY, sport_normatives_payload),
+    "v1": (NORMATIVES_FOR_SPORT_V1_AGG_QUERY, sport_normatives_v1_payload),
+}
+
+
+class StoredJSONResponse(Response):
+    """Уже сериализованный JSON-документ; @cached кладёт его тело в кеш как есть."""
+    media_type = "application/json"
+
+
+def build_normatives_document(cur, sport_id: int, version: str) -> Optional[bytes]:
+    """Собирает документ на курсоре cur. None — у вида спорта нет нормативов."""
+    query, build = NORMATIVES_DOCUMENT_VERSIONS[version]
+    cur.execute(query, (sport_id,))
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    return _encode_json(build(sport_id, rows))
+
+
+def store_normatives_document(cur, sport_id: int, version: str, body: bytes, overwrite: bool = True):
+    conflict = (
+        "UPDATE SET act_id = EXCLUDED.act_id, body = EXCLUDED.body, "
+        "etag = EXCLUDED.etag, updated_at = now()"
+    ) if overwrite else "NOTHING"
+    cur.execute(f"""
+        INSERT INTO normatives_documents (sport_id, version, act_id, body, etag)
+        VALUES (
+            %s, %s,
+            (SELECT max(id) FROM sport_ministry_act WHERE sport_id = %s AND end_date IS NULL),
+            %s, %s
+        )
+        ON CONFLICT (sport_id, version) DO {conflict}
+    """, (sport_id, version, sport_id, psycopg2.Binary(body), hashlib.md5(body).hexdigest()))
+
+
+def refresh_normatives_documents(cur, sport_id: Optional[int]):
+    """
+    Пересобирает документы вида спорта в текущей транзакции.
+    sport_id=None (изменение затронуло все виды спорта) — удаляет все документы.
+    """
+    if not NORMATIVES_DOCUMENTS or not schema_ready(cur):
+        return
+    if sport_id is None:
+        cur.execute("DELETE FROM normatives_documents")
+        return
+    for version in NORMATIVES_DOCUMENT_VERSIONS:
+        body = build_normatives_document(cur, sport_id, version)
+        if body is None:
+            cur.execute(
+                "DELETE FROM normatives_documents WHERE sport_id = %s AND version = %s",
+                (sport_id, version)
+            )
+        else:
+            store_normatives_document(cur, sport_id, version, body)
+
+
+NORMATIVES_DOCUMENT_LOOKUP = "SELECT body FROM normatives_documents WHERE sport_id = %s AND version = %s"
+
+
+def read_normatives_document(sport_id: int, version: str) -> Optional[bytes]:
+    """
+    Документ по первичному ключу; если его ещё нет — собирает и сохраняет.
+    ON CONFLICT DO NOTHING: документ, записанный изменяющим эндпоинтом, не затирается.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(NORMATIVES_DOCUMENT_LOOKUP, (sport_id, version))
+        row = cur.fetchone()
+        if row:
+            return bytes(row["body"])
+        body = build_normatives_document(cur, sport_id, version)
+        if body is not None:
+            store_normatives_document(cur, sport_id, version, body, overwrite=False)
+            conn.commit()
+        return body
+
+
+async def normatives_document(sport_id: int, version: str) -> Optional[bytes]:
+    """Асинхронный вариант read_normatives_document: выборка по ключу идёт через asyncpg."""
+    rows = await fetch_rows(NORMATIVES_DOCUMENT_LOOKUP, sport_id, version)
+    if rows:
+        return bytes(rows[0]["body"])
+    return await run_in_threadpool(read_normatives_document, sport_id, version)
+
+
+# =============================================================================
+# Каталог в памяти (CATALOG_ENGINE)
+# =============================================================================
+# Действующий каталог целиком занимает несколько мегабайт. При CATALOG_ENGINE=1
+# он загружается в память компактными записями (__slots__) с индексами
+# вид спорта → дисциплины → нормативы → условия, и эндпоинты нормативов
+# отвечают из памяти, не обращаясь к БД. Порядок по названиям и значениям
+# считает Postgres (rank() в collation БД), поэтому ответы совпадают с
+# агрегированными запросами байт в байт.
+# Каталог обновляется по уведомлениям catalog_changes: изменение одного вида
+# спорта перезагружает только его, изменение глобальных справочников — весь
+# каталог. Без DB_LISTEN обновлять каталог нечем, поэтому он включается только
+# вместе с DB_LISTEN.
+CATALOG_ENGINE = os.getenv("CATALOG_ENGINE", "0") == "1" and DB_LISTEN
+
+# Справочники, общие для всех видов спорта: их изменение перезагружает весь каталог
+CATALOG_REFERENCE_TABLES = {"ref_ranks", "ref_requirements", "ref_parameters", "ref_parameters_types"}
+
+# Связи дисциплина × параметр × норматив действующих актов; %(sport_id)s = NULL — все виды спорта
+_CATALOG_GROUPS_QUERY = """
+    SELECT ldp.discipline_id, ldp.parameter_id, g.normative_id
+    FROM lnk_discipline_parameters ldp
+    JOIN groups g               ON g.discipline_parameter_id = ldp.id
+    JOIN ref_disciplines rd     ON rd.id = ldp.discipline_id
+    JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id AND sma.end_date IS NULL
+    WHERE %(sport_id)s::int IS NULL OR sma.sport_id = %(sport_id)s
+"""
+
+CATALOG_QUERIES = {
+    "sports": """
+        SELECT id, sport_name
+        FROM ref_sports
+        WHERE %(sport_id)s::int IS NULL OR id = %(sport_id)s
+    """,
+    "disciplines": """
+        SELECT
+            rd.id, sma.sport_id, rd.discipline_name, rd.discipline_code,
+            rank() OVER (PARTITION BY sma.sport_id ORDER BY rd.discipline_name) AS name_rank
+        FROM ref_disciplines rd
+        JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id AND sma.end_date IS NULL
+        WHERE %(sport_id)s::int IS NULL OR sma.sport_id = %(sport_id)s
+        ORDER BY rd.id
+    """,
+    "groups": _CATALOG_GROUPS_QUERY + " ORDER BY ldp.parameter_id",
+    "normatives": f"""
+        SELECT id, rank_id
+        FROM normatives
+        WHERE id IN (SELECT cg.normative_id FROM ({_CATALOG_GROUPS_QUERY}) cg)
+    """,
+    "conditions": f"""
+        SELECT id, normative_id, parent_id, requirement_id, condition
+        FROM conditions
+        WHERE normative_id IN (SELECT cg.normative_id FROM ({_CATALOG_GROUPS_QUERY}) cg)
+        ORDER BY parent_id NULLS FIRST, id
+    """,
+}
+
+CATALOG_REFERENCE_QUERIES = {
+    "ranks": "SELECT id, short_name, full_name, prestige FROM ref_ranks",
+    "requirements": "SELECT id, requirement_value, requirement_type_id FROM ref_requirements",
+    "parameters": """
+        SELECT
+            rp.id,
+            rpt.type_name,
+            rank() OVER (ORDER BY rpt.type_name)        AS type_rank,
+            rp.parameter_value,
+            rank() OVER (ORDER BY rp.parameter_value)   AS value_rank
+        FROM ref_parameters rp
+        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+    """,
+}
+
+
+class _CatalogSport:
+    __slots__ = ("id", "name", "discipline_ids")
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+        self.discipline_ids: List[int] = []
+
+
+class _CatalogDiscipline:
+    __slots__ = ("id", "sport_id", "name", "code", "name_rank", "normatives")
+
+    def __init__(self, id, sport_id, name, code, name_rank):
+        self.id = id
+        self.sport_id = sport_id
+        self.name = name
+        self.code = code
+        self.name_rank = name_rank
+        # normative_id → id параметров, которыми норматив привязан к этой дисциплине
+        self.normatives: Dict[int, List[int]] = {}
+
+
+class _CatalogNormative:
+    __slots__ = ("id", "rank_id", "conditions")
+
+    def __init__(self, id, rank_id):
+        self.id = id
+        self.rank_id = rank_id
+        self.conditions: List["_CatalogCondition"] = []  # parent_id NULLS FIRST, id
+
+
+class _CatalogCondition:
+    __slots__ = ("id", "parent_id", "requirement_id", "value")
+
+    def __init__(self, id, parent_id, requirement_id, value):
+        self.id = id
+        self.parent_id = parent_id
+        self.requirement_id = requirement_id
+        self.value = value
+
+
+class _CatalogSnapshot:
+    """Неизменяемый после сборки срез каталога; читатели берут ссылку на него один раз."""
+    __slots__ = ("sports", "disciplines", "normatives", "ranks", "requirements", "parameters", "loaded_at")
+
+    def __init__(self, base: Optional["_CatalogSnapshot"] = None):
+        self.sports: Dict[int, _CatalogSport] = dict(base.sports) if base else {}
+        self.disciplines: Dict[int, _CatalogDiscipline] = dict(base.disciplines) if base else {}
+        self.normatives: Dict[int, _CatalogNormative] = dict(base.normatives) if base else {}
+        # справочники: id → кортеж
+        self.ranks: Dict[int, tuple] = base.ranks if base else {}          # (short, full, prestige)
+        self.requirements: Dict[int, tuple] = base.requirements if base else {}  # (value, type_id)
+        self.parameters: Dict[int, tuple] = base.parameters if base else {}  # (type, type_rank, value, value_rank)
+        self.loaded_at = time.time()
+
+
+def _prestige_desc(prestige) -> tuple:
+    """Ключ сортировки prestige DESC (NULL первыми, как в Postgres)."""
+    return (prestige is not None, -(prestige or 0))
+
+
+def _parent_nulls_first(parent_id) -> tuple:
+    return (parent_id is not None, parent_id or 0)
+
+
+class CatalogEngine:
+    """Каталог действующих актов в памяти; пока не загружен, ready == False и эндпоинты идут в БД."""
+
+    def __init__(self):
+        self._snapshot: Optional[_CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._reloads = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def reload(self, sport_id: Optional[int] = None):
+        """Перечитывает из БД весь каталог или один вид спорта."""
+        with self._lock:
+            base = self._snapshot
+            if base is None:
+                sport_id = None
+            with get_conn() as conn:
+                cur = conn.cursor()
+                data = {}
+                for name, query in CATALOG_QUERIES.items():
+                    cur.execute(query, {"sport_id": sport_id})
+                    data[name] = cur.fetchall()
+                if sport_id is None:
+                    for name, query in CATALOG_REFERENCE_QUERIES.items():
+                        cur.execute(query)
+                        data[name] = cur.fetchall()
+
+            if sport_id is None:
+                snapshot = _CatalogSnapshot()
+                snapshot.ranks = {r["id"]: (r["short_name"], r["full_name"], r["prestige"]) for r in data["ranks"]}
+                snapshot.requirements = {
+                    r["id"]: (r["requirement_value"], r["requirement_type_id"]) for r in data["requirements"]
+                }
+                snapshot.parameters = {
+                    r["id"]: (r["type_name"], r["type_rank"], r["parameter_value"], r["value_rank"])
+                    for r in data["parameters"]
+                }
+            else:
+                snapshot = _CatalogSnapshot(base)
+                old = snapshot.sports.pop(sport_id, None)
+                for did in (old.discipline_ids if old else ()):
+                    for nid in snapshot.disciplines.pop(did).normatives:
+                        snapshot.normatives.pop(nid, None)
+
+            for r in data["sports"]:
+                snapshot.sports[r["id"]] = _CatalogSport(r["id"], r["sport_name"])
+            for r in data["disciplines"]:
+                sport = snapshot.sports.get(r["sport_id"])
+                if sport is None:
+                    continue
+                snapshot.disciplines[r["id"]] = _CatalogDiscipline(
+                    r["id"], r["sport_id"], r["discipline_name"], r["discipline_code"], r["name_rank"]
+                )
+                sport.discipline_ids.append(r["id"])
+            for r in data["groups"]:
+                discipline = snapshot.disciplines.get(r["discipline_id"])
+                if discipline is not None:
+                    discipline.normatives.setdefault(r["normative_id"], []).append(r["parameter_id"])
+            for r in data["normatives"]:
+                snapshot.normatives[r["id"]] = _CatalogNormative(r["id"], r["rank_id"])
+            for r in data["conditions"]:
+                normative = snapshot.normatives.get(r["normative_id"])
+                if normative is not None:
+                    normative.conditions.append(
+                        _CatalogCondition(r["id"], r["parent_id"], r["requirement_id"], r["condition"])
+                    )
+
+            self._snapshot = snapshot
+            self._reloads += 1
+
+    def apply_change(self, tables: set, sport_id: Optional[int]):
+        """Обновляет каталог по уведомлению catalog_changes."""
+        if not CATALOG_ENGINE or not tables & _NORMATIVES_TABLES:
+            return
+        try:
+            if sport_id is None or tables & CATALOG_REFERENCE_TABLES:
+                self.reload()
+            else:
+                self.reload(sport_id)
+        except Exception as e:
+            # Лучше отвечать из БД, чем из памяти, отставшей от неё
+            self._snapshot = None
+            logger.warning("catalog engine reload failed, falling back to database: %s", e)
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"loaded": False, "reloads": self._reloads}
+        return {
+            "loaded": True,
+            "reloads": self._reloads,
+            "loaded_at": snapshot.loaded_at,
+            "sports": len(snapshot.sports),
+            "disciplines": len(snapshot.disciplines),
+            "normatives": len(snapshot.normatives),
+            "conditions": sum(len(n.conditions) for n in snapshot.normatives.values()),
+        }
+
+    # --- ответы эндпоинтов; None — в памяти нет данных, ответ строится запросом к БД ---
+
+    @staticmethod
+    def _entries(snapshot: _CatalogSnapshot, discipline: _CatalogDiscipline):
+        """(норматив, разряд, параметры, условия) с теми же отсечениями, что и INNER JOIN в SQL."""
+        for nid, param_ids in discipline.normatives.items():
+            normative = snapshot.normatives.get(nid)
+            rank = snapshot.ranks.get(normative.rank_id) if normative else None
+            params = [snapshot.parameters[p] for p in param_ids if p in snapshot.parameters]
+            conditions = [c for c in normative.conditions if c.requirement_id in snapshot.requirements] \
+                if normative else []
+            if rank is None or not params or not conditions:
+                continue
+            yield normative, rank, params, conditions
+
+    @staticmethod
+    def _params_object(params) -> dict:
+        result = {}
+        for type_name, _, value, _ in sorted(params, key=lambda p: (p[1], p[3])):
+            if type_name and value:
+                result[type_name] = value
+        return result
+
+    def sport_normatives(self, sport_id: int) -> Optional[dict]:
+        """То же, что sport_normatives_payload()."""
+        snapshot = self._snapshot
+        sport = snapshot.sports.get(sport_id) if snapshot else None
+        if sport is None:
+            return None
+
+        entries = []
+        for did in sport.discipline_ids:
+            discipline = snapshot.disciplines[did]
+            for normative, rank, params, conditions in self._entries(snapshot, discipline):
+                first = conditions[0]
+                key = (
+                    discipline.name_rank, _prestige_desc(rank[2]), min(p[1] for p in params),
+                    _parent_nulls_first(first.parent_id), first.id,
+                )
+                entries.append((key, {
+                    "id": normative.id,
+                    "discipline_id": discipline.id,
+                    "discipline_name": discipline.name,
+                    "discipline_code": discipline.code,
+                    "discipline_parameters": self._params_object(params),
+                    "rank_short": rank[0],
+                    "rank_prestige": rank[2],
+                    "condition": [
+                        {
+                            "id": c.id,
+                            "type": snapshot.requirements[c.requirement_id][0],
+                            "value": c.value,
+                            "is_competition": snapshot.requirements[c.requirement_id][1] == 16,
+                            "parent_id": c.parent_id,
+                        }
+                        for c in conditions
+                    ],
+                }))
+        if not entries:
+            return None
+
+        entries.sort(key=lambda e: e[0])
+        normatives_data = [n for _, n in entries]
+        return {
+            "sport_id": sport_id,
+            "sport_name": sport.name,
+            "normatives": normatives_data,
+            "total_count": len(normatives_data)
+        }
+
+    def sport_normatives_v1(self, sport_id: int) -> Optional[dict]:
+        """То же, что sport_normatives_v1_payload()."""
+        snapshot = self._snapshot
+        sport = snapshot.sports.get(sport_id) if snapshot else None
+        if sport is None:
+            return None
+
+        entries = []
+        for did in sport.discipline_ids:
+            discipline = snapshot.disciplines[did]
+            for normative, rank, params, conditions in self._entries(snapshot, discipline):
+                condition_values = {}
+                for c in conditions:
+                    requirement_value = snapshot.requirements[c.requirement_id][0]
+                    if requirement_value and c.value:
+                        condition_values[requirement_value] = c.value
+                key = (discipline.name_rank, _prestige_desc(rank[2]), normative.id)
+                entries.append((key, {
+                    "id": normative.id,
+                    "discipline_id": discipline.id,
+                    "discipline_name": discipline.name,
+                    "discipline_code": discipline.code,
+                    "rank": {
+                        "id": normative.rank_id,
+                        "short": rank[0],
+                        "full": rank[1],
+                        "prestige": rank[2]
+                    },
+                    "discipline_parameters": self._params_object(params),
+                    "conditions": condition_values
+                }))
+        if not entries:
+            return None
+
+        entries.sort(key=lambda e: e[0])
+        normatives_list = [n for _, n in entries]
+        return {
+            "sport_id": sport_id,
+            "sport_name": sport.name,
+            "normatives": normatives_list,
+            "total_count": len(normatives_list)
+        }
+
+    def discipline_normatives(self, discipline_id: int) -> Optional[dict]:
+        """То же, что _normatives_by_discipline_aggregated(); только для дисциплин действующих актов."""
+        snapshot = self._snapshot
+        discipline = snapshot.disciplines.get(discipline_id) if snapshot else None
+        if discipline is None:
+            return None
+
+        normatives = []
+        entries = sorted(self._entries(snapshot, discipline), key=lambda e: e[0].id)
+        for normative, rank, params, conditions in entries:
+            # первый по значению параметр каждого типа, как DISTINCT ON в SQL
+            by_type = {}
+            for param in params:
+                current = by_type.get(param[0])
+                if current is None or param[3] < current[3]:
+                    by_type[param[0]] = param
+            discipline_parameters = [
+                {"type": p[0], "value": p[2]}
+                for p in sorted(by_type.values(), key=lambda p: p[1])
+                if p[0]
+            ]
+
+            all_conds = {}
+            for c in conditions:
+                requirement_value, requirement_type_id = snapshot.requirements[c.requirement_id]
+                all_conds[c.id] = {
+                    "id": c.id,
+                    "type": {1: "norm", 2: "comp"}.get(requirement_type_id, "other"),
+                    "name": requirement_value,
+                    "value": c.value,
+                    "parent_id": c.parent_id,
+                    "additional": []
+                }
+            roots = build_condition_tree(all_conds)
+            normatives.append({
+                "id": normative.id,
+                "rank": {
+                    "id": normative.rank_id,
+                    "short": rank[0],
+                    "full": rank[1],
+                    "prestige": rank[2],
+                },
+                "discipline_parameters": discipline_parameters,
+                "conditions": roots,
+                "is_competitive": any(c["type"] == "comp" for c in roots),
+            })
+        if not normatives:
+            return None
+
+        return {
+            "sport_id": discipline.sport_id,
+            "sport_name": snapshot.sports[discipline.sport_id].name,
+            "discipline_id": discipline.id,
+            "discipline_name": discipline.name,
+            "discipline_code": discipline.code,
+            "normatives": normatives,
+            "total_count": len(normatives),
+        }
+
+
+catalog_engine = CatalogEngine()
+
+
+# =============================================================================
+# Потоковая выдача нормативов (?stream=true)
+# =============================================================================
+# Агрегированные запросы отдают одну готовую строку на норматив, поэтому ответ
+# можно писать клиенту по мере чтения: строки читаются именованным (серверным)
+# курсором пачками по STREAM_BATCH_SIZE, и каждая пачка сразу уходит в сокет.
+# Память на запрос ограничена одной пачкой, первый байт уходит после первой
+# пачки, а не после сборки всего документа. Байты ответа те же, что без stream.
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "200"))
+
+
+def _stream_batches(query: str, args: tuple):
+    """Пачки строк из серверного курсора; соединение занято, пока генератор не закрыт."""
+    with get_conn() as conn:
+        cur = conn.cursor(name="normatives_stream")
+        cur.itersize = STREAM_BATCH_SIZE
+        cur.execute(query, args)
+        while True:
+            batch = cur.fetchmany(STREAM_BATCH_SIZE)
+            if not batch:
+                break
+            yield batch
+        cur.close()
+
+
+def stream_normatives(query: str, args: tuple, head, item) -> Optional[StreamingResponse]:
+    """
+    StreamingResponse вида {<head(first_row)>, "normatives": [...], "total_count": N}.
+    Первая пачка читается до ответа: если строк нет, возвращается None, и
+    эндпоинт отвечает как обычно (404 или пустой документ).
+    Блокирующая функция — из async-обработчиков вызывать через run_in_threadpool.
+    """
+    batches = _stream_batches(query, args)
+    first = next(batches, None)
+    if first is None:
+        return None
+
+    def body():
+        try:
+            # head — словарь без закрывающей скобки: дальше дописывается массив normatives
+            yield _encode_json(head(first[0]))[:-1] + b',"normatives":['
+            count = 0
+            for batch in itertools.chain([first], batches):
+                chunk = b",".join(_encode_json(item(row)) for row in batch)
+                yield (b"," if count else b"") + chunk
+                count += len(batch)
+            yield b'],"total_count":' + str(count).encode() + b"}"
+        finally:
+            batches.close()
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+# =============================================================================
+# Фильтры нормативов вида спорта (?discipline_id=&rank_id=&param[Пол]=...)
+# =============================================================================
+# Для каждого вида спорта в памяти лежат элементы ответа /sports/{sport_id}/normatives
+# в порядке выдачи и инвертированный индекс: (discipline_id), (rank_id) и
+# (тип параметра, значение) → отсортированный список позиций нормативов.
+# Фильтр — пересечение таких списков, начиная с самого короткого; несколько
+# значений одного параметра (param[Пол]=Мужчины&param[Пол]=Женщины) объединяются.
+
+_PARAM_FILTER_RE = re.compile(r"^param\[(.+)\]$")
+
+
+def _intersect_sorted(a: List[int], b: List[int]) -> List[int]:
+    """Пересечение отсортированных списков: проход по короткому, бинарный поиск в длинном."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    lo = 0
+    for value in a:
+        lo = bisect.bisect_left(b, value, lo)
+        if lo == len(b):
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+
+def _union_sorted(lists: List[List[int]]) -> List[int]:
+    return sorted(set().union(*lists)) if len(lists) > 1 else (lists[0] if lists else [])
+
+
+def param_filters(request: Request) -> Dict[str, List[str]]:
+    """param[Тип]=Значение из query string; тип и значение — без учёта регистра."""
+    filters: Dict[str, List[str]] = {}
+    for key, value in request.query_params.multi_items():
+        match = _PARAM_FILTER_RE.match(key)
+        if match:
+            filters.setdefault(match.group(1).strip().lower(), []).append(value.strip().lower())
+    return filters
+
+
+class _SportNormativesIndex:
+    __slots__ = ("sport_name", "items", "postings")
+
+    def __init__(self, rows):
+        self.sport_name = rows[0]["sport_name"] if rows else None
+        self.items = []
+        self.postings: Dict[tuple, List[int]] = {}
+        for position, row in enumerate(rows):
+            self.items.append(sport_normative_item(row))
+            keys = [("discipline", row["discipline_id"]), ("rank", row["rank_id"])]
+            keys.extend(("param", k.lower(), str(v).lower()) for k, v in row["params"].items())
+            for key in keys:
+                self.postings.setdefault(key, []).append(position)  # позиции идут по возрастанию
+
+    def filter(self, discipline_id: Optional[int], rank_id: Optional[int],
+               params: Dict[str, List[str]]) -> List[dict]:
+        selected = []
+        if discipline_id is not None:
+            selected.append(self.postings.get(("discipline", discipline_id), []))
+        if rank_id is not None:
+            selected.append(self.postings.get(("rank", rank_id), []))
+        for param_type, values in params.items():
+            selected.append(_union_sorted([self.postings.get(("param", param_type, v), []) for v in values]))
+        if not selected:
+            return self.items
+        selected.sort(key=len)
+        positions = selected[0]
+        for postings in selected[1:]:
+            if not positions:
+                break
+            positions = _intersect_sorted(positions, postings)
+        return [self.items[i] for i in positions]
+
+
+class NormativesFilterIndex:
+    """Индексы фильтров по видам спорта: строятся при первом запросе с фильтром, живут до изменения каталога."""
+
+    TABLES = _NORMATIVES_TABLES
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # sport_id → (истекает, индекс)
+        self._sports: Dict[int, tuple] = {}
+
+    def get(self, sport_id: int) -> _SportNormativesIndex:
+        """Индекс вида спорта. Блокирующая (запрос к БД при промахе)."""
+        cached = self._sports.get(sport_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        index = _SportNormativesIndex(_fetch_rows_sync(NORMATIVES_FOR_SPORT_AGG_QUERY, (sport_id,)))
+        with self._lock:
+            self._sports[sport_id] = (time.monotonic() + self.ttl, index)
+        return index
+
+    def apply_change(self, tables: set, sport_id: Optional[int]):
+        if not self.TABLES & tables:
+            return
+        with self._lock:
+            if sport_id is None:
+                self._sports.clear()
+            else:
+                self._sports.pop(sport_id, None)
+
+
+normatives_filter_index = NormativesFilterIndex(CATALOG_CACHE_TTL)
+
+
+def filtered_sport_normatives(sport_id: int, discipline_id: Optional[int], rank_id: Optional[int],
+                              params: Dict[str, List[str]]) -> dict:
+    index = normatives_filter_index.get(sport_id)
+    if index.sport_name is None:
+        return sport_normatives_payload(sport_id, [])
+    normatives = index.filter(discipline_id, rank_id, params)
+    return {
+        "sport_id": sport_id,
+        "sport_name": index.sport_name,
+        "normatives": normatives,
+        "total_count": len(normatives)
+    }
+
+
+# =============================================================================
+# GET — нормативы по виду спорта (JSON)
+# =============================================================================
+
+def _sport_normatives_bypass(kwargs) -> bool:
+    """Поток и ответы с фильтрами идут мимо кеша: фильтры отвечает индекс в памяти."""
+    return bool(
+        kwargs.get("stream")
+        or kwargs.get("discipline_id") is not None
+        or kwargs.get("rank_id") is not None
+        or param_filters(kwargs["request"])
+    )
+
+
+@app.get("/sports/{sport_id}/normatives")
+@cached("sport_normatives", bypass=_sport_normatives_bypass)
+async def get_normatives_for_sport_json(
+    sport_id: int,
+    stream: bool = Query(False, description="Если true — ответ пишется потоком по мере чтения из БД"),
+    discipline_id: Optional[int] = Query(None, description="только нормативы дисциплины"),
+    rank_id: Optional[int] = Query(None, description="только нормативы разряда"),
+    request: Request = None,
+):
+    """
+    Нормативы по виду спорта. Только действующие акты (end_date IS NULL).
+    Фильтры discipline_id, rank_id и param[Тип]=Значение (например, param[Пол]=Мужчины)
+    сужают ответ на сервере; значения одного параметра объединяются, разные фильтры — пересекаются.
+    """
+    params = param_filters(request) if request is not None else {}  # warm() вызывает без запроса
+    if discipline_id is not None or rank_id is not None or params:
+        return FastJSONResponse(await run_in_threadpool(
+            filtered_sport_normatives, sport_id, discipline_id, rank_id, params
+        ))
+    if stream:
+        response = await run_in_threadpool(
+            stream_normatives, NORMATIVES_FOR_SPORT_AGG_QUERY, (sport_id,),
+            lambda row: {"sport_id": sport_id, "sport_name": row["sport_name"]},
+            sport_normative_item,
+        )
+        if response is not None:
+            return response
+    if catalog_engine.ready:
+        payload = catalog_engine.sport_normatives(sport_id)
+        if payload is not None:
+            return payload
+    if NORMATIVES_DOCUMENTS and (
+        _schema_state if _schema_state is not None else await run_in_threadpool(schema_ready)
+    ):
+        body = await normatives_document(sport_id, "v0")
+        if body is not None:
+            return StoredJSONResponse(body)
+    if NORMATIVES_QUERY_MODE == "aggregated":
+        return await _normatives_for_sport_aggregated(sport_id)
+
+    query = """
+        SELECT
+            rs.sport_name,
+            rd.id                   AS discipline_id,
             rd.discipline_name,
             rd.discipline_code,
             rr.id                   AS rank_id,
@@ -587,9 +2557,7 @@ def get_normatives_for_sport_json(sport_id: int):
         WHERE rs.id = %s
         ORDER BY rd.discipline_name, rr.prestige DESC, rpt.type_name, c.parent_id NULLS FIRST, c.id
     """
-    cur.execute(query, (sport_id,))
-    rows = cur.fetchall()
-    conn.close()
+    rows = await fetch_rows(query, sport_id)
 
     if not rows:
         return {
@@ -653,96 +2621,208 @@ def get_normatives_for_sport_json(sport_id: int):
 
 
 @app.get("/v_1/sports/{sport_id}/normatives")
-def get_normatives_for_sport_v1_json(sport_id: int):
+@cached("sport_normatives_v1", bypass=lambda kwargs: kwargs.get("stream"))
+def get_normatives_for_sport_v1_json(
+    sport_id: int,
+    stream: bool = Query(False, description="Если true — ответ пишется потоком по мере чтения из БД")
+):
     """
     Нормативы по виду спорта, расширенный формат ответа.
     Только действующие акты (end_date IS NULL).
     """
-    conn = get_conn()
-    cur = conn.cursor()
+    if stream:
+        response = stream_normatives(
+            NORMATIVES_FOR_SPORT_V1_AGG_QUERY, (sport_id,),
+            lambda row: {"sport_id": row["sport_id"], "sport_name": row["sport_name"]},
+            sport_normative_v1_item,
+        )
+        if response is not None:
+            return response
+    if catalog_engine.ready:
+        payload = catalog_engine.sport_normatives_v1(sport_id)
+        if payload is not None:
+            return payload
+    if NORMATIVES_DOCUMENTS and schema_ready():
+        body = read_normatives_document(sport_id, "v1")
+        if body is not None:
+            return StoredJSONResponse(body)
+    if NORMATIVES_QUERY_MODE == "aggregated":
+        return _normatives_for_sport_v1_aggregated(sport_id)
+
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
 
-    query = """
-        SELECT
-            rs.id                   AS sport_id,
-            rs.sport_name,
-            rd.id                   AS discipline_id,
-            rd.discipline_name,
-            rd.discipline_code,
-            rr.id                   AS rank_id,
-            rr.short_name           AS rank_short,
-            rr.full_name            AS rank_full,
-            rr.prestige             AS rank_prestige,
-            rreq.requirement_value,
-            c.condition,
-            n.id                    AS normative_id,
-            rpt.type_name           AS param_type,
-            rp.parameter_value      AS param_value
-        FROM ref_sports rs
-        JOIN sport_ministry_act sma ON sma.sport_id = rs.id AND sma.end_date IS NULL
-        JOIN ref_disciplines rd     ON rd.sport_act_id = sma.id
-        JOIN lnk_discipline_parameters ldp ON ldp.discipline_id = rd.id
-        JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
-        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
-        JOIN groups g               ON g.discipline_parameter_id = ldp.id
-        JOIN normatives n           ON n.id = g.normative_id
-        JOIN ref_ranks rr           ON rr.id = n.rank_id
-        JOIN conditions c           ON c.normative_id = n.id
-        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
-        WHERE rs.id = %s
-        ORDER BY rd.discipline_name, rr.prestige DESC
-    """
-    cur.execute(query, (sport_id,))
-    rows = cur.fetchall()
-    conn.close()
+        query = """
+            SELECT
+                rs.id                   AS sport_id,
+                rs.sport_name,
+                rd.id                   AS discipline_id,
+                rd.discipline_name,
+                rd.discipline_code,
+                rr.id                   AS rank_id,
+                rr.short_name           AS rank_short,
+                rr.full_name            AS rank_full,
+                rr.prestige             AS rank_prestige,
+                rreq.requirement_value,
+                c.condition,
+                n.id                    AS normative_id,
+                rpt.type_name           AS param_type,
+                rp.parameter_value      AS param_value
+            FROM ref_sports rs
+            JOIN sport_ministry_act sma ON sma.sport_id = rs.id AND sma.end_date IS NULL
+            JOIN ref_disciplines rd     ON rd.sport_act_id = sma.id
+            JOIN lnk_discipline_parameters ldp ON ldp.discipline_id = rd.id
+            JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
+            JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+            JOIN groups g               ON g.discipline_parameter_id = ldp.id
+            JOIN normatives n           ON n.id = g.normative_id
+            JOIN ref_ranks rr           ON rr.id = n.rank_id
+            JOIN conditions c           ON c.normative_id = n.id
+            JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+            WHERE rs.id = %s
+            ORDER BY rd.discipline_name, rr.prestige DESC
+        """
+        cur.execute(query, (sport_id,))
+        rows = cur.fetchall()
 
     if not rows:
         raise HTTPException(status_code=404, detail="Sport or normatives not found")
 
     normatives = {}
-    for row in rows:
-        nid = row["normative_id"]
-        if nid not in normatives:
-            normatives[nid] = {
+    for (_, _, discipline_id, discipline_name, discipline_code, rank_id, rank_short, rank_full,
+         rank_prestige, requirement_value, condition, nid, param_type, param_value) in rows:
+        normative = normatives.get(nid)
+        if normative is None:
+            normative = normatives[nid] = {
                 "id": nid,
-                "discipline_id": row["discipline_id"],
-                "discipline_name": row["discipline_name"],
-                "discipline_code": row["discipline_code"],
+                "discipline_id": discipline_id,
+                "discipline_name": discipline_name,
+                "discipline_code": discipline_code,
                 "rank": {
-                    "id": row["rank_id"],
-                    "short": row["rank_short"],
-                    "full": row["rank_full"],
-                    "prestige": row["rank_prestige"]
+                    "id": rank_id,
+                    "short": rank_short,
+                    "full": rank_full,
+                    "prestige": rank_prestige
                 },
                 "discipline_parameters": {},
                 "conditions": {}
             }
-        if row["param_type"] and row["param_value"]:
-            normatives[nid]["discipline_parameters"][row["param_type"]] = row["param_value"]
-        if row["requirement_value"] and row["condition"]:
-            normatives[nid]["conditions"][row["requirement_value"]] = row["condition"]
+        if param_type and param_value:
+            normative["discipline_parameters"][param_type] = param_value
+        if requirement_value and condition:
+            normative["conditions"][requirement_value] = condition
 
     normatives_list = list(normatives.values())
     return {
-        "sport_id": rows[0]["sport_id"],
-        "sport_name": rows[0]["sport_name"],
+        "sport_id": rows[0][0],
+        "sport_name": rows[0][1],
         "normatives": normatives_list,
         "total_count": len(normatives_list)
     }
 
 
+# =============================================================================
+# GET — всё для страницы вида спорта одним запросом
+# =============================================================================
+
+@app.get("/v_2/sports/{sport_id}/bundle")
+@cached("sport_bundle")
+def get_sport_bundle_v2(sport_id: int):
+    """
+    Шапка вида спорта, дисциплины действующего акта, нормативы и упомянутые в них
+    разряды — то, что страница каталога иначе собирает из /v_2/sports,
+    /v_2/sports/{id}/disciplines, /sports/{id}/normatives и /ranks.
+    Форматы элементов те же, что у этих эндпоинтов. Четыре запроса на одном соединении.
+    """
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
+        cur.execute("""
+            SELECT s.id, s.sport_name, s.image_url, t.type_name AS sport_type
+            FROM ref_sports s
+            LEFT JOIN ref_sport_types t ON s.sport_type_id = t.id
+            WHERE s.id = %s
+        """, (sport_id,))
+        sport = cur.fetchone()
+        if sport is None:
+            raise HTTPException(status_code=404, detail="Sport not found")
+
+        cur.execute("""
+            SELECT
+                d.id              AS discipline_id,
+                d.discipline_name,
+                d.discipline_code,
+                a.id              AS act_id,
+                a.start_date,
+                a.end_date,
+                a.act_details
+            FROM ref_disciplines d
+            JOIN sport_ministry_act a ON a.id = d.sport_act_id
+            WHERE a.sport_id = %s AND a.end_date IS NULL
+            ORDER BY d.discipline_name
+        """, (sport_id,))
+        disciplines = [
+            {
+                "discipline_id": r[0], "discipline_name": r[1], "discipline_code": r[2],
+                "act_id": r[3], "start_date": r[4], "end_date": r[5], "act_details": r[6],
+            }
+            for r in cur.fetchall()
+        ]
+
+        # строки нормативов — по именам колонок, как их читает общий sport_normative_item
+        normatives_cur = conn.cursor()
+        normatives_cur.execute(NORMATIVES_FOR_SPORT_AGG_QUERY, (sport_id,))
+        normative_rows = normatives_cur.fetchall()
+
+        cur.execute(
+            "SELECT id, short_name, full_name, prestige FROM ref_ranks WHERE id = ANY(%s) ORDER BY prestige DESC",
+            (list({row["rank_id"] for row in normative_rows}),)
+        )
+        ranks = [{"id": r[0], "short_name": r[1], "full_name": r[2], "prestige": r[3]} for r in cur.fetchall()]
+
+    normatives = [sport_normative_item(row) for row in normative_rows]
+    return {
+        "sport": {"id": sport[0], "sport_name": sport[1], "image_url": sport[2], "sport_type": sport[3]},
+        "disciplines": disciplines,
+        "normatives": normatives,
+        "ranks": ranks,
+        "total_count": len(normatives),
+    }
+
+
 # =============================================================================
 # GET — нормативы по дисциплине
 # =============================================================================
 
 @app.get("/v_1/disciplines/{discipline_id}/normatives")
-def get_normatives_by_discipline_v1_json(discipline_id: int):
+async def get_normatives_by_discipline_v1_json(
+    discipline_id: int,
+    stream: bool = Query(False, description="Если true — ответ пишется потоком по мере чтения из БД")
+):
     """
     Нормативы по конкретной дисциплине с деревом условий (parent_id).
     Тип условия определяется по requirement_type_id:
       1 → "norm" (нормативное), 2 → "comp" (соревновательное), иное → "other"
     """
-    conn = get_conn()
-    cur = conn.cursor()
+    if stream:
+        response = await run_in_threadpool(
+            stream_normatives, NORMATIVES_BY_DISCIPLINE_AGG_QUERY, (discipline_id,),
+            lambda row: {
+                "sport_id": row["sport_id"],
+                "sport_name": row["sport_name"],
+                "discipline_id": row["discipline_id"],
+                "discipline_name": row["discipline_name"],
+                "discipline_code": row["discipline_code"],
+            },
+            discipline_normative_item,
+        )
+        if response is not None:
+            return response
+    if catalog_engine.ready:
+        payload = catalog_engine.discipline_normatives(discipline_id)
+        if payload is not None:
+            return payload
+    if NORMATIVES_QUERY_MODE == "aggregated":
+        return await _normatives_by_discipline_aggregated(discipline_id)
 
     query = """
         SELECT
@@ -777,9 +2857,7 @@ def get_normatives_by_discipline_v1_json(discipline_id: int):
         WHERE rd.id = %s
         ORDER BY n.id, c.parent_id NULLS FIRST, c.id
     """
-    cur.execute(query, (discipline_id,))
-    rows = cur.fetchall()
-    conn.close()
+    rows = await fetch_rows(query, discipline_id)
 
     if not rows:
         raise HTTPException(
@@ -838,14 +2916,7 @@ def get_normatives_by_discipline_v1_json(discipline_id: int):
 
     # Второй проход: строим дерево условий через parent_id
     for normative in normatives.values():
-        all_conds = normative["_all_conditions"]
-        roots = []
-        for cond in all_conds.values():
-            pid = cond["parent_id"]
-            if pid and pid in all_conds:
-                all_conds[pid]["additional"].append(cond)
-            else:
-                roots.append(cond)
+        roots = build_condition_tree(normative["_all_conditions"])
         normative["conditions"] = roots
         normative["is_competitive"] = any(c["type"] == "comp" for c in roots)
         del normative["_all_conditions"]
@@ -867,77 +2938,69 @@ def get_normatives_by_discipline_v1_json(discipline_id: int):
 
 @app.get("/normative/{normative_id}")
 def get_normative_by_id_json(normative_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-
-    query = """
-        SELECT
-            rs.id               AS sport_id,
-            rs.sport_name,
-            rd.id               AS discipline_id,
-            rd.discipline_name,
-            rd.discipline_code,
-            rr.id               AS rank_id,
-            rr.short_name       AS rank_short,
-            rr.full_name        AS rank_full,
-            rr.prestige,
-            rreq.requirement_value,
-            rreq.description    AS requirement_desc,
-            c.condition,
-            n.id                AS normative_id,
-            rpt.type_name       AS param_type,
-            rp.parameter_value  AS param_value
-        FROM normatives n
-        JOIN conditions c           ON c.normative_id = n.id
-        JOIN ref_ranks rr           ON rr.id = n.rank_id
-        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
-        JOIN groups g               ON g.normative_id = n.id
-        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
-        JOIN ref_disciplines rd     ON rd.id = ldp.discipline_id
-        JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
-        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
-        JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
-        JOIN ref_sports rs          ON rs.id = sma.sport_id
-        WHERE n.id = %s
-        ORDER BY rpt.type_name, c.condition
-    """
-    try:
-        cur.execute(query, (normative_id,))
-        rows = cur.fetchall()
+    with get_conn() as conn:
+        cur = tuple_cursor(conn)
 
-        if not rows:
-            return {"error": "Норматив не найден", "normative_id": normative_id, "exists": False}
-
-        result = {
-            "id": normative_id,
-            "sport_id": rows[0]["sport_id"],
-            "sport_name": rows[0]["sport_name"],
-            "discipline_id": rows[0]["discipline_id"],
-            "discipline_name": rows[0]["discipline_name"],
-            "discipline_code": rows[0]["discipline_code"],
-            "rank_short": rows[0]["rank_short"],
-            "rank_prestige": rows[0]["prestige"],
-            "discipline_parameters": {},
-            "conditions": {}
-        }
-        for row in rows:
-            if row["param_type"] and row["param_value"]:
-                result["discipline_parameters"][row["param_type"]] = row["param_value"]
-            if row["requirement_value"] and row["condition"]:
-                result["conditions"][row["requirement_value"]] = row["condition"]
-        return result
+        query = """
+            SELECT
+                rs.id               AS sport_id,
+                rs.sport_name,
+                rd.id               AS discipline_id,
+                rd.discipline_name,
+                rd.discipline_code,
+                rr.short_name       AS rank_short,
+                rr.prestige,
+                rreq.requirement_value,
+                c.condition,
+                rpt.type_name       AS param_type,
+                rp.parameter_value  AS param_value
+            FROM normatives n
+            JOIN conditions c           ON c.normative_id = n.id
+            JOIN ref_ranks rr           ON rr.id = n.rank_id
+            JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+            JOIN groups g               ON g.normative_id = n.id
+            JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+            JOIN ref_disciplines rd     ON rd.id = ldp.discipline_id
+            JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
+            JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+            JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
+            JOIN ref_sports rs          ON rs.id = sma.sport_id
+            WHERE n.id = %s
+            ORDER BY rpt.type_name, c.condition
+        """
+        try:
+            cur.execute(query, (normative_id,))
+            rows = cur.fetchall()
+
+            if not rows:
+                return {"error": "Норматив не найден", "normative_id": normative_id, "exists": False}
+
+            first = rows[0]
+            result = {
+                "id": normative_id,
+                "sport_id": first[0],
+                "sport_name": first[1],
+                "discipline_id": first[2],
+                "discipline_name": first[3],
+                "discipline_code": first[4],
+                "rank_short": first[5],
+                "rank_prestige": first[6],
+                "discipline_parameters": {},
+                "conditions": {}
+            }
+            for *_, requirement_value, condition, param_type, param_value in rows:
+                if param_type and param_value:
+                    result["discipline_parameters"][param_type] = param_value
+                if requirement_value and condition:
+                    result["conditions"][requirement_value] = condition
+            return result
 
-    except Exception as e:
-        return {"error": str(e), "normative_id": normative_id, "success": False}
-    finally:
-        conn.close()
+        except Exception as e:
+            return {"error": str(e), "normative_id": normative_id, "success": False}
 
 
 @app.get("/v_1/normative/{normative_id}")
-def get_normative_by_id_v1_json(normative_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-
+async def get_normative_by_id_v1_json(normative_id: int):
     query = """
         SELECT
             rs.id               AS sport_id,
@@ -966,9 +3029,7 @@ def get_normative_by_id_v1_json(normative_id: int):
         JOIN ref_sports rs          ON rs.id = sma.sport_id
         WHERE n.id = %s
     """
-    cur.execute(query, (normative_id,))
-    rows = cur.fetchall()
-    conn.close()
+    rows = await fetch_rows(query, normative_id)
 
     if not rows:
         raise HTTPException(status_code=404, detail="Normative not found")
@@ -1001,415 +3062,2233 @@ def get_normative_by_id_v1_json(normative_id: int):
     }
 
 
-# =============================================================================
-# POST — справочники
-# =============================================================================
+# Не больше стольких id за один запрос /v_1/normatives/batch
+NORMATIVES_BATCH_MAX = int(os.getenv("NORMATIVES_BATCH_MAX", "500"))
+
+# Норматив одной строкой: вид спорта, дисциплина, разряд, параметры и условия.
+# Общая часть запросов /v_1/normatives/batch и /export/normatives.
+_NORMATIVE_FLAT_SELECT = """
+    SELECT
+        n.id                AS normative_id,
+        rs.id               AS sport_id,
+        rs.sport_name,
+        rd.id               AS discipline_id,
+        rd.discipline_name,
+        rd.discipline_code,
+        rr.id               AS rank_id,
+        rr.short_name       AS rank_short,
+        rr.full_name        AS rank_full,
+        rr.prestige         AS rank_prestige,
+        p.params,
+        c.conditions
+    FROM normatives n
+    JOIN ref_ranks rr           ON rr.id = n.rank_id
+    CROSS JOIN LATERAL (
+        SELECT ldp.discipline_id
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        WHERE g.normative_id = n.id
+        ORDER BY ldp.discipline_id
+        LIMIT 1
+    ) nd
+    JOIN ref_disciplines rd     ON rd.id = nd.discipline_id
+    JOIN sport_ministry_act sma ON sma.id = rd.sport_act_id
+    JOIN ref_sports rs          ON rs.id = sma.sport_id
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS params_count,
+            COALESCE(
+                json_object_agg(rpt.type_name, rp.parameter_value ORDER BY rpt.type_name)
+                    FILTER (WHERE rpt.type_name <> '' AND rp.parameter_value <> ''),
+                '{}'
+            ) AS params
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        JOIN ref_parameters rp      ON rp.id = ldp.parameter_id
+        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+        WHERE g.normative_id = n.id
+    ) p
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS conditions_count,
+            COALESCE(
+                json_object_agg(rreq.requirement_value, c.condition
+                                ORDER BY c.parent_id NULLS FIRST, c.id)
+                    FILTER (WHERE rreq.requirement_value <> '' AND c.condition <> ''),
+                '{}'
+            ) AS conditions
+        FROM conditions c
+        JOIN ref_requirements rreq  ON rreq.id = c.requirement_id
+        WHERE c.normative_id = n.id
+    ) c
+"""
 
-@app.post("/disciplines")
-def add_disciplines(payload: DisciplinesIn):
-    """
-    Создаёт дисциплины и привязывает их к акту Минспорта через sport_act_id.
-    Принимает sport_act_id (не sport_id) — дисциплины привязываются к акту напрямую.
-    """
-    conn = get_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+NORMATIVES_BATCH_QUERY = _NORMATIVE_FLAT_SELECT + """
+    WHERE n.id = ANY(%s) AND p.params_count > 0 AND c.conditions_count > 0
+"""
 
-    inserted = []
-    errors = []
 
-    if len(payload.discipline_names) != len(payload.discipline_codes):
-        conn.close()
-        return {"inserted": [], "errors": ["Количество названий и кодов дисциплин не совпадает."]}
+def normative_v1_item(row) -> dict:
+    """Норматив в формате /v_1/normative/{id} из строки NORMATIVES_BATCH_QUERY."""
+    return {
+        "id": row["normative_id"],
+        "sport": {"id": row["sport_id"], "name": row["sport_name"]},
+        "discipline": {
+            "id": row["discipline_id"],
+            "name": row["discipline_name"],
+            "code": row["discipline_code"]
+        },
+        "rank": {
+            "id": row["rank_id"],
+            "short": row["rank_short"],
+            "full": row["rank_full"],
+            "prestige": row["rank_prestige"]
+        },
+        "parameters": row["params"],
+        "conditions": row["conditions"]
+    }
+
 
-    # Проверяем, что акт существует
-    cur.execute("SELECT id FROM sport_ministry_act WHERE id = %s", (payload.sport_act_id,))
-    if not cur.fetchone():
-        conn.close()
+async def _normatives_batch(ids: List[int]) -> dict:
+    ids = list(dict.fromkeys(ids))  # без повторов, в порядке запроса
+    if not ids:
+        raise HTTPException(status_code=400, detail="No normative ids given")
+    if len(ids) > NORMATIVES_BATCH_MAX:
         raise HTTPException(
             status_code=400,
-            detail=f"sport_act_id {payload.sport_act_id} не найден в sport_ministry_act"
+            detail=f"Too many ids: {len(ids)} (max {NORMATIVES_BATCH_MAX})"
         )
 
-    for name, code in zip(payload.discipline_names, payload.discipline_codes):
-        name = name.strip()
-        code = code.strip()
-        if not name or not code:
-            continue
-        try:
-            cur.execute(
-                """
-                INSERT INTO ref_disciplines (sport_act_id, discipline_code, discipline_name)
-                VALUES (%s, %s, %s)
-                RETURNING id, discipline_name, discipline_code
-                """,
-                (payload.sport_act_id, code, name)
-            )
-            row = cur.fetchone()
-            inserted.append(dict(row))
-            conn.commit()
-        except psycopg2.errors.UniqueViolation:
-            conn.rollback()
-            cur.execute(
-                """
-                SELECT id, discipline_name, discipline_code
-                FROM ref_disciplines
-                WHERE (discipline_name = %s OR discipline_code = %s)
-                  AND sport_act_id = %s
-                """,
-                (name, code, payload.sport_act_id)
-            )
-            row = cur.fetchone()
-            if row:
-                inserted.append({**dict(row), "note": "already exists"})
-            else:
-                errors.append({
-                    "discipline_name": name,
-                    "discipline_code": code,
-                    "error": "unique constraint violated but record not found"
-                })
-        except Exception as e:
-            conn.rollback()
-            errors.append({"discipline_name": name, "discipline_code": code, "error": str(e)})
-
-    cur.close()
-    conn.close()
-    return {"inserted": inserted, "errors": errors}
+    rows = await fetch_rows(NORMATIVES_BATCH_QUERY, ids)
+    found = {row["normative_id"]: normative_v1_item(row) for row in rows}
+    return {
+        "normatives": {nid: found[nid] for nid in ids if nid in found},
+        "missing": [nid for nid in ids if nid not in found],
+    }
 
 
-@app.post("/parameter-types")
-def add_parameter_type(payload: ParameterTypeIn):
-    conn = get_conn()
-    cur = conn.cursor()
+@app.get("/v_1/normatives/batch")
+async def get_normatives_batch_v1_json(
+    ids: List[str] = Query(..., description="id нормативов: ids=1,2,3 или ids=1&ids=2")
+):
+    """
+    Несколько нормативов одним запросом к БД, в формате /v_1/normative/{id}.
+    Ответ: {"normatives": {id: норматив}, "missing": [id, ...]} — ненайденные id
+    перечисляются в missing, а не приводят к 404.
+    """
     try:
-        cur.execute(
-            "INSERT INTO ref_parameters_types (type_name) VALUES (%s) RETURNING id",
-            (payload.short_name.strip(),)
-        )
-        row = cur.fetchone()
-        nid = row["id"]
-        conn.commit()
-    except Exception as e:
-        if "unique" in str(e).lower():
-            conn.rollback()
-            cur.execute(
-                "SELECT id FROM ref_parameters_types WHERE type_name = %s",
-                (payload.short_name.strip(),)
-            )
-            row = cur.fetchone()
-            nid = row["id"] if row else None
-        else:
-            nid = None
-    conn.close()
-    return {"id": nid, "type_name": payload.short_name}
+        parsed = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    return await _normatives_batch(parsed)
 
 
-@app.post("/parameters")
-def add_parameter(payload: ParameterIn):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM ref_parameters_types WHERE id = %s", (payload.parameter_type_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(
-            status_code=400,
-            detail=f"parameter_type_id {payload.parameter_type_id} not found"
-        )
-    try:
-        cur.execute(
-            "INSERT INTO ref_parameters (parameter_type_id, parameter_value) VALUES (%s, %s) RETURNING id",
-            (payload.parameter_type_id, payload.parameter_value.strip())
-        )
-        row = cur.fetchone()
-        pid = row["id"]
-        conn.commit()
-    except Exception as e:
-        if "unique" in str(e).lower():
-            conn.rollback()
-            cur.execute(
-                "SELECT id FROM ref_parameters WHERE parameter_type_id = %s AND parameter_value = %s",
-                (payload.parameter_type_id, payload.parameter_value.strip())
-            )
-            row = cur.fetchone()
-            pid = row["id"] if row else None
-        else:
-            pid = None
-    conn.close()
-    return {"id": pid, "parameter_value": payload.parameter_value, "parameter_type_id": payload.parameter_type_id}
+@app.post("/v_1/normatives/batch")
+async def post_normatives_batch_v1_json(payload: NormativesBatchIn):
+    """То же, что GET /v_1/normatives/batch, для длинных списков id в теле запроса."""
+    return await _normatives_batch(payload.ids)
 
 
-@app.post("/requirements")
-def add_requirement(payload: RequirementIn):
-    """
-    ИСПРАВЛЕН БАГ: в оригинале fallback при UniqueViolation использовал
-    payload.parameter_type_id / payload.parameter_value (поля от ParameterIn).
-    Теперь корректно использует payload.requirement_type_id / payload.requirement_value.
-    """
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM ref_requirements_types WHERE id = %s", (payload.requirement_type_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(
-            status_code=400,
-            detail=f"requirement_type_id {payload.requirement_type_id} not found"
-        )
-    try:
-        cur.execute(
-            """
-            INSERT INTO ref_requirements (requirement_type_id, requirement_value, description)
-            VALUES (%s, %s, %s)
-            RETURNING id
-            """,
-            (
-                payload.requirement_type_id,
-                payload.requirement_value.strip(),
-                payload.description.strip() if payload.description else None
-            )
-        )
-        row = cur.fetchone()
-        pid = row["id"]
-        conn.commit()
-    except Exception as e:
-        if "unique" in str(e).lower():
-            conn.rollback()
-            # ИСПРАВЛЕНО: используем правильные поля модели RequirementIn
-            cur.execute(
-                "SELECT id FROM ref_requirements WHERE requirement_type_id = %s AND requirement_value = %s",
-                (payload.requirement_type_id, payload.requirement_value.strip())
-            )
-            row = cur.fetchone()
-            pid = row["id"] if row else None
-        else:
-            pid = None
-    conn.close()
+# =============================================================================
+# GET — выгрузка действующего каталога (NDJSON/CSV)
+# =============================================================================
+# Весь каталог одним запросом: нормативы действующих актов по возрастанию id,
+# одна плоская запись на строку. Строки читаются серверным курсором пачками
+# (_stream_batches) и сразу сжимаются и уходят клиенту — память на выгрузку
+# не зависит от размера каталога. Оборванную выгрузку продолжают с
+# after_id=<последний полученный id>.
+
+NORMATIVES_EXPORT_QUERY = _NORMATIVE_FLAT_SELECT + """
+    WHERE sma.end_date IS NULL
+      AND (%s::integer IS NULL OR rs.id = %s)
+      AND n.id > %s
+      AND p.params_count > 0 AND c.conditions_count > 0
+    ORDER BY n.id
+"""
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+EXPORT_CSV_COLUMNS = [
+    "id", "sport_id", "sport_name", "discipline_id", "discipline_code", "discipline_name",
+    "rank_id", "rank_short", "rank_full", "rank_prestige", "parameters", "conditions",
+]
+
+
+def export_normative_item(row) -> dict:
+    """Плоская запись выгрузки из строки NORMATIVES_EXPORT_QUERY."""
     return {
-        "id": pid,
-        "requirement_value": payload.requirement_value,
-        "requirement_type_id": payload.requirement_type_id
+        "id": row["normative_id"],
+        "sport_id": row["sport_id"],
+        "sport_name": row["sport_name"],
+        "discipline_id": row["discipline_id"],
+        "discipline_code": row["discipline_code"],
+        "discipline_name": row["discipline_name"],
+        "rank_id": row["rank_id"],
+        "rank_short": row["rank_short"],
+        "rank_full": row["rank_full"],
+        "rank_prestige": row["rank_prestige"],
+        "parameters": row["params"],
+        "conditions": row["conditions"],
     }
 
 
-@app.post("/link-parameters")
-def link_parameters(payload: LinkParametersIn):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM ref_disciplines WHERE id = %s", (payload.discipline_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail=f"discipline_id {payload.discipline_id} not found")
-
-    inserted = []
-    errors = []
-    for pid in payload.parameter_ids:
-        cur.execute("SELECT id FROM ref_parameters WHERE id = %s", (pid,))
-        if not cur.fetchone():
-            errors.append({"parameter_id": pid, "error": "not found"})
+def _export_chunks(fmt: str, sport_id: Optional[int], after_id: int):
+    """Выгрузка пачками байтов; в CSV словари — строкой «название: значение; ...», как в импорте акта."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(EXPORT_CSV_COLUMNS)
+    for batch in _stream_batches(NORMATIVES_EXPORT_QUERY, (sport_id, sport_id, after_id)):
+        if fmt == "ndjson":
+            yield b"".join(_encode_json(export_normative_item(row)) + b"\n" for row in batch)
             continue
-        try:
-            cur.execute(
-                "INSERT INTO lnk_discipline_parameters (discipline_id, parameter_id) VALUES (%s, %s) RETURNING id",
-                (payload.discipline_id, pid)
-            )
-            row = cur.fetchone()
-            inserted.append({"id": row["id"], "discipline_id": payload.discipline_id, "parameter_id": pid})
-        except Exception as e:
-            if "unique" in str(e).lower():
-                conn.rollback()
-                cur.execute(
-                    "SELECT id FROM lnk_discipline_parameters WHERE discipline_id = %s AND parameter_id = %s",
-                    (payload.discipline_id, pid)
-                )
-                row = cur.fetchone()
-                if row:
-                    inserted.append({
-                        "id": row["id"],
-                        "discipline_id": payload.discipline_id,
-                        "parameter_id": pid,
-                        "note": "already exists"
-                    })
-                else:
-                    errors.append({"parameter_id": pid, "error": str(e)})
-            else:
-                errors.append({"parameter_id": pid, "error": str(e)})
-    conn.commit()
-    conn.close()
-    return {"inserted": inserted, "errors": errors}
+        for row in batch:
+            item = export_normative_item(row)
+            for key in ("parameters", "conditions"):
+                item[key] = "; ".join(f"{name}: {value}" for name, value in item[key].items())
+            writer.writerow([item[column] for column in EXPORT_CSV_COLUMNS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Разрешает ли Accept-Encoding gzip: q-значение gzip (или *, если gzip не назван) больше нуля."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.lower()] = q
+    q = qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0)))
+    return q > 0
+
+
+def _gzip_chunks(chunks):
+    """gzip на лету: каждая пачка дожимается Z_SYNC_FLUSH и уходит клиенту сразу."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@app.get("/export/normatives")
+def export_normatives(
+    request: Request,
+    format: str = Query("ndjson", description="ndjson | csv"),
+    sport_id: Optional[int] = Query(None, description="только этот вид спорта"),
+    after_id: int = Query(0, description="продолжить выгрузку после норматива с этим id"),
+):
+    """
+    Все нормативы действующих актов, по одному на строку, по возрастанию id.
+    NDJSON — JSON-объект на строку; CSV — с заголовком. Если клиент принимает
+    gzip (Accept-Encoding с q > 0), ответ сжимается на лету.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    chunks = _export_chunks(format, sport_id, after_id)
+    headers = {"Content-Disposition": f'attachment; filename="normatives.{format}"', "Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
 
 # =============================================================================
-# POST — создание норматива
+# Числовые значения условий (conditions.condition_numeric)
 # =============================================================================
+# conditions.condition — текст в том виде, в каком он в акте. Рядом хранится
+# разобранное значение: condition_numeric (секунды, метры, очки, место...),
+# condition_unit и condition_direction ('lower' — лучше меньше, 'higher' —
+# больше). Изменяющие эндпоинты заполняют их при записи (normalize_conditions),
+# для уже существующих строк — разовый прогон после migrate (и --all после
+# изменения parse_condition):
+#
+#     python app.py backfill-conditions
+#
+# Калькулятор разряда (ThresholdIndex) читает эти колонки, а не текст.
+
+_TIME_RE = re.compile(r"^(\d+):(\d{1,2})(?::(\d{1,2}))?(?:\.(\d+))?$")
+# время через точки, как в актах: "2.05.3" — м.сс.д, "1.02.15.0" — ч.мм.сс.д
+_DOTTED_TIME_RE = re.compile(r"^(\d+)\.([0-5]\d)(?:\.([0-5]\d))?\.(\d+)$")
+_BARE_NUMBER_RE = re.compile(r"^[+-]?\d+(?:[.,]\d+)?$")
+_UNITLESS_UNITS = {"place", "count", "points"}  # в актах и протоколах пишутся просто числом
+_RANGE_RE = re.compile(r"^(\d+)\s*[-–—]\s*(\d+)$")
+_NUMBER_RE = re.compile(r"^([+-]?\d+(?:\.\d+)?)\s*(\D.*)?$")
+
+# суффикс значения → (единица, множитель, направление)
+_CONDITION_UNITS = [
+    (re.compile(r"^(с|сек\w*|s)\.?$"), "s", 1, "lower"),
+    (re.compile(r"^(мин\w*|min)\.?$"), "s", 60, "lower"),
+    (re.compile(r"^(м|метр\w*|m)\.?$"), "m", 1, "higher"),
+    (re.compile(r"^(см|cm)\.?$"), "m", 0.01, "higher"),
+    (re.compile(r"^(км|km)\.?$"), "m", 1000, "higher"),
+    (re.compile(r"^(кг|kg)\.?$"), "kg", 1, "higher"),
+    (re.compile(r"^(очк\w*|балл\w*|pts?)\.?$"), "points", 1, "higher"),
+    (re.compile(r"^(мест\w*)\.?$"), "place", 1, "lower"),
+    (re.compile(r"^(раз\w*|повт\w*)\.?$"), "count", 1, "higher"),
+]
+# часть названия требования → (единица, направление) для чисел без суффикса
+_REQUIREMENT_UNITS = [
+    ("врем", "s", "lower"),
+    ("мест", "place", "lower"),
+    ("дальн", "m", "higher"),
+    ("длин", "m", "higher"),
+    ("высот", "m", "higher"),
+    ("рассто", "m", "higher"),
+    ("очк", "points", "higher"),
+    ("балл", "points", "higher"),
+    ("колич", "count", "higher"),
+]
 
-@app.post("/normatives")
-def add_normatives(payload: CreateNormativeIn):
-    """
-    Создаёт нормативы для нескольких разрядов за один вызов.
 
-    Логика дедупликации для каждого rank_entry:
-      - Ищем норматив с тем же rank_id И точно тем же набором ldp_ids.
-      - Не найден → создаём normative + groups + condition → попадает в created[].
-      - Найден, условие новое → добавляем только condition → попадает в updated_existing[].
-      - Найден, условие уже есть → тихий пропуск → попадает в skipped_conflicts[].
+def parse_condition(text, requirement: Optional[str] = None) -> Optional[tuple]:
+    """
+    Разбирает значение условия: (число, единица, направление) или None, если
+    это не число ("Чемпионат России"). Форматы: время мм:сс.дд и ч:мм:сс
+    (и через точки: м.сс.д, ч.мм.сс.д), место "1-3" (число — худшее засчитываемое место), числа с запятой или
+    точкой и необязательным суффиксом ("6,20 м", "12 очков"). Единица и
+    направление числа без суффикса берутся из названия требования (requirement);
+    если и оно ничего не говорит — None.
+    """
+    if isinstance(text, (int, float)):
+        value, suffix = float(text), None
+    else:
+        normalized = str(text).strip().replace(",", ".").replace("\xa0", " ")
+        match = _TIME_RE.match(normalized) or _DOTTED_TIME_RE.match(normalized)
+        if match:
+            first, second, third, fraction = match.groups()
+            if third is None:  # мм:сс(.доли)
+                seconds = int(first) * 60 + int(second)
+            else:              # ч:мм:сс(.доли)
+                seconds = int(first) * 3600 + int(second) * 60 + int(third)
+            return seconds + (float("0." + fraction) if fraction else 0.0), "s", "lower"
+        match = _RANGE_RE.match(normalized)
+        if match:
+            return float(match.group(2)), "place", "lower"
+        match = _NUMBER_RE.match(normalized)
+        if not match:
+            return None
+        value, suffix = float(match.group(1)), (match.group(2) or "").strip().lower()
+
+    if suffix:
+        for pattern, unit, factor, direction in _CONDITION_UNITS:
+            if pattern.match(suffix):
+                return value * factor, unit, direction
+        return None  # "5 лучших", "1 из 3" — не число с единицей
+    name = (requirement or "").lower()
+    for part, unit, direction in _REQUIREMENT_UNITS:
+        if part in name:
+            return value, unit, direction
+    return value, None, None
+
+
+def _store_parsed_conditions(cur, rows) -> int:
+    """rows — (id, condition, requirement_value); записывает разбор одним UPDATE. Возвращает число разобранных."""
+    parsed = [(row["id"], parse_condition(row["condition"], row["requirement_value"])) for row in rows]
+    parsed = [(cid, p) for cid, p in parsed if p is not None]
+    if parsed:
+        cur.execute("""
+            UPDATE conditions c
+            SET condition_numeric = v.numeric, condition_unit = v.unit, condition_direction = v.direction
+            FROM unnest(%s::int[], %s::float8[], %s::text[], %s::text[]) AS v(id, numeric, unit, direction)
+            WHERE c.id = v.id
+        """, (
+            [cid for cid, _ in parsed],
+            [p[0] for _, p in parsed],
+            [p[1] for _, p in parsed],
+            [p[2] for _, p in parsed],
+        ))
+    return len(parsed)
+
+
+def normalize_conditions(cur, condition_ids: List[int]):
+    """Заполняет condition_numeric/unit/direction только что записанных условий (в той же транзакции)."""
+    if not condition_ids or not schema_ready(cur):
+        return
+    cur.execute("""
+        SELECT c.id, c.condition, r.requirement_value
+        FROM conditions c
+        JOIN ref_requirements r ON r.id = c.requirement_id
+        WHERE c.id = ANY(%s)
+    """, (list(condition_ids),))
+    _store_parsed_conditions(cur, cur.fetchall())
 
-    Дополнительные условия (additional_requirements) записываются в таблицу conditions
-    с parent_id = id основного условия этого rank_entry.
+
+def backfill_conditions(batch_size: int = 1000, everything: bool = False) -> dict:
+    """
+    Разбирает условия без condition_numeric (everything=True — все) пачками по
+    id; каждая пачка — своя транзакция, так что прогон можно прервать и повторить.
     """
-    conn = get_conn()
-    cur = conn.cursor()
+    if not schema_ready():
+        raise RuntimeError("служебная схема не создана, сначала: python app.py migrate")
+    last_id, seen, stored = 0, 0, 0
+    with get_conn() as conn:
+        cur = conn.cursor()
+        while True:
+            cur.execute(f"""
+                SELECT c.id, c.condition, r.requirement_value
+                FROM conditions c
+                JOIN ref_requirements r ON r.id = c.requirement_id
+                WHERE c.id > %s {"" if everything else "AND c.condition_numeric IS NULL"}
+                ORDER BY c.id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            stored += _store_parsed_conditions(cur, rows)
+            conn.commit()
+            seen += len(rows)
+            last_id = rows[-1]["id"]
+    return {"checked": seen, "parsed": stored, "not_numeric": seen - stored}
 
-    # Валидация discipline_id
-    cur.execute("SELECT id FROM ref_disciplines WHERE id = %s", (payload.discipline_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail=f"discipline_id {payload.discipline_id} not found")
 
-    # Валидация ldp_ids — все должны принадлежать указанной дисциплине
-    for ldp_id in payload.ldp_ids:
-        cur.execute("SELECT discipline_id FROM lnk_discipline_parameters WHERE id = %s", (ldp_id,))
-        row = cur.fetchone()
-        if not row:
-            conn.close()
-            raise HTTPException(status_code=400, detail=f"ldp_id {ldp_id} not found")
-        if row["discipline_id"] != payload.discipline_id:
-            conn.close()
+def backfill_conditions_cli(argv: List[str]) -> int:
+    """python app.py backfill-conditions [--all] [--batch-size N]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="app.py backfill-conditions",
+                                     description="Заполнить conditions.condition_numeric для существующих условий")
+    parser.add_argument("--all", action="store_true", help="разобрать заново и уже заполненные")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    open_pool()
+    try:
+        print(json.dumps(backfill_conditions(args.batch_size, args.all), ensure_ascii=False))
+    except RuntimeError as e:
+        print(f"ошибка: {e}", file=sys.stderr)
+        return 2
+    finally:
+        close_pool()
+    return 0
+
+
+# =============================================================================
+# POST — калькулятор разряда по результату спортсмена
+# =============================================================================
+# Пороги хранятся текстом ("10.5", "1:23.45", "6,20", место "1-3") и рядом —
+# разобранными (conditions.condition_numeric/unit/direction). Для дисциплины
+# они один раз читаются и раскладываются по группам
+# нормативов — (набор параметров, требование) — в отсортированные массивы;
+# оценка результата — бинарный поиск по массиву группы, без запросов к БД.
+# Группы дисциплины живут в памяти до изменения каталога (apply_catalog_change)
+# или CATALOG_CACHE_TTL.
+
+class _ThresholdGroup:
+    """
+    Пороги одной группы нормативов. keys — пороги по возрастанию «строгости
+    наоборот»: для lower это сами значения, для higher — значения со знаком
+    минус, так что результат r проходит порог i, когда key(r) <= keys[i].
+    best[i] — самый престижный разряд среди порогов i.. (данные актов не всегда
+    монотонны, поэтому берётся максимум по хвосту, а не сам порог i).
+    Направление и единица — из condition_direction/condition_unit порогов, если
+    они у всех порогов группы одинаковые; иначе None, и группа не оценивает
+    (direction) или не проверяет единицу результата (unit). bare — результат
+    без единицы подходит группе: среди порогов есть записанные числом («10.5»)
+    или единица и так пишется числом (место, количество, очки). Время «1:35.81»
+    и дальность «6,20 м» числом без единицы не сравниваются.
+    """
+    __slots__ = ("parameters", "requirement", "direction", "unit", "bare", "sign", "keys", "keys_array", "best",
+                 "following", "by_prestige")
+
+    def __init__(self, parameters: dict, requirement: str, entries: list):
+        self.parameters = parameters
+        self.requirement = requirement
+        # entries: (prestige, rank, threshold_text, value, direction, unit); prestige не None (см. ThresholdIndex.build)
+        self.by_prestige = sorted(entries, key=lambda e: (e[0], e[1]["id"]))
+        self.direction = self._common(4)
+        self.unit = self._common(5)
+        self.bare = self.unit in _UNITLESS_UNITS or any(_BARE_NUMBER_RE.match(str(e[2]).strip()) for e in entries)
+        self.sign = sign = 1 if self.direction == "lower" else -1
+        ordered = sorted(self.by_prestige, key=lambda e: sign * e[3])
+        self.keys = [sign * e[3] for e in ordered]
+        self.keys_array = numpy.array(self.keys, dtype=float) if numpy is not None else None
+        self.best = [None] * (len(ordered) + 1)
+        for i in range(len(ordered) - 1, -1, -1):
+            best = self.best[i + 1]
+            self.best[i] = ordered[i] if best is None or ordered[i][0] > best[0] else best
+        # следующий разряд после best[i]: наименее престижный из более престижных
+        self.following = [
+            next((e for e in self.by_prestige if best is None or e[0] > best[0]), None)
+            for best in self.best
+        ]
+
+    def _common(self, field: int) -> Optional[str]:
+        values = {e[field] for e in self.by_prestige}
+        return values.pop() if len(values) == 1 else None
+
+    def reject(self, unit: Optional[str]) -> Optional[str]:
+        """Почему группа не оценивает результат с единицей unit (None — число без единицы); None — оценивает."""
+        if self.direction is None:
+            return "direction unknown"
+        if self.unit is None or unit == self.unit or (unit is None and self.bare):
+            return None
+        return f"unit mismatch: expected {self.unit}" + (f", got {unit}" if unit else "")
+
+    def error(self, message: str) -> dict:
+        return {
+            "requirement": self.requirement,
+            "parameters": self.parameters,
+            "direction": self.direction,
+            "unit": self.unit,
+            "rank": None,
+            "next_rank": None,
+            "error": message,
+        }
+
+    def position(self, value: float) -> int:
+        return bisect.bisect_left(self.keys, self.sign * value)
+
+    def positions(self, values: List[float]) -> List[int]:
+        """position() для многих результатов сразу: numpy.searchsorted, без numpy — bisect."""
+        if self.keys_array is None:
+            return [self.position(value) for value in values]
+        return numpy.searchsorted(self.keys_array, self.sign * numpy.asarray(values, dtype=float)).tolist()
+
+    def evaluate(self, value: float, position: Optional[int] = None) -> dict:
+        if position is None:
+            position = self.position(value)
+        achieved, following = self.best[position], self.following[position]
+        return {
+            "requirement": self.requirement,
+            "parameters": self.parameters,
+            "direction": self.direction,
+            "unit": self.unit,
+            "rank": dict(achieved[1], threshold=achieved[2]) if achieved else None,
+            "next_rank": dict(
+                following[1],
+                threshold=following[2],
+                gap=round(abs(value - following[3]), 3),
+            ) if following else None,
+        }
+
+
+# {parsed} — колонки разбора или NULL-заглушки, если миграции не было
+THRESHOLDS_QUERY = """
+    SELECT
+        rr.id           AS rank_id,
+        rr.short_name   AS rank_short,
+        rr.full_name    AS rank_full,
+        rr.prestige     AS rank_prestige,
+        p.params,
+        rreq.requirement_value,
+        c.condition,
+        {parsed}
+    FROM normatives n
+    JOIN ref_ranks rr ON rr.id = n.rank_id
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(
+                json_object_agg(rpt.type_name, rp.parameter_value ORDER BY rpt.type_name)
+                    FILTER (WHERE rpt.type_name <> '' AND rp.parameter_value <> ''),
+                '{{}}'
+            ) AS params
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        JOIN ref_parameters rp ON rp.id = ldp.parameter_id
+        JOIN ref_parameters_types rpt ON rpt.id = rp.parameter_type_id
+        WHERE g.normative_id = n.id
+    ) p
+    JOIN conditions c ON c.normative_id = n.id AND c.parent_id IS NULL
+    JOIN ref_requirements rreq ON rreq.id = c.requirement_id
+    WHERE n.id IN (
+        SELECT g.normative_id
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        WHERE ldp.discipline_id = %s
+    )
+"""
+_THRESHOLDS_PARSED = "c.condition_numeric, c.condition_unit, c.condition_direction"
+_THRESHOLDS_UNPARSED = "NULL::float8 AS condition_numeric, NULL AS condition_unit, NULL AS condition_direction"
+
+
+class ThresholdIndex:
+    """Группы порогов по дисциплинам: загружаются при первом обращении и живут до изменения каталога."""
+
+    TABLES = _NORMATIVES_TABLES
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # discipline_id → (истекает, sport_id, группы)
+        self._disciplines: Dict[int, tuple] = {}
+
+    def groups(self, discipline_id: int) -> Optional[List[_ThresholdGroup]]:
+        """Группы дисциплины; None — дисциплины нет. Блокирующая (запрос к БД при промахе)."""
+        cached = self._disciplines.get(discipline_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[2]
+        with get_conn() as conn:
+            cur = conn.cursor()
+            sport_id = sport_id_for_discipline(cur, discipline_id)
+            if sport_id is None:
+                return None
+            stored = schema_ready(cur)
+            cur.execute(
+                THRESHOLDS_QUERY.format(parsed=_THRESHOLDS_PARSED if stored else _THRESHOLDS_UNPARSED),
+                (discipline_id,)
+            )
+            rows = cur.fetchall()
+        groups = self.build(rows, stored)
+        with self._lock:
+            self._disciplines[discipline_id] = (time.monotonic() + self.ttl, sport_id, groups)
+        return groups
+
+    @staticmethod
+    def build(rows, stored: bool = True) -> List[_ThresholdGroup]:
+        """
+        stored — значения из conditions.condition_numeric/unit/direction (условия
+        без condition_numeric пропускаются: текст или ещё не прошли backfill);
+        False — схема не мигрирована, текст разбирается на месте.
+        """
+        entries: Dict[tuple, list] = {}
+        parameters: Dict[tuple, dict] = {}
+        for row in rows:
+            if stored:
+                parsed = None if row["condition_numeric"] is None else (
+                    row["condition_numeric"], row["condition_unit"], row["condition_direction"]
+                )
+            else:
+                parsed = parse_condition(row["condition"], row["requirement_value"])
+            if parsed is None:
+                continue  # текстовые условия ("Чемпионат России") в калькуляторе не участвуют
+            key = (tuple(sorted(row["params"].items())), row["requirement_value"])
+            parameters[key] = row["params"]
+            rank = {
+                "id": row["rank_id"],
+                "short": row["rank_short"],
+                "full": row["rank_full"],
+                "prestige": row["rank_prestige"],
+            }
+            prestige = row["rank_prestige"] if row["rank_prestige"] is not None else -1  # разряд без престижа — последний
+            entries.setdefault(key, []).append((prestige, rank, row["condition"], parsed[0], parsed[2], parsed[1]))
+        return [_ThresholdGroup(parameters[key], key[1], group) for key, group in entries.items()]
+
+    def apply_change(self, tables: set, sport_id: Optional[int]):
+        if not self.TABLES & tables:
+            return
+        with self._lock:
+            if sport_id is None:
+                self._disciplines.clear()
+            else:
+                for discipline_id in [d for d, v in self._disciplines.items() if v[1] == sport_id]:
+                    del self._disciplines[discipline_id]
+
+
+threshold_index = ThresholdIndex(CATALOG_CACHE_TTL)
+
+
+def _evaluation_order(evaluation: dict) -> tuple:
+    """Ключ сортировки оценок (по убыванию): престиж разряда; без разряда — ниже разряда без престижа."""
+    rank = evaluation["rank"]
+    if rank is None:
+        prestige = -2
+    else:
+        prestige = rank["prestige"] if rank["prestige"] is not None else -1
+    return prestige, evaluation["requirement"] or ""
+
+
+def _matches(group: _ThresholdGroup, parameters: Dict[str, str], requirement: Optional[str]) -> bool:
+    """Все параметры группы заданы и совпадают (без учёта регистра); требование — если задано."""
+    if requirement is not None and group.requirement.lower() != requirement.strip().lower():
+        return False
+    given = {k.strip().lower(): str(v).strip().lower() for k, v in parameters.items()}
+    return all(given.get(k.lower()) == str(v).lower() for k, v in group.parameters.items())
+
+
+@app.post("/v_2/disciplines/{discipline_id}/evaluate")
+def evaluate_result_v2(discipline_id: int, payload: EvaluateIn):
+    """
+    Какой разряд даёт результат. Для каждой подходящей группы нормативов
+    (параметры норматива совпадают с переданными, требование — если задано)
+    возвращает достигнутый разряд и следующий разряд с разницей до порога.
+    rank — лучший достигнутый разряд по всем группам.
+    Единица результата берётся из него самого ("1:05.3", "6,20 м"); группа с
+    другой единицей или с неизвестным направлением отвечает error вместо разряда.
+    Число без единицы не сравнивается с порогами вида «1:35.81» или «6,20 м».
+    """
+    parsed = parse_condition(payload.result)
+    if parsed is None:
+        raise HTTPException(status_code=400, detail=f"result {payload.result!r} is not a number or time")
+    groups = threshold_index.groups(discipline_id)
+    if groups is None:
+        raise HTTPException(status_code=404, detail="Discipline not found")
+
+    evaluations = []
+    for group in groups:
+        if not _matches(group, payload.parameters, payload.requirement):
+            continue
+        error = group.reject(parsed[1])
+        evaluations.append(group.error(error) if error else group.evaluate(parsed[0]))
+    if not evaluations:
+        raise HTTPException(status_code=404, detail="No normatives for these parameters")
+    evaluations.sort(key=_evaluation_order, reverse=True)
+    best = evaluations[0]["rank"]
+    return {
+        "discipline_id": discipline_id,
+        "result": payload.result,
+        "rank": {k: best[k] for k in ("id", "short", "full", "prestige")} if best else None,
+        "evaluations": evaluations,
+    }
+
+
+# =============================================================================
+# POST — пакетная оценка протокола соревнований
+# =============================================================================
+# Протокол — сотни и тысячи результатов по нескольким дисциплинам. Строки
+# раскладываются по группам порогов (ThresholdIndex), и результаты каждой
+# группы ищутся в её массиве порогов одним numpy.searchsorted. К БД —
+# только при промахе ThresholdIndex по дисциплине и для кодов дисциплин.
+
+EVALUATE_BATCH_MAX = int(os.getenv("EVALUATE_BATCH_MAX", "10000"))
+
+
+def _parse_pairs(text: str) -> Dict[str, str]:
+    """«Пол: Мужчины; Возраст: 18+» → {"Пол": "Мужчины", "Возраст": "18+"} — формат импорта акта."""
+    pairs = {}
+    for item in (text or "").split(";"):
+        name, sep, value = item.partition(":")
+        if sep and name.strip():
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def read_protocol_csv(data: bytes) -> List[Union[EvaluateBatchRow, str]]:
+    """
+    CSV протокола: discipline_id или discipline_code, parameters, result, requirement (необязательно).
+    Строка, которую не удалось прочитать, заменяется текстом ошибки — она попадёт
+    в результат своей строки, остальной протокол оценивается.
+    """
+    text = data.decode("utf-8-sig")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    if "result" not in reader.fieldnames or not {"discipline_id", "discipline_code"} & set(reader.fieldnames):
+        raise ValueError("нужны колонки result и discipline_id или discipline_code")
+    rows = []
+    for record in reader:
+        discipline_id = (record.get("discipline_id") or "").strip()
+        try:
+            discipline_id = int(discipline_id) if discipline_id else None
+        except ValueError:
+            rows.append(f"discipline_id {discipline_id!r} is not an integer")
+            continue
+        rows.append(EvaluateBatchRow(
+            discipline_id=discipline_id,
+            discipline_code=(record.get("discipline_code") or "").strip() or None,
+            parameters=_parse_pairs(record.get("parameters")),
+            result=(record.get("result") or "").strip(),
+            requirement=(record.get("requirement") or "").strip() or None,
+        ))
+    return rows
+
+
+def evaluate_protocol(rows: List[Union[EvaluateBatchRow, str]]) -> dict:
+    """
+    Оценка строк протокола; порядок и число результатов совпадают со строками.
+    Строка-текст — ошибка чтения этой строки (read_protocol_csv), она и попадает в результат.
+    """
+    results: List[Optional[dict]] = [None] * len(rows)
+
+    # Коды дисциплин → id в действующих актах, одним запросом
+    codes = {
+        row.discipline_code for row in rows
+        if not isinstance(row, str) and row.discipline_id is None and row.discipline_code
+    }
+    by_code = {}
+    if codes:
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT d.discipline_code, min(d.id) AS id
+                FROM ref_disciplines d
+                JOIN sport_ministry_act a ON a.id = d.sport_act_id AND a.end_date IS NULL
+                WHERE d.discipline_code = ANY(%s)
+                GROUP BY d.discipline_code
+            """, (list(codes),))
+            by_code = {r["discipline_code"]: r["id"] for r in cur.fetchall()}
+
+    # Строки → группы порогов; значения каждой группы собираются в один вектор
+    disciplines: Dict[int, Optional[List[_ThresholdGroup]]] = {}
+    matches: Dict[tuple, List[_ThresholdGroup]] = {}  # в протоколе одни и те же параметры повторяются
+    pending: Dict[int, list] = {}        # id(группы) → [(номер строки, значение)]
+    groups_by_id: Dict[int, _ThresholdGroup] = {}
+    for i, row in enumerate(rows):
+        if isinstance(row, str):
+            results[i] = {"row": i, "error": row}
+            continue
+        discipline_id = row.discipline_id if row.discipline_id is not None else by_code.get(row.discipline_code)
+        if discipline_id is None:
+            results[i] = {"row": i, "error": "discipline not found"}
+            continue
+        if discipline_id not in disciplines:
+            disciplines[discipline_id] = threshold_index.groups(discipline_id)
+        groups = disciplines[discipline_id]
+        if groups is None:
+            results[i] = {"row": i, "discipline_id": discipline_id, "error": "discipline not found"}
+            continue
+        parsed = parse_condition(row.result)
+        if parsed is None:
+            results[i] = {"row": i, "discipline_id": discipline_id, "error": "result is not a number or time"}
+            continue
+        match_key = (discipline_id, tuple(sorted(row.parameters.items())), row.requirement)
+        matched = matches.get(match_key)
+        if matched is None:
+            matched = matches[match_key] = [
+                group for group in groups if _matches(group, row.parameters, row.requirement)
+            ]
+        if not matched:
+            results[i] = {"row": i, "discipline_id": discipline_id, "error": "no normatives for these parameters"}
+            continue
+        results[i] = {"row": i, "discipline_id": discipline_id, "rank": None, "evaluations": []}
+        for group in matched:
+            error = group.reject(parsed[1])
+            if error:
+                results[i]["evaluations"].append(group.error(error))
+                continue
+            groups_by_id[id(group)] = group
+            pending.setdefault(id(group), []).append((i, parsed[0]))
+
+    for key, items in pending.items():
+        group = groups_by_id[key]
+        values = [value for _, value in items]
+        for (i, value), position in zip(items, group.positions(values)):
+            results[i]["evaluations"].append(group.evaluate(value, position))
+
+    evaluated = 0
+    for result in results:
+        if "evaluations" not in result:
+            continue
+        evaluated += 1
+        result["evaluations"].sort(key=_evaluation_order, reverse=True)
+        best = result["evaluations"][0]["rank"]
+        result["rank"] = {k: best[k] for k in ("id", "short", "full", "prestige")} if best else None
+    return {"results": results, "evaluated": evaluated, "errors": len(results) - evaluated}
+
+
+@app.post("/v_2/evaluate/batch")
+async def evaluate_batch_v2(request: Request):
+    """
+    Разряды для целого протокола: JSON {"rows": [{"discipline_id" | "discipline_code",
+    "parameters", "result", "requirement"?}, ...]} или CSV (Content-Type: text/csv)
+    с колонками discipline_id/discipline_code, parameters («тип: значение; ...»),
+    result, requirement. Для каждой строки — как /v_2/disciplines/{id}/evaluate,
+    либо error; ошибка в строке не мешает остальным.
+    """
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() == "text/csv":
+            rows = read_protocol_csv(body)
+        else:
+            rows = EvaluateBatchIn(**json.loads(body or b"{}")).rows
+    except (ValueError, TypeError) as e:  # в т.ч. ошибки валидации pydantic и JSON
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > EVALUATE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many rows: {len(rows)} (max {EVALUATE_BATCH_MAX})")
+    # ответ на тысячи строк: сериализуется сразу, без прохода jsonable_encoder по результату
+    return FastJSONResponse(await run_in_threadpool(evaluate_protocol, rows))
+
+
+# =============================================================================
+# GET — поиск по видам спорта и дисциплинам
+# =============================================================================
+# Названия видов спорта и дисциплин действующих актов (и коды дисциплин) лежат
+# в памяти в двух индексах: отсортированный список слов — для поиска по
+# префиксу бинарным поиском, и триграммы слов — для опечаток и совпадений в
+# середине слова. Текст нормализуется: нижний регистр, ё → е, всё, кроме букв
+# и цифр, — разделители. Индекс строится при старте (warm_up), пересобирается
+# по уведомлению об изменении справочников и, без LISTEN, раз в CATALOG_CACHE_TTL.
+
+SEARCH_LIMIT_MAX = 100
+SEARCH_TRIGRAM_THRESHOLD = 0.5  # доля триграмм слова запроса, которые должны найтись в названии
+_SEARCH_SPLIT_RE = re.compile(r"[^0-9a-zа-я]+")
+
+SEARCH_QUERY = """
+    SELECT 'sport' AS kind, s.id, s.sport_name AS name, NULL AS code, s.id AS sport_id, s.sport_name
+    FROM ref_sports s
+    WHERE EXISTS (SELECT 1 FROM sport_ministry_act a WHERE a.sport_id = s.id AND a.end_date IS NULL)
+    UNION ALL
+    SELECT 'discipline', d.id, d.discipline_name, d.discipline_code, s.id, s.sport_name
+    FROM ref_disciplines d
+    JOIN sport_ministry_act a ON a.id = d.sport_act_id AND a.end_date IS NULL
+    JOIN ref_sports s ON s.id = a.sport_id
+"""
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    return " ".join(_SEARCH_SPLIT_RE.split((text or "").lower().replace("ё", "е"))).strip()
+
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _SearchSnapshot:
+    __slots__ = ("docs", "names", "words", "word_docs", "trigram_words", "loaded_at")
+
+    def __init__(self, rows):
+        self.docs = [dict(row) for row in rows]
+        self.names = [normalize_search_text(doc["name"]) for doc in self.docs]
+        word_docs: Dict[str, List[int]] = {}
+        for i, doc in enumerate(self.docs):
+            words = set(self.names[i].split())
+            if doc["code"]:
+                words.add(normalize_search_text(doc["code"]).replace(" ", ""))
+            for word in words:
+                word_docs.setdefault(word, []).append(i)
+        # Словарь отсортирован: слова с общим префиксом идут подряд
+        self.words = sorted(word_docs)
+        self.word_docs = [word_docs[word] for word in self.words]
+        trigram_words: Dict[str, List[int]] = {}
+        for w, word in enumerate(self.words):
+            for trigram in _trigrams(word):
+                trigram_words.setdefault(trigram, []).append(w)
+        self.trigram_words = trigram_words
+        self.loaded_at = time.monotonic()
+
+    def match_word(self, word: str) -> Dict[int, float]:
+        """Документы, подходящие под слово запроса: 3 — слово целиком, 2 — префикс, <1 — доля триграмм."""
+        scores: Dict[int, float] = {}
+        w = bisect.bisect_left(self.words, word)
+        while w < len(self.words) and self.words[w].startswith(word):
+            for doc in self.word_docs[w]:
+                scores[doc] = max(scores.get(doc, 0), 3 if self.words[w] == word else 2)
+            w += 1
+        if len(word) >= 3:
+            trigrams = _trigrams(word)
+            shared: Dict[int, int] = {}
+            for trigram in trigrams:
+                for w in self.trigram_words.get(trigram, ()):
+                    shared[w] = shared.get(w, 0) + 1
+            for w, count in shared.items():
+                similarity = count / len(trigrams)
+                if similarity < SEARCH_TRIGRAM_THRESHOLD:
+                    continue
+                for doc in self.word_docs[w]:
+                    if scores.get(doc, 0) < similarity:
+                        scores[doc] = similarity
+        return scores
+
+
+class SearchIndex:
+    """Поисковый индекс по названиям; снимок заменяется целиком, чтение без блокировок."""
+
+    TABLES = {"ref_sports", "ref_disciplines", "sport_ministry_act"}
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[_SearchSnapshot] = None
+        self._lock = threading.Lock()
+
+    def reload(self):
+        with self._lock:
+            with get_conn() as conn:
+                cur = conn.cursor()
+                cur.execute(SEARCH_QUERY)
+                rows = cur.fetchall()
+            self._snapshot = _SearchSnapshot(rows)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def apply_change(self, tables: set):
+        if not self.TABLES & tables:
+            return
+        try:
+            self.reload()
+        except Exception as e:
+            self._snapshot = None  # пересоберётся при следующем поиске
+            logger.warning("search index reload failed: %s", e)
+
+    def snapshot(self) -> _SearchSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> tuple:
+        """(всего найдено, лучшие limit результатов). Все слова запроса должны найтись."""
+        snapshot = self.snapshot()
+        normalized = normalize_search_text(query)
+        words = normalized.split()
+        if not words:
+            return 0, []
+        scores: Optional[Dict[int, float]] = None
+        for word in words:
+            matched = snapshot.match_word(word)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {doc: score + matched[doc] for doc, score in scores.items() if doc in matched}
+            if not scores:
+                return 0, []
+        found = []
+        for doc, score in scores.items():
+            if kind is not None and snapshot.docs[doc]["kind"] != kind:
+                continue
+            if snapshot.names[doc].startswith(normalized):
+                score += 1  # всё название начинается с запроса
+            found.append((-score, len(snapshot.names[doc]), snapshot.names[doc], doc))
+        found.sort()
+        results = []
+        for negative_score, _, _, doc in found[:limit]:
+            item = snapshot.docs[doc]
+            result = {"type": item["kind"], "id": item["id"], "name": item["name"]}
+            if item["kind"] == "discipline":
+                result["code"] = item["code"]
+                result["sport"] = {"id": item["sport_id"], "name": item["sport_name"]}
+            result["score"] = round(-negative_score, 3)
+            results.append(result)
+        return len(found), results
+
+
+search_index = SearchIndex(CATALOG_CACHE_TTL)
+
+
+@app.get("/v_2/search")
+def search_v2(
+    q: str = Query(..., description="строка поиска: часть названия вида спорта, дисциплины или код"),
+    type: Optional[str] = Query(None, description="sport | discipline"),
+    limit: int = Query(20, ge=1, le=SEARCH_LIMIT_MAX),
+):
+    """
+    Поиск по видам спорта и дисциплинам действующих актов: без учёта регистра
+    и ё/е, по началу слов и по триграммам (опечатки, середина слова).
+    Сначала полные совпадения слов, затем префиксы, затем похожие.
+    """
+    if type is not None and type not in ("sport", "discipline"):
+        raise HTTPException(status_code=400, detail="type must be sport or discipline")
+    total, results = search_index.search(q, type, limit)
+    return {"query": q, "total": total, "results": results}
+
+
+# =============================================================================
+# Прогрев кеша при старте и готовность
+# =============================================================================
+# После деплоя первые посетители не должны платить за холодный кеш: фоновая задача
+# загружает список видов спорта, справочники и нормативы самых тяжёлых видов спорта.
+# GET /ready отвечает 200 только когда пул поднят и прогрев закончен — по нему
+# проверяется healthcheck контейнера. Снимать неготовый инстанс с трафика должен
+# балансировщик (health check upstream); frontend от этого статуса не зависит.
+
+CACHE_WARMUP = os.getenv("CACHE_WARMUP", "1") == "1"
+WARMUP_TOP_SPORTS = int(os.getenv("WARMUP_TOP_SPORTS", "10"))
+# Явный список видов спорта для прогрева; если не задан — берутся WARMUP_TOP_SPORTS
+# видов спорта с наибольшим числом действующих нормативов.
+WARMUP_SPORT_IDS = [int(x) for x in os.getenv("WARMUP_SPORT_IDS", "").split(",") if x.strip()]
+WARMUP_RETRY_DELAY = 5  # секунды между попытками поднять пул
+
+_warmup_state = {"finished": not CACHE_WARMUP, "warmed": 0, "errors": 0, "seconds": None}
+
+
+async def _warmup_sport_ids() -> List[int]:
+    if WARMUP_SPORT_IDS:
+        return WARMUP_SPORT_IDS
+    rows = await fetch_rows("""
+        SELECT sma.sport_id, COUNT(DISTINCT g.normative_id) AS normatives_count
+        FROM sport_ministry_act sma
+        JOIN ref_disciplines rd ON rd.sport_act_id = sma.id
+        JOIN lnk_discipline_parameters ldp ON ldp.discipline_id = rd.id
+        JOIN groups g ON g.discipline_parameter_id = ldp.id
+        WHERE sma.end_date IS NULL
+        GROUP BY sma.sport_id
+        ORDER BY normatives_count DESC
+        LIMIT %s
+    """, WARMUP_TOP_SPORTS)
+    return [r["sport_id"] for r in rows]
+
+
+async def warm_up():
+    """Поднимает пулы (с повторами, если БД ещё недоступна) и прогревает кеш."""
+    started = time.monotonic()
+    while True:
+        try:
+            await run_in_threadpool(open_pool)
+            await open_async_pool()
+            break
+        except Exception as e:
+            logger.warning("warm-up: database not available yet: %s", e)
+            await asyncio.sleep(WARMUP_RETRY_DELAY)
+
+    try:
+        await run_in_threadpool(search_index.reload)
+    except Exception as e:
+        _warmup_state["errors"] += 1
+        logger.warning("warm-up of search index failed: %s", e)
+
+    jobs = [
+        (get_sports_v2_json, {}),
+        (list_parameters_json, {}),
+        (list_parameter_types_json, {}),
+        (list_requirement_types_json, {}),
+        (list_requirements_json, {}),
+        (list_ranks_json, {}),
+        (list_ldp_json, {}),
+    ]
+    try:
+        for sport_id in await _warmup_sport_ids():
+            jobs.append((get_disciplines_for_sport_v2, {"sport_id": sport_id, "include_expired": False}))
+            jobs.append((get_normatives_for_sport_json, {"sport_id": sport_id}))
+            jobs.append((get_sport_bundle_v2, {"sport_id": sport_id}))
+    except Exception as e:
+        _warmup_state["errors"] += 1
+        logger.warning("warm-up: cannot pick sports to preload: %s", e)
+
+    for handler, kwargs in jobs:
+        try:
+            await handler.warm(**kwargs)
+            _warmup_state["warmed"] += 1
+        except Exception as e:
+            _warmup_state["errors"] += 1
+            logger.warning("warm-up of %s%s failed: %s", handler.__name__, kwargs, e)
+
+    _warmup_state["seconds"] = round(time.monotonic() - started, 3)
+    _warmup_state["finished"] = True
+
+
+# =============================================================================
+# Служебные эндпоинты
+# =============================================================================
+
+@app.get("/ready")
+def get_readiness():
+    """200 — пул соединений поднят и прогрев кеша завершён; иначе 503."""
+    pool_ready = _pool is not None and (not DB_ASYNC or _async_pool is not None)
+    ready = pool_ready and _warmup_state["finished"]
+    content = {"ready": ready, "pool": pool_ready, "warmup": _warmup_state}
+    if CATALOG_ENGINE:
+        content["catalog"] = catalog_engine.stats()
+    return JSONResponse(content=content, status_code=200 if ready else 503)
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Счётчики кеша ответов: попадания, промахи и 304 по каждому namespace."""
+    return response_cache.stats()
+
+
+# =============================================================================
+# POST — справочники
+# =============================================================================
+
+@app.post("/disciplines")
+def add_disciplines(payload: DisciplinesIn):
+    """
+    Создаёт дисциплины и привязывает их к акту Минспорта через sport_act_id.
+    Принимает sport_act_id (не sport_id) — дисциплины привязываются к акту напрямую.
+    Все строки вставляются одним INSERT в одной транзакции; уже существующие
+    дисциплины возвращаются в inserted с note "already exists".
+    """
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+        inserted = []
+        errors = []
+
+        if len(payload.discipline_names) != len(payload.discipline_codes):
+            return {"inserted": [], "errors": ["Количество названий и кодов дисциплин не совпадает."]}
+
+        # Проверяем, что акт существует
+        cur.execute("SELECT id FROM sport_ministry_act WHERE id = %s", (payload.sport_act_id,))
+        if not cur.fetchone():
+            raise HTTPException(
+                status_code=400,
+                detail=f"sport_act_id {payload.sport_act_id} не найден в sport_ministry_act"
+            )
+
+        rows = [
+            (name.strip(), code.strip())
+            for name, code in zip(payload.discipline_names, payload.discipline_codes)
+            if name.strip() and code.strip()
+        ]
+
+        # Одна вставка на все строки; конфликты по уникальным ключам пропускаются
+        # и разбираются ниже. Любая другая ошибка откатывает только эту вставку —
+        # тогда строки вставляются по одной, каждая в своём SAVEPOINT.
+        cur.execute("SAVEPOINT bulk_disciplines")
+        try:
+            cur.execute("""
+                INSERT INTO ref_disciplines (sport_act_id, discipline_code, discipline_name)
+                SELECT %s, v.code, v.name
+                FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS v(name, code, ord)
+                ORDER BY v.ord
+                ON CONFLICT DO NOTHING
+                RETURNING id, discipline_name, discipline_code
+            """, (payload.sport_act_id, [r[0] for r in rows], [r[1] for r in rows]))
+            created = {(r["discipline_name"], r["discipline_code"]): dict(r) for r in cur.fetchall()}
+            outcomes = [created.pop(row, None) for row in rows]
+        except Exception:
+            cur.execute("ROLLBACK TO SAVEPOINT bulk_disciplines")
+            outcomes = []
+            for name, code in rows:
+                cur.execute("SAVEPOINT discipline_row")
+                try:
+                    cur.execute("""
+                        INSERT INTO ref_disciplines (sport_act_id, discipline_code, discipline_name)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT DO NOTHING
+                        RETURNING id, discipline_name, discipline_code
+                    """, (payload.sport_act_id, code, name))
+                    row = cur.fetchone()
+                    outcomes.append(dict(row) if row else None)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT discipline_row")
+                    outcomes.append(e)
+
+        # Для пропущенных из-за конфликта — существующие записи, одним запросом
+        conflicts = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        existing = {}
+        if conflicts:
+            cur.execute("""
+                SELECT DISTINCT ON (v.ord) v.ord, d.id, d.discipline_name, d.discipline_code
+                FROM unnest(%s::text[], %s::text[], %s::int[]) AS v(name, code, ord)
+                JOIN ref_disciplines d
+                  ON d.sport_act_id = %s
+                 AND (d.discipline_name = v.name OR d.discipline_code = v.code)
+                ORDER BY v.ord, d.id
+            """, (
+                [rows[i][0] for i in conflicts], [rows[i][1] for i in conflicts], conflicts,
+                payload.sport_act_id,
+            ))
+            existing = {r["ord"]: r for r in cur.fetchall()}
+
+        for i, ((name, code), outcome) in enumerate(zip(rows, outcomes)):
+            if isinstance(outcome, Exception):
+                errors.append({"discipline_name": name, "discipline_code": code, "error": str(outcome)})
+            elif outcome is not None:
+                inserted.append(outcome)
+            elif i in existing:
+                row = existing[i]
+                inserted.append({
+                    "id": row["id"],
+                    "discipline_name": row["discipline_name"],
+                    "discipline_code": row["discipline_code"],
+                    "note": "already exists",
+                })
+            else:
+                errors.append({
+                    "discipline_name": name,
+                    "discipline_code": code,
+                    "error": "unique constraint violated but record not found"
+                })
+
+        if inserted:
+            publish_catalog_change(cur, ["ref_disciplines"], sport_id_for_act(cur, payload.sport_act_id))
+        conn.commit()
+        cur.close()
+    return {"inserted": inserted, "errors": errors}
+
+
+@app.post("/parameter-types")
+def add_parameter_type(payload: ParameterTypeIn):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO ref_parameters_types (type_name) VALUES (%s) RETURNING id",
+                (payload.short_name.strip(),)
+            )
+            row = cur.fetchone()
+            nid = row["id"]
+            publish_catalog_change(cur, ["ref_parameters_types"])
+            conn.commit()
+        except Exception as e:
+            if "unique" in str(e).lower():
+                conn.rollback()
+                cur.execute(
+                    "SELECT id FROM ref_parameters_types WHERE type_name = %s",
+                    (payload.short_name.strip(),)
+                )
+                row = cur.fetchone()
+                nid = row["id"] if row else None
+            else:
+                nid = None
+    return {"id": nid, "type_name": payload.short_name}
+
+
+@app.post("/parameters")
+def add_parameter(payload: ParameterIn):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM ref_parameters_types WHERE id = %s", (payload.parameter_type_id,))
+        if not cur.fetchone():
+            raise HTTPException(
+                status_code=400,
+                detail=f"parameter_type_id {payload.parameter_type_id} not found"
+            )
+        try:
+            cur.execute(
+                "INSERT INTO ref_parameters (parameter_type_id, parameter_value) VALUES (%s, %s) RETURNING id",
+                (payload.parameter_type_id, payload.parameter_value.strip())
+            )
+            row = cur.fetchone()
+            pid = row["id"]
+            publish_catalog_change(cur, ["ref_parameters"])
+            conn.commit()
+        except Exception as e:
+            if "unique" in str(e).lower():
+                conn.rollback()
+                cur.execute(
+                    "SELECT id FROM ref_parameters WHERE parameter_type_id = %s AND parameter_value = %s",
+                    (payload.parameter_type_id, payload.parameter_value.strip())
+                )
+                row = cur.fetchone()
+                pid = row["id"] if row else None
+            else:
+                pid = None
+    return {"id": pid, "parameter_value": payload.parameter_value, "parameter_type_id": payload.parameter_type_id}
+
+
+@app.post("/requirements")
+def add_requirement(payload: RequirementIn):
+    """
+    ИСПРАВЛЕН БАГ: в оригинале fallback при UniqueViolation использовал
+    payload.parameter_type_id / payload.parameter_value (поля от ParameterIn).
+    Теперь корректно использует payload.requirement_type_id / payload.requirement_value.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM ref_requirements_types WHERE id = %s", (payload.requirement_type_id,))
+        if not cur.fetchone():
             raise HTTPException(
                 status_code=400,
-                detail=f"ldp_id {ldp_id} does not belong to discipline_id {payload.discipline_id}"
+                detail=f"requirement_type_id {payload.requirement_type_id} not found"
             )
+        try:
+            cur.execute(
+                """
+                INSERT INTO ref_requirements (requirement_type_id, requirement_value, description)
+                VALUES (%s, %s, %s)
+                RETURNING id
+                """,
+                (
+                    payload.requirement_type_id,
+                    payload.requirement_value.strip(),
+                    payload.description.strip() if payload.description else None
+                )
+            )
+            row = cur.fetchone()
+            pid = row["id"]
+            publish_catalog_change(cur, ["ref_requirements"])
+            conn.commit()
+        except Exception as e:
+            if "unique" in str(e).lower():
+                conn.rollback()
+                # ИСПРАВЛЕНО: используем правильные поля модели RequirementIn
+                cur.execute(
+                    "SELECT id FROM ref_requirements WHERE requirement_type_id = %s AND requirement_value = %s",
+                    (payload.requirement_type_id, payload.requirement_value.strip())
+                )
+                row = cur.fetchone()
+                pid = row["id"] if row else None
+            else:
+                pid = None
+    return {
+        "id": pid,
+        "requirement_value": payload.requirement_value,
+        "requirement_type_id": payload.requirement_type_id
+    }
+
+
+@app.post("/link-parameters")
+def link_parameters(payload: LinkParametersIn):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM ref_disciplines WHERE id = %s", (payload.discipline_id,))
+        if not cur.fetchone():
+            raise HTTPException(status_code=400, detail=f"discipline_id {payload.discipline_id} not found")
+
+        requested = list(dict.fromkeys(payload.parameter_ids))
+        cur.execute("SELECT id FROM ref_parameters WHERE id = ANY(%s)", (requested,))
+        known = {row["id"] for row in cur.fetchall()}
+        to_link = [pid for pid in requested if pid in known]
+
+        # Связи вставляются одним запросом; уже существующие ON CONFLICT пропускает,
+        # их id дочитываем отдельно
+        cur.execute("""
+            INSERT INTO lnk_discipline_parameters (discipline_id, parameter_id)
+            SELECT %s, parameter_id FROM unnest(%s::int[]) WITH ORDINALITY AS v(parameter_id, ord)
+            ORDER BY ord
+            ON CONFLICT DO NOTHING
+            RETURNING id, parameter_id
+        """, (payload.discipline_id, to_link))
+        new_ids = {row["parameter_id"]: row["id"] for row in cur.fetchall()}
+        link_ids = dict(new_ids)
+        if len(link_ids) < len(to_link):
+            cur.execute(
+                "SELECT id, parameter_id FROM lnk_discipline_parameters WHERE discipline_id = %s AND parameter_id = ANY(%s)",
+                (payload.discipline_id, [pid for pid in to_link if pid not in new_ids])
+            )
+            link_ids.update({row["parameter_id"]: row["id"] for row in cur.fetchall()})
+
+        inserted = []
+        errors = []
+        for pid in payload.parameter_ids:
+            if pid not in known:
+                errors.append({"parameter_id": pid, "error": "not found"})
+                continue
+            item = {"id": link_ids[pid], "discipline_id": payload.discipline_id, "parameter_id": pid}
+            if new_ids.pop(pid, None) is None:
+                item["note"] = "already exists"
+            inserted.append(item)
+        sport_id = sport_id_for_discipline(cur, payload.discipline_id)
+        refresh_normatives_documents(cur, sport_id)
+        publish_catalog_change(cur, ["lnk_discipline_parameters"], sport_id)
+        conn.commit()
+    return {"inserted": inserted, "errors": errors}
+
+
+# =============================================================================
+# POST — создание норматива
+# =============================================================================
+
+@app.post("/normatives")
+def add_normatives(payload: CreateNormativeIn):
+    """
+    Создаёт нормативы для нескольких разрядов за один вызов.
 
-    # Валидация requirement_id
-    cur.execute("SELECT id FROM ref_requirements WHERE id = %s", (payload.requirement_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail=f"requirement_id {payload.requirement_id} not found")
+    Логика дедупликации для каждого rank_entry:
+      - Ищем норматив с тем же rank_id И точно тем же набором ldp_ids
+        (индекс по normatives.ldp_signature, один запрос на все разряды).
+      - Не найден → создаём normative + groups + condition → попадает в created[].
+      - Найден, условие новое → добавляем только condition → попадает в updated_existing[].
+      - Найден, условие уже есть → тихий пропуск → попадает в skipped_conflicts[].
 
-    # Валидация requirement_id для дополнительных условий
-    for add_req in payload.additional_requirements:
-        cur.execute("SELECT id FROM ref_requirements WHERE id = %s", (add_req.requirement_id,))
-        if not cur.fetchone():
-            conn.close()
-            raise HTTPException(
-                status_code=400,
-                detail=f"additional requirement_id {add_req.requirement_id} not found"
-            )
+    Дополнительные условия (additional_requirements) записываются в таблицу conditions
+    с parent_id = id основного условия этого rank_entry.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
 
-    sorted_ldp_ids = sorted(payload.ldp_ids)
-    ldp_count = len(sorted_ldp_ids)
+        # Валидация discipline_id
+        cur.execute("SELECT id FROM ref_disciplines WHERE id = %s", (payload.discipline_id,))
+        if not cur.fetchone():
+            raise HTTPException(status_code=400, detail=f"discipline_id {payload.discipline_id} not found")
 
-    created = []
-    used_existing = []
-    skipped = []
+        # Валидация ldp_ids — все должны принадлежать указанной дисциплине
+        cur.execute(
+            "SELECT id, discipline_id FROM lnk_discipline_parameters WHERE id = ANY(%s)",
+            (payload.ldp_ids,)
+        )
+        ldp_disciplines = {row["id"]: row["discipline_id"] for row in cur.fetchall()}
+        for ldp_id in payload.ldp_ids:
+            if ldp_id not in ldp_disciplines:
+                raise HTTPException(status_code=400, detail=f"ldp_id {ldp_id} not found")
+            if ldp_disciplines[ldp_id] != payload.discipline_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"ldp_id {ldp_id} does not belong to discipline_id {payload.discipline_id}"
+                )
 
-    try:
-        for entry in payload.rank_entries:
-            # Пропускаем пустые значения
-            if not entry.condition_value:
-                continue
+        # Валидация requirement_id (основного и дополнительных условий) — одним запросом
+        additional_ids = [add_req.requirement_id for add_req in payload.additional_requirements]
+        cur.execute(
+            "SELECT id FROM ref_requirements WHERE id = ANY(%s)",
+            ([payload.requirement_id] + additional_ids,)
+        )
+        requirement_ids = {row["id"] for row in cur.fetchall()}
+        if payload.requirement_id not in requirement_ids:
+            raise HTTPException(status_code=400, detail=f"requirement_id {payload.requirement_id} not found")
+        for requirement_id in additional_ids:
+            if requirement_id not in requirement_ids:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"additional requirement_id {requirement_id} not found"
+                )
 
-            # Ищем норматив с тем же rank_id и точно тем же набором ldp_ids
-            cur.execute("""
-                SELECT n.id
-                FROM normatives n
-                JOIN groups g ON g.normative_id = n.id
-                WHERE n.rank_id = %s
-                GROUP BY n.id
-                HAVING COUNT(DISTINCT g.discipline_parameter_id) = %s
-                   AND array_agg(DISTINCT g.discipline_parameter_id ORDER BY g.discipline_parameter_id) = %s
-                LIMIT 1
-            """, (entry.rank_id, ldp_count, sorted_ldp_ids))
+        signature = sorted(set(payload.ldp_ids))
+        # Пропускаем пустые значения
+        entries = [entry for entry in payload.rank_entries if entry.condition_value]
 
-            existing = cur.fetchone()
+        created = []
+        used_existing = []
+        skipped = []
 
-            if existing:
-                normative_id = existing["id"]
+        try:
+            # Нормативы с тем же rank_id и точно тем же набором ldp_ids — для всех разрядов сразу
+            find_query = FIND_NORMATIVES_BY_SIGNATURE if schema_ready(cur) else FIND_NORMATIVES_BY_GROUPS
+            cur.execute(find_query, (list({e.rank_id for e in entries}), signature))
+            normative_by_rank = {row["rank_id"]: row["id"] for row in cur.fetchall()}
 
-                # Проверяем дубль условия
+            # Основные условия, которые у этих нормативов уже есть
+            cur.execute("""
+                SELECT normative_id, condition
+                FROM conditions
+                WHERE normative_id = ANY(%s)
+                  AND requirement_id = %s
+                  AND condition = ANY(%s)
+            """, (list(normative_by_rank.values()), payload.requirement_id, [e.condition_value for e in entries]))
+            existing_conditions = {(row["normative_id"], row["condition"]) for row in cur.fetchall()}
+
+            # Новые нормативы для разрядов без совпадения; groups — одной вставкой
+            # (ldp_signature проставит триггер на groups)
+            new_ranks = [r for r in dict.fromkeys(e.rank_id for e in entries) if r not in normative_by_rank]
+            fresh = set()
+            if new_ranks:
+                cur.execute(
+                    "INSERT INTO normatives (rank_id) SELECT unnest(%s::int[]) RETURNING id, rank_id",
+                    (new_ranks,)
+                )
+                for row in cur.fetchall():
+                    normative_by_rank[row["rank_id"]] = row["id"]
+                    fresh.add(row["id"])
                 cur.execute("""
-                    SELECT id FROM conditions
-                    WHERE normative_id = %s
-                      AND requirement_id = %s
-                      AND condition = %s
-                    LIMIT 1
-                """, (normative_id, payload.requirement_id, entry.condition_value))
-
-                if cur.fetchone():
+                    INSERT INTO groups (discipline_parameter_id, normative_id)
+                    SELECT ldp_id, normative_id
+                    FROM unnest(%s::int[]) AS ldp_id
+                    CROSS JOIN unnest(%s::int[]) AS normative_id
+                """, (signature, list(fresh)))
+
+            # Разбор по rank_entries в исходном порядке: повтор условия — пропуск,
+            # первое условие нового норматива — created, остальные — updated_existing
+            planned = []
+            for entry in entries:
+                normative_id = normative_by_rank[entry.rank_id]
+                if (normative_id, entry.condition_value) in existing_conditions:
                     skipped.append({
                         "rank_id": entry.rank_id,
                         "normative_id": normative_id,
                         "reason": "condition already exists"
                     })
                     continue
+                existing_conditions.add((normative_id, entry.condition_value))
+                planned.append((entry, normative_id, normative_id in fresh))
+                fresh.discard(normative_id)
 
-                # Добавляем новое условие к существующему нормативу
+            if planned:
                 cur.execute("""
                     INSERT INTO conditions (normative_id, requirement_id, condition, parent_id)
-                    VALUES (%s, %s, %s, NULL)
-                    RETURNING id
-                """, (normative_id, payload.requirement_id, entry.condition_value))
-                condition_id = cur.fetchone()["id"]
-
-                # Дополнительные условия (дочерние через parent_id)
-                for add_req in payload.additional_requirements:
+                    SELECT v.normative_id, %s, v.condition, NULL
+                    FROM unnest(%s::int[], %s::text[]) AS v(normative_id, condition)
+                    RETURNING id, normative_id, condition
+                """, (
+                    payload.requirement_id,
+                    [normative_id for _, normative_id, _ in planned],
+                    [entry.condition_value for entry, _, _ in planned],
+                ))
+                condition_ids = {(row["normative_id"], row["condition"]): row["id"] for row in cur.fetchall()}
+
+                # Дополнительные условия (дочерние через parent_id) — для всех основных сразу
+                child_ids = []
+                if payload.additional_requirements:
                     cur.execute("""
                         INSERT INTO conditions (normative_id, requirement_id, condition, parent_id)
-                        VALUES (%s, %s, %s, %s)
-                    """, (normative_id, add_req.requirement_id, add_req.value, condition_id))
+                        SELECT v.normative_id, a.requirement_id, a.value, v.parent_id
+                        FROM unnest(%s::int[], %s::int[]) AS v(normative_id, parent_id)
+                        CROSS JOIN unnest(%s::int[], %s::text[]) WITH ORDINALITY AS a(requirement_id, value, ord)
+                        ORDER BY v.parent_id, a.ord
+                        RETURNING id
+                    """, (
+                        [normative_id for _, normative_id, _ in planned],
+                        [condition_ids[(normative_id, entry.condition_value)] for entry, normative_id, _ in planned],
+                        [a.requirement_id for a in payload.additional_requirements],
+                        [a.value for a in payload.additional_requirements],
+                    ))
+                    child_ids = [row["id"] for row in cur.fetchall()]
+                normalize_conditions(cur, list(condition_ids.values()) + child_ids)
+
+                for entry, normative_id, is_new in planned:
+                    (created if is_new else used_existing).append({
+                        "rank_id": entry.rank_id,
+                        "normative_id": normative_id,
+                        "condition_id": condition_ids[(normative_id, entry.condition_value)]
+                    })
 
-                used_existing.append({
-                    "rank_id": entry.rank_id,
-                    "normative_id": normative_id,
-                    "condition_id": condition_id
-                })
+            if created or used_existing:
+                sport_id = sport_id_for_discipline(cur, payload.discipline_id)
+                refresh_normatives_documents(cur, sport_id)
+                publish_catalog_change(cur, ["normatives", "groups", "conditions"], sport_id)
+            conn.commit()
 
-            else:
-                # Создаём новый норматив
-                cur.execute(
-                    "INSERT INTO normatives (rank_id) VALUES (%s) RETURNING id",
-                    (entry.rank_id,)
-                )
-                normative_id = cur.fetchone()["id"]
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-                # Привязываем параметры через groups
-                for ldp_id in sorted_ldp_ids:
-                    cur.execute(
-                        "INSERT INTO groups (discipline_parameter_id, normative_id) VALUES (%s, %s)",
-                        (ldp_id, normative_id)
-                    )
+    return {
+        "created": created,
+        "updated_existing": used_existing,
+        "skipped_conflicts": skipped
+    }
 
-                # Основное условие
-                cur.execute("""
-                    INSERT INTO conditions (normative_id, requirement_id, condition, parent_id)
-                    VALUES (%s, %s, %s, NULL)
-                    RETURNING id
-                """, (normative_id, payload.requirement_id, entry.condition_value))
-                condition_id = cur.fetchone()["id"]
+# =============================================================================
+# POST — импорт акта Минспорта из таблицы (CSV/XLSX)
+# =============================================================================
+# Один файл — один акт. Строка таблицы — одно основное условие норматива:
+#
+#   discipline_code | discipline_name | parameters        | rank | requirement | condition | additional
+#   011001811Я      | бег 100 м       | Пол: Мужчины; ... | КМС  | Время       | 10.85     | Место: 1-3
+#
+# parameters — пары «тип параметра: значение» через «;», additional —
+# дополнительные условия «требование: значение» (необязательная колонка).
+# Строки копируются COPY во временную таблицу, справочники сопоставляются
+# запросами по всей таблице сразу, затем акт, дисциплины, связи с
+# параметрами, нормативы, groups и conditions дописываются в одной
+# транзакции. Существующее не меняется: совпавшие дисциплины (по коду),
+# нормативы (разряд + набор ldp) и условия переиспользуются или пропускаются,
+# как в POST /normatives. Пробный прогон (dry_run) делает то же самое и
+# откатывает транзакцию — отчёт о том, что добавится, точный.
+
+ACT_IMPORT_COLUMNS = [
+    "discipline_code", "discipline_name", "parameters", "rank", "requirement", "condition", "additional",
+]
+ACT_IMPORT_REQUIRED = ACT_IMPORT_COLUMNS[:-1]
 
-                # Дополнительные условия (дочерние через parent_id)
-                for add_req in payload.additional_requirements:
-                    cur.execute("""
-                        INSERT INTO conditions (normative_id, requirement_id, condition, parent_id)
-                        VALUES (%s, %s, %s, %s)
-                    """, (normative_id, add_req.requirement_id, add_req.value, condition_id))
+XLSX_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel",
+}
 
-                created.append({
-                    "rank_id": entry.rank_id,
-                    "normative_id": normative_id,
-                    "condition_id": condition_id
-                })
 
-        conn.commit()
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_act_table(data: bytes, fmt: str):
+    """Строки таблицы акта: (номер строки файла, *ACT_IMPORT_COLUMNS). ValueError — файл не разобран."""
+    if fmt == "xlsx":
+        if openpyxl is None:
+            raise ValueError("XLSX не поддерживается: не установлен openpyxl")
+        try:
+            sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True).active
+        except Exception as e:
+            raise ValueError(f"XLSX не прочитан: {e}")
+        rows = ([_cell_text(v) for v in row] for row in sheet.iter_rows(values_only=True))
+    elif fmt == "csv":
+        text = data.decode("utf-8-sig")
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = ([v.strip() for v in row] for row in csv.reader(io.StringIO(text), dialect))
+    else:
+        raise ValueError(f"неизвестный формат {fmt!r}: ожидается csv или xlsx")
+
+    header = [h.lower() for h in next(rows, [])]
+    missing = [c for c in ACT_IMPORT_REQUIRED if c not in header]
+    if missing:
+        raise ValueError(f"в заголовке нет колонок: {', '.join(missing)}")
+    positions = [header.index(c) if c in header else None for c in ACT_IMPORT_COLUMNS]
+
+    def lines():
+        for line, row in enumerate(rows, start=2):
+            values = [row[i] if i is not None and i < len(row) else "" for i in positions]
+            if any(values):
+                yield [line] + values
+
+    return lines()
+
+
+class _CsvReader:
+    """Файловый объект для COPY FROM STDIN: строки превращаются в CSV по мере чтения."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def resolve_import_act(cur, act_id: Optional[int], sport_id: Optional[int], act_details: Optional[str],
+                       start_date: Optional[date], end_date: Optional[date]) -> dict:
+    """
+    Акт, в который идёт импорт: act_id, либо акт вида спорта sport_id с тем же
+    act_details (даты обновляются), либо новый акт. ValueError — не найден.
+    """
+    if act_id is not None:
+        cur.execute("SELECT id, sport_id FROM sport_ministry_act WHERE id = %s", (act_id,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError(f"act_id {act_id} not found")
+        return {"id": row["id"], "sport_id": row["sport_id"], "status": "existing"}
+
+    if sport_id is None or not act_details:
+        raise ValueError("нужен act_id или sport_id вместе с act_details")
+    cur.execute("SELECT id FROM ref_sports WHERE id = %s", (sport_id,))
+    if not cur.fetchone():
+        raise ValueError(f"sport_id {sport_id} not found")
+
+    cur.execute("""
+        UPDATE sport_ministry_act
+        SET start_date = COALESCE(%s, start_date), end_date = COALESCE(%s, end_date)
+        WHERE id = (
+            SELECT id FROM sport_ministry_act
+            WHERE sport_id = %s AND act_details = %s
+            ORDER BY id DESC LIMIT 1
+        )
+        RETURNING id
+    """, (start_date, end_date, sport_id, act_details))
+    row = cur.fetchone()
+    if row:
+        return {"id": row["id"], "sport_id": sport_id, "status": "existing"}
+    cur.execute("""
+        INSERT INTO sport_ministry_act (sport_id, start_date, end_date, act_details)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+    """, (sport_id, start_date, end_date, act_details))
+    return {"id": cur.fetchone()["id"], "sport_id": sport_id, "status": "created"}
+
+
+# Ошибки сопоставления строк со справочниками — один запрос по всем строкам
+ACT_IMPORT_ERRORS_QUERY = """
+    SELECT line, error FROM (
+        SELECT line, 'не заполнено: ' || array_to_string(ARRAY[
+                   CASE WHEN code = '' THEN 'discipline_code' END,
+                   CASE WHEN name = '' THEN 'discipline_name' END,
+                   CASE WHEN rank = '' THEN 'rank' END,
+                   CASE WHEN requirement = '' THEN 'requirement' END,
+                   CASE WHEN condition = '' THEN 'condition' END], ', ') AS error
+        FROM import_lines
+        WHERE '' IN (code, name, rank, requirement, condition)
+        UNION ALL
+        SELECT line, 'разряд «' || rank || '» ' || CASE WHEN rank_count = 0 THEN 'не найден' ELSE 'неоднозначен' END
+        FROM import_lines WHERE rank <> '' AND rank_count <> 1
+        UNION ALL
+        SELECT line, 'требование «' || requirement || '» ' || CASE WHEN requirement_count = 0 THEN 'не найдено' ELSE 'неоднозначно' END
+        FROM import_lines WHERE requirement <> '' AND requirement_count <> 1
+        UNION ALL
+        SELECT l.line, 'нет ни одного параметра'
+        FROM import_lines l
+        WHERE NOT EXISTS (SELECT 1 FROM import_pairs p WHERE p.line = l.line AND p.kind = 'parameter')
+        UNION ALL
+        SELECT line, CASE
+                   WHEN NOT has_colon THEN '«' || item || '»: ожидается «название: значение»'
+                   WHEN kind = 'parameter' AND ref_count = 0 THEN 'параметр «' || item || '» не найден'
+                   WHEN kind = 'parameter' THEN 'параметр «' || item || '» неоднозначен'
+                   WHEN ref_count = 0 THEN 'требование «' || name || '» не найдено'
+                   ELSE 'требование «' || name || '» неоднозначно'
+               END
+        FROM import_pairs
+        WHERE NOT has_colon OR ref_count <> 1
+        UNION ALL
+        SELECT l.line, 'код ' || l.code || ' уже встречается с названием «' || f.name || '»'
+        FROM import_lines l
+        JOIN LATERAL (
+            SELECT name FROM import_lines f WHERE f.code = l.code ORDER BY f.line LIMIT 1
+        ) f ON f.name <> l.name
+        WHERE l.code <> ''
+    ) e
+    ORDER BY line, error
+"""
+
+
+def import_act_rows(cur, act: dict, rows) -> dict:
+    """
+    Дописывает строки таблицы в акт act (см. resolve_import_act) на курсоре cur.
+    Возвращает отчёт; при непустом errors ничего не записано, и вызывающий
+    откатывает транзакцию. Фиксирует (или откатывает) транзакцию вызывающий.
+    """
+    report = {
+        "act": act,
+        "rows": 0,
+        "disciplines": {"created": [], "existing": 0},
+        "discipline_parameters": {"created": 0},
+        "normatives": {"created": 0, "existing": 0},
+        "conditions": {"created": 0, "skipped": 0, "additional": 0},
+        "errors": [],
+    }
+    # Импорты одного и того же акта не должны дописывать нормативы параллельно
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('sportnormativ_import'))")
+
+    cur.execute("""
+        CREATE TEMP TABLE import_rows (
+            line integer, discipline_code text, discipline_name text, parameters text,
+            rank text, requirement text, condition text, additional text
+        ) ON COMMIT DROP
+    """)
+    cur.copy_expert("COPY import_rows FROM STDIN WITH (FORMAT csv)", _CsvReader(rows))
+
+    # Строки со ссылками на справочники; *_count — сколько записей подошло
+    cur.execute("""
+        CREATE TEMP TABLE import_lines ON COMMIT DROP AS
+        SELECT r.line,
+               coalesce(r.discipline_code, '') AS code, coalesce(r.discipline_name, '') AS name,
+               coalesce(r.rank, '') AS rank, coalesce(r.requirement, '') AS requirement,
+               coalesce(r.condition, '') AS condition,
+               rr.id AS rank_id, rr.n AS rank_count,
+               rq.id AS requirement_id, rq.n AS requirement_count
+        FROM import_rows r
+        CROSS JOIN LATERAL (
+            SELECT min(id) AS id, count(*) AS n FROM ref_ranks
+            WHERE lower(short_name) = lower(r.rank)
+        ) rr
+        CROSS JOIN LATERAL (
+            SELECT min(id) AS id, count(*) AS n FROM ref_requirements
+            WHERE lower(requirement_value) = lower(r.requirement)
+        ) rq
+    """)
+    # Пары «название: значение» из parameters (→ ref_parameters) и additional (→ ref_requirements)
+    cur.execute("""
+        CREATE TEMP TABLE import_pairs ON COMMIT DROP AS
+        SELECT p.line, p.kind, p.ord, p.item, p.has_colon, p.name, p.value,
+               CASE p.kind WHEN 'parameter' THEN prm.id ELSE req.id END AS ref_id,
+               CASE p.kind WHEN 'parameter' THEN prm.n ELSE req.n END AS ref_count
+        FROM (
+            SELECT r.line, k.kind, i.ord, btrim(i.item) AS item,
+                   strpos(i.item, ':') > 0 AS has_colon,
+                   btrim(split_part(i.item, ':', 1)) AS name,
+                   btrim(substr(i.item, strpos(i.item, ':') + 1)) AS value
+            FROM import_rows r
+            CROSS JOIN LATERAL (VALUES ('parameter', r.parameters), ('additional', r.additional)) AS k(kind, list)
+            CROSS JOIN LATERAL unnest(string_to_array(k.list, ';')) WITH ORDINALITY AS i(item, ord)
+            WHERE btrim(i.item) <> ''
+        ) p
+        CROSS JOIN LATERAL (
+            SELECT min(rp.id) AS id, count(*) AS n
+            FROM ref_parameters rp
+            JOIN ref_parameters_types t ON t.id = rp.parameter_type_id
+            WHERE p.kind = 'parameter'
+              AND lower(t.type_name) = lower(p.name) AND lower(rp.parameter_value) = lower(p.value)
+        ) prm
+        CROSS JOIN LATERAL (
+            SELECT min(id) AS id, count(*) AS n FROM ref_requirements
+            WHERE p.kind = 'additional' AND lower(requirement_value) = lower(p.name)
+        ) req
+    """)
+    cur.execute("SELECT count(*) AS n FROM import_lines")
+    report["rows"] = cur.fetchone()["n"]
+    cur.execute(ACT_IMPORT_ERRORS_QUERY)
+    report["errors"] = [dict(r) for r in cur.fetchall()]
+    if report["errors"]:
+        return report
+
+    # Дисциплины акта — по коду; новые вставляются одним запросом
+    cur.execute("""
+        INSERT INTO ref_disciplines (sport_act_id, discipline_code, discipline_name)
+        SELECT %s, code, name
+        FROM (SELECT DISTINCT ON (code) code, name, line FROM import_lines ORDER BY code, line) d
+        ORDER BY line
+        ON CONFLICT DO NOTHING
+        RETURNING discipline_code, discipline_name
+    """, (act["id"],))
+    report["disciplines"]["created"] = [
+        {"discipline_code": r["discipline_code"], "discipline_name": r["discipline_name"]} for r in cur.fetchall()
+    ]
+    cur.execute("""
+        CREATE TEMP TABLE import_disciplines ON COMMIT DROP AS
+        SELECT d.id, d.discipline_code AS code
+        FROM ref_disciplines d
+        WHERE d.sport_act_id = %s AND d.discipline_code IN (SELECT code FROM import_lines)
+    """, (act["id"],))
+    cur.execute("""
+        SELECT min(l.line) AS line, 'название «' || l.name || '» уже занято дисциплиной акта с другим кодом' AS error
+        FROM import_lines l
+        WHERE NOT EXISTS (SELECT 1 FROM import_disciplines d WHERE d.code = l.code)
+        GROUP BY l.name
+        ORDER BY 1
+    """)
+    report["errors"] = [dict(r) for r in cur.fetchall()]
+    if report["errors"]:
+        return report
+    cur.execute("SELECT count(*) AS n FROM import_disciplines")
+    report["disciplines"]["existing"] = cur.fetchone()["n"] - len(report["disciplines"]["created"])
+
+    # Связи дисциплина × параметр
+    cur.execute("""
+        INSERT INTO lnk_discipline_parameters (discipline_id, parameter_id)
+        SELECT DISTINCT d.id, p.ref_id
+        FROM import_lines l
+        JOIN import_disciplines d ON d.code = l.code
+        JOIN import_pairs p ON p.line = l.line AND p.kind = 'parameter'
+        ORDER BY 1, 2
+        ON CONFLICT DO NOTHING
+    """)
+    report["discipline_parameters"]["created"] = cur.rowcount
+
+    # Норматив строки — разряд + набор ldp (ldp_signature); недостающие
+    # получают id из последовательности заранее, чтобы groups вставить одним запросом
+    cur.execute("""
+        CREATE TEMP TABLE import_normatives ON COMMIT DROP AS
+        SELECT l.line, l.rank_id,
+               array_agg(DISTINCT ldp.id ORDER BY ldp.id) AS signature,
+               NULL::integer AS normative_id
+        FROM import_lines l
+        JOIN import_disciplines d ON d.code = l.code
+        JOIN import_pairs p ON p.line = l.line AND p.kind = 'parameter'
+        JOIN lnk_discipline_parameters ldp ON ldp.discipline_id = d.id AND ldp.parameter_id = p.ref_id
+        GROUP BY l.line, l.rank_id
+    """)
+    cur.execute("""
+        UPDATE import_normatives i
+        SET normative_id = n.id
+        FROM (
+            SELECT DISTINCT ON (rank_id, ldp_signature) rank_id, ldp_signature, id
+            FROM normatives
+            WHERE (rank_id, ldp_signature) IN (SELECT rank_id, signature FROM import_normatives)
+            ORDER BY rank_id, ldp_signature, id
+        ) n
+        WHERE n.rank_id = i.rank_id AND n.ldp_signature = i.signature
+    """)
+    cur.execute("""
+        CREATE TEMP TABLE import_new_normatives ON COMMIT DROP AS
+        SELECT nextval(pg_get_serial_sequence('normatives', 'id'))::integer AS id, rank_id, signature
+        FROM (
+            SELECT rank_id, signature, min(line) AS line
+            FROM import_normatives
+            WHERE normative_id IS NULL
+            GROUP BY rank_id, signature
+            ORDER BY line
+        ) s
+    """)
+    report["normatives"]["created"] = cur.rowcount
+    cur.execute("SELECT count(DISTINCT normative_id) AS n FROM import_normatives")
+    report["normatives"]["existing"] = cur.fetchone()["n"]
+    cur.execute("INSERT INTO normatives (id, rank_id) SELECT id, rank_id FROM import_new_normatives ORDER BY id")
+    cur.execute("""
+        INSERT INTO groups (discipline_parameter_id, normative_id)
+        SELECT unnest(signature), id FROM import_new_normatives ORDER BY id
+    """)
+    cur.execute("""
+        UPDATE import_normatives i
+        SET normative_id = n.id
+        FROM import_new_normatives n
+        WHERE i.normative_id IS NULL AND n.rank_id = i.rank_id AND n.signature = i.signature
+    """)
+
+    # Основные условия: уже существующие у норматива и повторы в файле пропускаются
+    cur.execute("""
+        CREATE TEMP TABLE import_conditions ON COMMIT DROP AS
+        SELECT nextval(pg_get_serial_sequence('conditions', 'id'))::integer AS id, c.*
+        FROM (
+            SELECT DISTINCT ON (i.normative_id, l.requirement_id, l.condition)
+                   l.line, i.normative_id, l.requirement_id, l.condition
+            FROM import_lines l
+            JOIN import_normatives i ON i.line = l.line
+            WHERE NOT EXISTS (
+                SELECT 1 FROM conditions c
+                WHERE c.normative_id = i.normative_id
+                  AND c.requirement_id = l.requirement_id
+                  AND c.condition = l.condition
+            )
+            ORDER BY i.normative_id, l.requirement_id, l.condition, l.line
+        ) c
+        ORDER BY c.line
+    """)
+    report["conditions"]["created"] = cur.rowcount
+    report["conditions"]["skipped"] = report["rows"] - cur.rowcount
+    cur.execute("""
+        INSERT INTO conditions (id, normative_id, requirement_id, condition, parent_id)
+        SELECT id, normative_id, requirement_id, condition, NULL
+        FROM import_conditions
+        ORDER BY id
+    """)
+    # Дополнительные условия (дочерние через parent_id)
+    cur.execute("""
+        INSERT INTO conditions (normative_id, requirement_id, condition, parent_id)
+        SELECT c.normative_id, p.ref_id, p.value, c.id
+        FROM import_conditions c
+        JOIN import_pairs p ON p.line = c.line AND p.kind = 'additional'
+        ORDER BY c.id, p.ord
+    """)
+    report["conditions"]["additional"] = cur.rowcount
+    cur.execute("""
+        SELECT id FROM import_conditions
+        UNION ALL
+        SELECT id FROM conditions WHERE parent_id IN (SELECT id FROM import_conditions)
+    """)
+    normalize_conditions(cur, [row["id"] for row in cur.fetchall()])
+    return report
+
+
+def run_act_import(data: bytes, fmt: str, act_id: Optional[int] = None, sport_id: Optional[int] = None,
+                   act_details: Optional[str] = None, start_date: Optional[date] = None,
+                   end_date: Optional[date] = None, confirm: Callable[[dict], bool] = lambda report: False) -> dict:
+    """
+    Импорт акта в одной транзакции. Изменения фиксируются, только если ошибок
+    нет и confirm(отчёт) вернул True; иначе транзакция откатывается (пробный прогон).
+    ValueError — файл или акт не найдены/не разобраны.
+    """
+    if not schema_ready():
+        raise RuntimeError("служебная схема не создана (нужны normatives.ldp_signature и триггеры groups), "
+                           "сначала: python app.py migrate")
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            act = resolve_import_act(cur, act_id, sport_id, act_details, start_date, end_date)
+            report = import_act_rows(cur, act, read_act_table(data, fmt))
+            report["applied"] = not report["errors"] and confirm(report)
+            if report["applied"]:
+                refresh_normatives_documents(cur, act["sport_id"])
+                publish_catalog_change(
+                    cur,
+                    ["sport_ministry_act", "ref_disciplines", "lnk_discipline_parameters",
+                     "normatives", "groups", "conditions"],
+                    act["sport_id"]
+                )
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            conn.rollback()
+            raise
+    return report
+
+
+@app.post("/acts/import")
+async def import_act(
+    request: Request,
+    sport_id: Optional[int] = Query(None),
+    act_id: Optional[int] = Query(None),
+    act_details: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    format: Optional[str] = Query(None, description="csv | xlsx; по умолчанию — по Content-Type"),
+    dry_run: bool = Query(True, description="только отчёт: транзакция откатывается"),
+):
+    """
+    Импортирует акт Минспорта из таблицы в теле запроса (CSV или XLSX, формат —
+    см. раздел выше). По умолчанию пробный прогон: возвращает отчёт о том, что
+    будет добавлено. С dry_run=false изменения записываются, если нет ошибок.
 
+        curl --data-binary @act.xlsx \\
+             -H 'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' \\
+             'http://localhost:8000/acts/import?sport_id=1&act_details=Приказ%20№1&dry_run=false'
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = format or ("xlsx" if content_type in XLSX_CONTENT_TYPES else "csv")
+    data = await request.body()
+    try:
+        report = await run_in_threadpool(
+            run_act_import, data, fmt, act_id, sport_id, act_details, start_date, end_date,
+            confirm=lambda report: not dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        conn.rollback()
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if report["errors"]:
+        raise HTTPException(status_code=400, detail=report)
+    return report
+
+
+def import_act_cli(argv: List[str]) -> int:
+    """python app.py import-act FILE ... — печатает отчёт пробного прогона и спрашивает подтверждение."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="app.py import-act", description="Импорт акта Минспорта из CSV/XLSX")
+    parser.add_argument("file")
+    parser.add_argument("--act-id", type=int)
+    parser.add_argument("--sport-id", type=int)
+    parser.add_argument("--act-details")
+    parser.add_argument("--start-date", type=date.fromisoformat)
+    parser.add_argument("--end-date", type=date.fromisoformat)
+    parser.add_argument("--format", choices=["csv", "xlsx"])
+    parser.add_argument("--yes", action="store_true", help="применить без вопроса")
+    args = parser.parse_args(argv)
+
+    def confirm(report: dict) -> bool:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        if args.yes:
+            return True
+        return input("Применить изменения? [y/N] ").strip().lower() in ("y", "yes", "д", "да")
+
+    with open(args.file, "rb") as f:
+        data = f.read()
+    fmt = args.format or ("xlsx" if args.file.lower().endswith((".xlsx", ".xlsm")) else "csv")
+    open_pool()
+    try:
+        report = run_act_import(data, fmt, args.act_id, args.sport_id, args.act_details,
+                                args.start_date, args.end_date, confirm=confirm)
+    except (ValueError, RuntimeError) as e:
+        print(f"ошибка: {e}", file=sys.stderr)
+        return 2
+    finally:
+        close_pool()
+    if report["errors"]:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        return 1
+    print("изменения записаны" if report["applied"] else "изменения не записаны")
+    return 0
 
-    conn.close()
-    return {
-        "created": created,
-        "updated_existing": used_existing,
-        "skipped_conflicts": skipped
-    }
+
+# =============================================================================
+# POST — новый акт Минспорта копией действующего
+# =============================================================================
+# Новый акт обычно меняет несколько нормативов, остальное переносится как
+# есть. Копирование целиком внутри Postgres: для каждой таблицы id новых
+# строк заранее берутся из её последовательности во временную таблицу
+# соответствия (старый id → новый), и строки копируются одним
+# INSERT ... SELECT, в котором ссылки переводятся через эти соответствия.
+# ldp_signature новых нормативов проставляет триггер на groups.
+
+@app.post("/acts/{act_id}/clone")
+def clone_act(act_id: int, payload: ActCloneIn):
+    """
+    Создаёт акт с датой начала start_date и копирует в него дисциплины, связи
+    с параметрами, нормативы, groups и conditions (с деревьями parent_id) акта
+    act_id. Действующий акт вида спорта (не обязательно act_id — копировать
+    можно и истёкший) закрывается днём раньше start_date: действующий акт у
+    вида спорта всегда один.
+    """
+    start_date = payload.start_date or date.today()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        # разобранные значения условий копируются, если колонки есть (см. parse_condition)
+        parsed_columns = ", condition_numeric, condition_unit, condition_direction" if schema_ready(cur) else ""
+        try:
+            cur.execute(
+                "SELECT id, sport_id, start_date, end_date FROM sport_ministry_act WHERE id = %s FOR UPDATE",
+                (act_id,)
+            )
+            old = cur.fetchone()
+            if not old:
+                raise HTTPException(status_code=404, detail=f"act_id {act_id} not found")
+            cur.execute(
+                "SELECT id, start_date FROM sport_ministry_act WHERE sport_id = %s AND end_date IS NULL FOR UPDATE",
+                (old["sport_id"],)
+            )
+            for active in cur.fetchall():
+                if active["start_date"] is not None and active["start_date"] >= start_date:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"start_date must be after the start of act {active['id']} ({active['start_date']})"
+                    )
+            cur.execute(
+                "UPDATE sport_ministry_act SET end_date = %s::date - 1 WHERE sport_id = %s AND end_date IS NULL",
+                (start_date, old["sport_id"])
+            )
+
+            cur.execute("""
+                INSERT INTO sport_ministry_act (sport_id, start_date, end_date, act_details)
+                VALUES (%s, %s, NULL, %s)
+                RETURNING id
+            """, (old["sport_id"], start_date, payload.act_details))
+            new_act_id = cur.fetchone()["id"]
+
+            # Соответствия старых id новым
+            cur.execute("""
+                CREATE TEMP TABLE clone_disciplines ON COMMIT DROP AS
+                SELECT id AS old_id, nextval(pg_get_serial_sequence('ref_disciplines', 'id'))::integer AS new_id
+                FROM ref_disciplines
+                WHERE sport_act_id = %s
+            """, (act_id,))
+            cur.execute("""
+                CREATE TEMP TABLE clone_ldp ON COMMIT DROP AS
+                SELECT ldp.id AS old_id,
+                       nextval(pg_get_serial_sequence('lnk_discipline_parameters', 'id'))::integer AS new_id
+                FROM lnk_discipline_parameters ldp
+                JOIN clone_disciplines d ON d.old_id = ldp.discipline_id
+            """)
+            cur.execute("""
+                CREATE TEMP TABLE clone_normatives ON COMMIT DROP AS
+                SELECT old_id, nextval(pg_get_serial_sequence('normatives', 'id'))::integer AS new_id
+                FROM (
+                    SELECT DISTINCT g.normative_id AS old_id
+                    FROM groups g
+                    JOIN clone_ldp l ON l.old_id = g.discipline_parameter_id
+                    ORDER BY 1
+                ) n
+            """)
+            cur.execute("""
+                CREATE TEMP TABLE clone_conditions ON COMMIT DROP AS
+                SELECT c.id AS old_id, nextval(pg_get_serial_sequence('conditions', 'id'))::integer AS new_id
+                FROM conditions c
+                JOIN clone_normatives n ON n.old_id = c.normative_id
+            """)
+
+            # Копии строк
+            cur.execute("""
+                INSERT INTO ref_disciplines (id, sport_act_id, discipline_code, discipline_name)
+                SELECT m.new_id, %s, d.discipline_code, d.discipline_name
+                FROM ref_disciplines d
+                JOIN clone_disciplines m ON m.old_id = d.id
+                ORDER BY m.new_id
+            """, (new_act_id,))
+            counts = {"disciplines": cur.rowcount}
+            cur.execute("""
+                INSERT INTO lnk_discipline_parameters (id, discipline_id, parameter_id)
+                SELECT m.new_id, d.new_id, ldp.parameter_id
+                FROM lnk_discipline_parameters ldp
+                JOIN clone_ldp m ON m.old_id = ldp.id
+                JOIN clone_disciplines d ON d.old_id = ldp.discipline_id
+                ORDER BY m.new_id
+            """)
+            counts["discipline_parameters"] = cur.rowcount
+            cur.execute("""
+                INSERT INTO normatives (id, rank_id)
+                SELECT m.new_id, n.rank_id
+                FROM normatives n
+                JOIN clone_normatives m ON m.old_id = n.id
+                ORDER BY m.new_id
+            """)
+            counts["normatives"] = cur.rowcount
+            cur.execute("""
+                INSERT INTO groups (discipline_parameter_id, normative_id)
+                SELECT l.new_id, n.new_id
+                FROM groups g
+                JOIN clone_ldp l ON l.old_id = g.discipline_parameter_id
+                JOIN clone_normatives n ON n.old_id = g.normative_id
+                ORDER BY g.id
+            """)
+            counts["groups"] = cur.rowcount
+            # Родительские и дочерние условия — одним запросом: ссылка parent_id
+            # проверяется в конце оператора, когда вставлены обе строки
+            cur.execute(f"""
+                INSERT INTO conditions (id, normative_id, requirement_id, condition, parent_id{parsed_columns})
+                SELECT m.new_id, n.new_id, c.requirement_id, c.condition, p.new_id{parsed_columns.replace(", ", ", c.")}
+                FROM conditions c
+                JOIN clone_conditions m ON m.old_id = c.id
+                JOIN clone_normatives n ON n.old_id = c.normative_id
+                LEFT JOIN clone_conditions p ON p.old_id = c.parent_id
+                ORDER BY m.new_id
+            """)
+            counts["conditions"] = cur.rowcount
+
+            refresh_normatives_documents(cur, old["sport_id"])
+            publish_catalog_change(
+                cur,
+                ["sport_ministry_act", "ref_disciplines", "lnk_discipline_parameters",
+                 "normatives", "groups", "conditions"],
+                old["sport_id"]
+            )
+            conn.commit()
+        except HTTPException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    return {"act_id": new_act_id, "cloned_from": act_id, "sport_id": old["sport_id"], **counts}
 
 
 # =============================================================================
@@ -1418,143 +5297,149 @@ def add_normatives(payload: CreateNormativeIn):
 
 @app.delete("/normative/{normative_id}")
 def delete_normative(normative_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id FROM normatives WHERE id = %s", (normative_id,))
-        if not cur.fetchone():
-            return {"success": False, "error": f"Норматив с ID {normative_id} не найден", "normative_id": normative_id}
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT id FROM normatives WHERE id = %s", (normative_id,))
+            if not cur.fetchone():
+                return {"success": False, "error": f"Норматив с ID {normative_id} не найден", "normative_id": normative_id}
 
-        # Получаем информацию для ответа
-        cur.execute("""
-            SELECT rd.discipline_name, rr.short_name AS rank_short
-            FROM normatives n
-            JOIN groups g ON g.normative_id = n.id
-            JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
-            JOIN ref_disciplines rd ON rd.id = ldp.discipline_id
-            JOIN ref_ranks rr ON rr.id = n.rank_id
-            WHERE n.id = %s
-            LIMIT 1
-        """, (normative_id,))
-        info = cur.fetchone()
-        discipline_name = info["discipline_name"] if info else "Неизвестно"
-        rank_short = info["rank_short"] if info else "Неизвестно"
+            # Получаем информацию для ответа
+            cur.execute("""
+                SELECT rd.discipline_name, rr.short_name AS rank_short
+                FROM normatives n
+                JOIN groups g ON g.normative_id = n.id
+                JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+                JOIN ref_disciplines rd ON rd.id = ldp.discipline_id
+                JOIN ref_ranks rr ON rr.id = n.rank_id
+                WHERE n.id = %s
+                LIMIT 1
+            """, (normative_id,))
+            info = cur.fetchone()
+            discipline_name = info["discipline_name"] if info else "Неизвестно"
+            rank_short = info["rank_short"] if info else "Неизвестно"
+            sport_id = sport_id_for_normative(cur, normative_id)
 
-        # Порядок удаления: сначала дочерние conditions (по parent_id), затем корневые, затем groups, затем normative
-        cur.execute(
-            "DELETE FROM conditions WHERE normative_id = %s AND parent_id IS NOT NULL",
-            (normative_id,)
-        )
-        cur.execute(
-            "DELETE FROM conditions WHERE normative_id = %s",
-            (normative_id,)
-        )
-        conditions_deleted = cur.rowcount
+            # Порядок удаления: сначала дочерние conditions (по parent_id), затем корневые, затем groups, затем normative
+            cur.execute(
+                "DELETE FROM conditions WHERE normative_id = %s AND parent_id IS NOT NULL",
+                (normative_id,)
+            )
+            cur.execute(
+                "DELETE FROM conditions WHERE normative_id = %s",
+                (normative_id,)
+            )
+            conditions_deleted = cur.rowcount
 
-        cur.execute("DELETE FROM groups WHERE normative_id = %s", (normative_id,))
-        groups_deleted = cur.rowcount
+            cur.execute("DELETE FROM groups WHERE normative_id = %s", (normative_id,))
+            groups_deleted = cur.rowcount
 
-        cur.execute("DELETE FROM normatives WHERE id = %s", (normative_id,))
-        conn.commit()
+            cur.execute("DELETE FROM normatives WHERE id = %s", (normative_id,))
+            refresh_normatives_documents(cur, sport_id)
+            publish_catalog_change(cur, ["normatives", "groups", "conditions"], sport_id)
+            conn.commit()
 
-        return {
-            "success": True,
-            "message": "Норматив успешно удалён",
-            "normative_id": normative_id,
-            "details": {
-                "discipline": discipline_name,
-                "rank": rank_short,
-                "conditions_deleted": conditions_deleted,
-                "groups_deleted": groups_deleted,
-            }
-        }
-    except Exception as e:
-        conn.rollback()
-        error_msg = str(e)
-        if "foreign key constraint" in error_msg.lower():
             return {
-                "success": False,
-                "error": "Невозможно удалить норматив: существуют зависимые записи.",
-                "normative_id": normative_id
+                "success": True,
+                "message": "Норматив успешно удалён",
+                "normative_id": normative_id,
+                "details": {
+                    "discipline": discipline_name,
+                    "rank": rank_short,
+                    "conditions_deleted": conditions_deleted,
+                    "groups_deleted": groups_deleted,
+                }
             }
-        return {"success": False, "error": error_msg, "normative_id": normative_id}
-    finally:
-        conn.close()
+        except Exception as e:
+            conn.rollback()
+            error_msg = str(e)
+            if "foreign key constraint" in error_msg.lower():
+                return {
+                    "success": False,
+                    "error": "Невозможно удалить норматив: существуют зависимые записи.",
+                    "normative_id": normative_id
+                }
+            return {"success": False, "error": error_msg, "normative_id": normative_id}
 
 
 @app.delete("/disciplines/{discipline_id}")
 def delete_discipline(discipline_id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM ref_disciplines WHERE id = %s", (discipline_id,))
-        conn.commit()
-        return {"deleted": discipline_id}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            sport_id = sport_id_for_discipline(cur, discipline_id)
+            cur.execute("DELETE FROM ref_disciplines WHERE id = %s", (discipline_id,))
+            refresh_normatives_documents(cur, sport_id)
+            publish_catalog_change(cur, ["ref_disciplines", "lnk_discipline_parameters", "groups"], sport_id)
+            conn.commit()
+            return {"deleted": discipline_id}
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/parameter-types/{id}")
 def delete_param_type(id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM ref_parameters_types WHERE id = %s", (id,))
-        conn.commit()
-        return {"deleted": id}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM ref_parameters_types WHERE id = %s", (id,))
+            refresh_normatives_documents(cur, None)
+            publish_catalog_change(cur, ["ref_parameters_types"])
+            conn.commit()
+            return {"deleted": id}
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/parameters/{id}")
 def delete_parameter(id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM ref_parameters WHERE id = %s", (id,))
-        conn.commit()
-        return {"deleted": id}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM ref_parameters WHERE id = %s", (id,))
+            refresh_normatives_documents(cur, None)
+            publish_catalog_change(cur, ["ref_parameters"])
+            conn.commit()
+            return {"deleted": id}
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/requirements/{id}")
 def delete_requirement(id: int):
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM ref_requirements WHERE id = %s", (id,))
-        conn.commit()
-        return {"deleted": id}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM ref_requirements WHERE id = %s", (id,))
+            refresh_normatives_documents(cur, None)
+            publish_catalog_change(cur, ["ref_requirements"])
+            conn.commit()
+            return {"deleted": id}
+        except Exception as e:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/link-parameters")
 def delete_link(payload: LinkDeletePayload):
     """Удаляет конкретную связь дисциплина × параметр."""
-    conn = None
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "DELETE FROM lnk_discipline_parameters WHERE discipline_id = %s AND parameter_id = %s",
-            (payload.discipline_id, payload.parameter_id)
-        )
-        deleted_rows = cur.rowcount
-        conn.commit()
+        # Незакоммиченная транзакция откатывается при возврате соединения в пул
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM lnk_discipline_parameters WHERE discipline_id = %s AND parameter_id = %s",
+                (payload.discipline_id, payload.parameter_id)
+            )
+            deleted_rows = cur.rowcount
+            if deleted_rows:
+                sport_id = sport_id_for_discipline(cur, payload.discipline_id)
+                refresh_normatives_documents(cur, sport_id)
+                publish_catalog_change(cur, ["lnk_discipline_parameters"], sport_id)
+            conn.commit()
 
         if deleted_rows == 0:
             return {"status": "not_found", "message": "Связь не найдена или уже удалена."}
@@ -1565,14 +5450,18 @@ def delete_link(payload: LinkDeletePayload):
             "parameter_id": payload.parameter_id
         }
     except (Exception, psycopg2.Error) as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера при удалении связи.")
-    finally:
-        if conn:
-            conn.close()
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["migrate"]:
+        logging.basicConfig(level=logging.INFO)
+        sys.exit(migrate_cli(sys.argv[2:]))
+    if sys.argv[1:2] == ["import-act"]:
+        logging.basicConfig(level=logging.INFO)
+        sys.exit(import_act_cli(sys.argv[2:]))
+    if sys.argv[1:2] == ["backfill-conditions"]:
+        logging.basicConfig(level=logging.INFO)
+        sys.exit(backfill_conditions_cli(sys.argv[2:]))
     import uvicorn
     uvicorn.run(app, host="localhost", port=8000)
@@ -0,0 +1,79 @@
+"""
+Замер задержки и пропускной способности GET-эндпоинтов SportNormativ API.
+
+    python bench.py http://localhost:8000
+    python bench.py http://localhost:8000 --requests 1000 --concurrency 16 /parameters /ldp
+
+Чтобы мерить весь конвейер (запрос к БД → строки → JSON), а не отдачу готового
+ответа из кеша, сервер запускают с CACHE_MAX_ENTRIES=0 NORMATIVES_DOCUMENTS=0.
+Для сравнения «до/после» один и тот же прогон делают на двух версиях сервера.
+Только стандартная библиотека — ставить ничего не нужно.
+
+Опорный замер (1 CPU, Postgres на той же машине, после python app.py migrate и ANALYZE;
+каталог: 120 видов спорта, 3095 дисциплин, 55 710 нормативов, 78 053 условия,
+у вида спорта 1 — 120 дисциплин и 2160 нормативов):
+
+    python bench.py http://127.0.0.1:8000 --requests 200 --concurrency 4 --warmup 10
+
+    среднее, мс              исходная версия   текущая
+    /parameters                       30.4        6.0
+    /ldp                            3130.1       85.8
+    /sports/1/normatives            1658.5      129.8
+"""
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PATHS = ["/parameters", "/ldp", "/sports/1/normatives"]
+
+
+def fetch(url: str) -> tuple:
+    """(секунды, байт) одного запроса; тело читается целиком."""
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        size = len(response.read())
+    return time.perf_counter() - started, size
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench(url: str, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fetch(url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, [url] * requests))
+    elapsed = time.perf_counter() - started
+    latencies = [seconds * 1000 for seconds, _ in results]
+    return {
+        "rps": requests / elapsed,
+        "mean": statistics.mean(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "bytes": results[0][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base_url", help="например, http://localhost:8000")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--requests", type=int, default=300, help="запросов на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20, help="запросов до замера")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<32}{'req/s':>9}{'mean ms':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'bytes':>9}")
+    for path in args.paths:
+        r = bench(args.base_url.rstrip("/") + path, args.requests, args.concurrency, args.warmup)
+        print(f"{path:<32}{r['rps']:>9.0f}{r['mean']:>9.2f}{r['p50']:>8.2f}{r['p95']:>8.2f}{r['p99']:>8.2f}{r['bytes']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+# Тесты с БД идут только на отдельной базе со схемой каталога (после python app.py migrate):
+#     TEST_DATABASE_DSN="host=localhost dbname=sportnormativ_test user=postgres" python -m pytest
+# Они дописывают в неё свои вид спорта, акт, справочники и нормативы и не удаляют их.
+TEST_DATABASE_DSN = os.getenv("TEST_DATABASE_DSN")
+
+
+@pytest.fixture
+def app():
+    return app_module
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """Отдельный кеш на тест: обработчики обращаются к app.response_cache при вызове."""
+    cache = app_module.ResponseCache(max_entries=16)
+    monkeypatch.setattr(app_module, "response_cache", cache)
+    return cache
+
+
+@pytest.fixture(scope="session")
+def database():
+    """DB_CONFIG приложения, направленный на TEST_DATABASE_DSN; без неё тест пропускается."""
+    if not TEST_DATABASE_DSN:
+        pytest.skip("TEST_DATABASE_DSN не задана")
+    from psycopg2.extensions import parse_dsn
+
+    app_module.DB_CONFIG.update({"password": "", "port": "5432"})
+    app_module.DB_CONFIG.update(parse_dsn(TEST_DATABASE_DSN))
+    return app_module.DB_CONFIG
+
+
+def create_catalog(database) -> dict:
+    """
+    Свой вид спорта с действующим актом: дисциплина с параметром «Пол» и тремя
+    нормативами по «Время» (у одного — дочернее условие). Имена справочников
+    с меткой, чтобы не пересекаться с данными базы и прошлыми запусками.
+    """
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+
+    tag = uuid.uuid4().hex[:8]
+    conn = psycopg2.connect(cursor_factory=RealDictCursor, **database)
+    try:
+        cur = conn.cursor()
+
+        def insert(query, params):
+            cur.execute(query + " RETURNING id", params)
+            return cur.fetchone()["id"]
+
+        sport_type = insert("INSERT INTO ref_sport_types (type_name) VALUES (%s)", (f"Тест {tag}",))
+        sport = insert("INSERT INTO ref_sports (sport_name, image_url, sport_type_id) VALUES (%s, %s, %s)",
+                       (f"Тестовый спорт {tag}", None, sport_type))
+        act = insert("INSERT INTO sport_ministry_act (sport_id, start_date, end_date, act_details) "
+                     "VALUES (%s, '2023-01-01', NULL, %s)", (sport, f"Приказ {tag}"))
+        sex = f"Пол {tag}"
+        parameter_type = insert("INSERT INTO ref_parameters_types (type_name) VALUES (%s)", (sex,))
+        men = insert("INSERT INTO ref_parameters (parameter_type_id, parameter_value) VALUES (%s, %s)",
+                     (parameter_type, "Мужчины"))
+        women = insert("INSERT INTO ref_parameters (parameter_type_id, parameter_value) VALUES (%s, %s)",
+                       (parameter_type, "Женщины"))
+        requirement_type = insert("INSERT INTO ref_requirements_types (type_name) VALUES (%s)", (f"норматив {tag}",))
+        time_requirement = f"Время {tag}"
+        requirement = insert("INSERT INTO ref_requirements (requirement_type_id, requirement_value) VALUES (%s, %s)",
+                             (requirement_type, time_requirement))
+        wins = insert("INSERT INTO ref_requirements (requirement_type_id, requirement_value) VALUES (%s, %s)",
+                      (requirement_type, f"Победы {tag}"))
+        ranks = {
+            short: insert("INSERT INTO ref_ranks (short_name, full_name, prestige) VALUES (%s, %s, %s)",
+                          (short, short, prestige))
+            for short, prestige in ((f"МС{tag}", 90), (f"КМС{tag}", 80))
+        }
+        discipline = insert("INSERT INTO ref_disciplines (sport_act_id, discipline_code, discipline_name) "
+                            "VALUES (%s, %s, %s)", (act, f"T{tag}", "Бег 100 м"))
+        ldp = {
+            value: insert("INSERT INTO lnk_discipline_parameters (discipline_id, parameter_id) VALUES (%s, %s)",
+                          (discipline, parameter))
+            for value, parameter in (("Мужчины", men), ("Женщины", women))
+        }
+        normatives, conditions = [], []
+        for short, value, threshold in ((f"МС{tag}", "Мужчины", "10.50"), (f"КМС{tag}", "Мужчины", "11.00"),
+                                        (f"МС{tag}", "Женщины", "11.80")):
+            normative = insert("INSERT INTO normatives (rank_id) VALUES (%s)", (ranks[short],))
+            cur.execute("INSERT INTO groups (discipline_parameter_id, normative_id) VALUES (%s, %s)",
+                        (ldp[value], normative))
+            conditions.append(insert("INSERT INTO conditions (normative_id, requirement_id, condition) "
+                                     "VALUES (%s, %s, %s)", (normative, requirement, threshold)))
+            normatives.append(normative)
+        conditions.append(insert("INSERT INTO conditions (normative_id, requirement_id, condition, parent_id) "
+                                 "VALUES (%s, %s, %s, %s)", (normatives[0], wins, "3", conditions[0])))
+        app_module.normalize_conditions(cur, conditions)
+        conn.commit()
+    finally:
+        conn.close()
+    return {
+        "tag": tag, "sport_id": sport, "act_id": act, "discipline_id": discipline,
+        "discipline_code": f"T{tag}", "parameter_type": sex, "requirement": time_requirement,
+        "ranks": ranks, "normatives": normatives,
+    }
+
+
+@pytest.fixture(scope="session")
+def catalog(database):
+    """Общий для тестов вид спорта (create_catalog); тесты не меняют его действующий акт."""
+    return create_catalog(database)
+
+
+@pytest.fixture
+def new_catalog(database, client):
+    """Отдельный вид спорта на один тест — для тестов, которые меняют акты."""
+    return create_catalog(database)
+
+
+@pytest.fixture(scope="session")
+def client(catalog):
+    """TestClient с lifespan приложения (пулы, слушатель изменений) на тестовой базе с данными catalog."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app_module.app) as test_client:
+        yield test_client
@@ -0,0 +1,86 @@
+def fetch(app, query, params):
+    with app.get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def test_clone_copies_act(app, client, new_catalog):
+    catalog = new_catalog
+    old_normatives = {nid: client.get(f"/v_1/normative/{nid}").json() for nid in catalog["normatives"]}
+
+    response = client.post(f"/acts/{catalog['act_id']}/clone",
+                           json={"act_details": "Приказ 2", "start_date": "2024-03-01"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body == {
+        "act_id": body["act_id"], "cloned_from": catalog["act_id"], "sport_id": catalog["sport_id"],
+        "disciplines": 1, "discipline_parameters": 2, "normatives": 3, "groups": 3, "conditions": 4,
+    }
+    acts = fetch(app, "SELECT id, start_date::text, end_date::text, act_details FROM sport_ministry_act "
+                      "WHERE sport_id = %s ORDER BY id", (catalog["sport_id"],))
+    assert [dict(a) for a in acts] == [
+        {"id": catalog["act_id"], "start_date": "2023-01-01", "end_date": "2024-02-29",
+         "act_details": f"Приказ {catalog['tag']}"},
+        {"id": body["act_id"], "start_date": "2024-03-01", "end_date": None, "act_details": "Приказ 2"},
+    ]
+
+    new_ids = [row["id"] for row in fetch(app, """
+        SELECT DISTINCT g.normative_id AS id
+        FROM groups g
+        JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+        JOIN ref_disciplines d ON d.id = ldp.discipline_id
+        WHERE d.sport_act_id = %s
+        ORDER BY 1
+    """, (body["act_id"],))]
+    assert len(new_ids) == 3 and not set(new_ids) & set(old_normatives)
+    for old_id, new_id in zip(catalog["normatives"], new_ids):
+        old, new = old_normatives[old_id], client.get(f"/v_1/normative/{new_id}").json()
+        assert new["discipline"]["id"] != old["discipline"]["id"]
+        for key in ("rank", "parameters", "conditions"):
+            assert new[key] == old[key]
+
+
+def test_clone_keeps_condition_trees_and_parsed_values(app, client, new_catalog):
+    catalog = new_catalog
+
+    act_id = client.post(f"/acts/{catalog['act_id']}/clone",
+                         json={"act_details": "Приказ 2", "start_date": "2024-03-01"}).json()["act_id"]
+
+    rows = fetch(app, """
+        SELECT c.id, c.parent_id, c.condition, c.condition_numeric, p.normative_id AS parent_normative_id,
+               c.normative_id, n.ldp_signature
+        FROM conditions c
+        JOIN normatives n ON n.id = c.normative_id
+        LEFT JOIN conditions p ON p.id = c.parent_id
+        WHERE c.normative_id IN (
+            SELECT g.normative_id
+            FROM groups g
+            JOIN lnk_discipline_parameters ldp ON ldp.id = g.discipline_parameter_id
+            JOIN ref_disciplines d ON d.id = ldp.discipline_id
+            WHERE d.sport_act_id = %s
+        )
+        ORDER BY c.id
+    """, (act_id,))
+    children = [row for row in rows if row["parent_id"] is not None]
+    assert len(children) == 1
+    assert children[0]["parent_normative_id"] == children[0]["normative_id"]
+    assert {row["condition"]: row["condition_numeric"] for row in rows if row["parent_id"] is None} == {
+        "10.50": 10.5, "11.00": 11.0, "11.80": 11.8,
+    }
+    assert all(row["ldp_signature"] for row in rows)
+
+
+def test_clone_rejects_start_before_active_act(client, new_catalog):
+    response = client.post(f"/acts/{new_catalog['act_id']}/clone",
+                           json={"act_details": "Приказ 2", "start_date": "2023-01-01"})
+
+    assert response.status_code == 400
+    assert "start_date must be after" in response.json()["detail"]
+
+
+def test_clone_unknown_act(client):
+    response = client.post("/acts/2000000000/clone", json={"act_details": "Приказ 2"})
+
+    assert response.status_code == 404
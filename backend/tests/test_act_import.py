@@ -0,0 +1,105 @@
+import io
+
+import pytest
+
+HEADER = "discipline_code,discipline_name,parameters,rank,requirement,condition,additional\n"
+
+
+def act_csv(catalog, code, rank_suffix=""):
+    tag, sex, requirement = catalog["tag"], catalog["parameter_type"], catalog["requirement"]
+    return (
+        HEADER
+        + f"{code},Бег 200 м,{sex}: Мужчины,МС{tag}{rank_suffix},{requirement},21.50,Победы {tag}: 2\n"
+        + f"{code},Бег 200 м,{sex}: Мужчины,КМС{tag},{requirement},22.30,\n"
+        + f"{code},Бег 200 м,{sex}: Женщины,КМС{tag},{requirement},25.10,\n"
+    ).encode("utf-8")
+
+
+def test_read_act_table_csv(app):
+    data = (
+        "Rank;Condition;Discipline_Code;Discipline_Name;Parameters;Requirement\n"
+        "КМС;10.85;011;бег 100 м;Пол: Мужчины;Время\n"
+        ";;;;;\n"
+        "МС;10.50;011;бег 100 м;Пол: Мужчины;Время\n"
+    ).encode("utf-8-sig")
+
+    rows = list(app.read_act_table(data, "csv"))
+
+    assert rows == [
+        [2, "011", "бег 100 м", "Пол: Мужчины", "КМС", "Время", "10.85", ""],
+        [4, "011", "бег 100 м", "Пол: Мужчины", "МС", "Время", "10.50", ""],
+    ]
+
+
+def test_read_act_table_xlsx(app):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["discipline_code", "discipline_name", "parameters", "rank", "requirement", "condition", "additional"])
+    sheet.append([11, "бег 100 м", "Пол: Мужчины", "КМС", "Время", 10.85, None])
+    sheet.append([11, "бег 100 м", "Пол: Мужчины", "МС", "Место", 3.0, "Победы: 2"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    rows = list(app.read_act_table(buffer.getvalue(), "xlsx"))
+
+    assert rows == [
+        [2, "11", "бег 100 м", "Пол: Мужчины", "КМС", "Время", "10.85", ""],
+        [3, "11", "бег 100 м", "Пол: Мужчины", "МС", "Место", "3", "Победы: 2"],
+    ]
+
+
+def test_read_act_table_errors(app):
+    with pytest.raises(ValueError, match="rank, requirement"):
+        app.read_act_table(b"discipline_code,discipline_name,parameters,condition\n", "csv")
+    with pytest.raises(ValueError, match="неизвестный формат"):
+        app.read_act_table(b"", "ods")
+
+
+def import_params(catalog, **extra):
+    # отдельный истёкший акт: действующий акт вида спорта нужен другим тестам как есть
+    return {"sport_id": catalog["sport_id"], "act_details": f"Импорт {catalog['tag']}",
+            "end_date": "2022-12-31", **extra}
+
+
+def test_dry_run_reports_without_writing(client, catalog):
+    code = f"I{catalog['tag']}"
+
+    first = client.post("/acts/import", params=import_params(catalog), content=act_csv(catalog, code))
+    second = client.post("/acts/import", params=import_params(catalog), content=act_csv(catalog, code))
+
+    assert first.status_code == 200
+    report = first.json()
+    assert report["applied"] is False
+    assert report["act"]["status"] == "created"
+    assert report["rows"] == 3
+    assert report["disciplines"]["created"] == [{"discipline_code": code, "discipline_name": "Бег 200 м"}]
+    assert report["discipline_parameters"]["created"] == 2
+    assert report["normatives"] == {"created": 3, "existing": 0}
+    assert report["conditions"] == {"created": 3, "skipped": 0, "additional": 1}
+    # первый прогон откатился: второй отчёт тот же (кроме id акта — последовательность не откатывается)
+    assert {**second.json(), "act": None} == {**report, "act": None}
+
+
+def test_import_applies_once(client, catalog):
+    code = f"J{catalog['tag']}"
+
+    applied = client.post("/acts/import", params=import_params(catalog, dry_run="false"),
+                          content=act_csv(catalog, code))
+    again = client.post("/acts/import", params=import_params(catalog), content=act_csv(catalog, code))
+
+    assert applied.status_code == 200 and applied.json()["applied"] is True
+    report = again.json()
+    assert report["act"] == {**applied.json()["act"], "status": "existing"}
+    assert report["disciplines"] == {"created": [], "existing": 1}
+    assert report["normatives"] == {"created": 0, "existing": 3}
+    assert report["conditions"] == {"created": 0, "skipped": 3, "additional": 0}
+
+
+def test_import_errors_name_the_line(client, catalog):
+    response = client.post("/acts/import", params=import_params(catalog),
+                           content=act_csv(catalog, f"K{catalog['tag']}", rank_suffix="?"))
+
+    assert response.status_code == 400
+    errors = response.json()["detail"]["errors"]
+    assert errors == [{"line": 2, "error": f"разряд «МС{catalog['tag']}?» не найден"}]
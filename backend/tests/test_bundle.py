@@ -0,0 +1,26 @@
+def test_bundle_matches_separate_endpoints(client, catalog):
+    sport_id = catalog["sport_id"]
+
+    response = client.get(f"/v_2/sports/{sport_id}/bundle")
+
+    assert response.status_code == 200
+    bundle = response.json()
+    assert bundle["sport"]["id"] == sport_id
+    assert bundle["sport"]["sport_name"] == f"Тестовый спорт {catalog['tag']}"
+    assert bundle["disciplines"] == client.get(f"/v_2/sports/{sport_id}/disciplines").json()["disciplines"]
+    normatives = client.get(f"/sports/{sport_id}/normatives").json()
+    assert bundle["normatives"] == normatives["normatives"]
+    assert bundle["total_count"] == normatives["total_count"] == 3
+
+
+def test_bundle_ranks_are_those_of_normatives(client, catalog):
+    bundle = client.get(f"/v_2/sports/{catalog['sport_id']}/bundle").json()
+
+    assert [rank["id"] for rank in bundle["ranks"]] == list(catalog["ranks"].values())  # по убыванию престижа
+    all_ranks = {rank["id"]: rank for rank in client.get("/ranks").json()["ranks"]}
+    for rank in bundle["ranks"]:
+        assert all_ranks[rank["id"]] == rank
+
+
+def test_bundle_unknown_sport(client):
+    assert client.get("/v_2/sports/2000000000/bundle").status_code == 404
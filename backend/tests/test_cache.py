@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import Query
+
+
+def test_warm_resolves_query_defaults(app, response_cache):
+    calls = []
+
+    @app.cached("test_warm")
+    def handler(sport_id: int, stream: bool = Query(False), rank_id: int = Query(None)):
+        calls.append((sport_id, stream, rank_id))
+        return {"sport_id": sport_id}
+
+    asyncio.run(handler.warm(sport_id=1))
+
+    assert calls == [(1, False, None)]
+    key = ("test_warm", (("rank_id", None), ("sport_id", 1), ("stream", False)))
+    assert response_cache.get(key) is not None
+
+
+def test_warm_skips_cached_entry(app, response_cache):
+    calls = []
+
+    @app.cached("test_warm_twice")
+    async def handler(sport_id: int, stream: bool = Query(False)):
+        calls.append(sport_id)
+        return [sport_id]
+
+    asyncio.run(handler.warm(sport_id=2))
+    asyncio.run(handler.warm(sport_id=2))
+
+    assert calls == [2]
+
+
+def test_bypass_receives_resolved_defaults(app, response_cache):
+    calls = []
+
+    @app.cached("test_bypass", bypass=lambda kwargs: True)
+    def handler(sport_id: int, stream: bool = Query(False)):
+        calls.append(stream)
+        return {}
+
+    asyncio.run(handler(sport_id=3, request=None))
+
+    assert calls == [False]
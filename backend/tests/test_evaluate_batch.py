@@ -0,0 +1,83 @@
+import pytest
+
+
+def test_read_protocol_csv(app):
+    data = (
+        "Discipline_ID\tDiscipline_Code\tParameters\tResult\tRequirement\n"
+        "42\t\tПол: Мужчины; Возраст: 18+\t10.7\tВремя\n"
+        "\t011\tПол: Женщины\t1:05.3\t\n"
+        "-x\t\tПол: Мужчины\t10.7\t\n"
+    ).encode("utf-8-sig")
+
+    rows = app.read_protocol_csv(data)
+
+    assert len(rows) == 3
+    assert (rows[0].discipline_id, rows[0].parameters, rows[0].result, rows[0].requirement) == (
+        42, {"Пол": "Мужчины", "Возраст": "18+"}, "10.7", "Время"
+    )
+    assert (rows[1].discipline_id, rows[1].discipline_code, rows[1].requirement) == (None, "011", None)
+    assert rows[2] == "discipline_id '-x' is not an integer"
+
+
+def test_read_protocol_csv_requires_columns(app):
+    with pytest.raises(ValueError, match="result"):
+        app.read_protocol_csv(b"discipline_id,parameters\n1,\n")
+
+
+@pytest.fixture
+def thresholds(app, monkeypatch):
+    """Пороги дисциплины 42 уже в ThresholdIndex — evaluate_protocol не идёт в БД."""
+    def row(prestige, text, value):
+        return {
+            "rank_id": prestige, "rank_short": f"Р{prestige}", "rank_full": None, "rank_prestige": prestige,
+            "params": {"Пол": "Мужчины"}, "requirement_value": "Время", "condition": text,
+            "condition_numeric": value, "condition_unit": "s", "condition_direction": "lower",
+        }
+
+    index = app.ThresholdIndex(ttl=60)
+    index._disciplines[42] = (float("inf"), 1, app.ThresholdIndex.build([row(90, "10.50", 10.5), row(80, "11.00", 11.0)]))
+    monkeypatch.setattr(app, "threshold_index", index)
+    return index
+
+
+def test_evaluate_protocol_keeps_row_errors(app, thresholds):
+    rows = app.read_protocol_csv((
+        "discipline_id,parameters,result\n"
+        "42,Пол: Мужчины,10.7\n"
+        "x,Пол: Мужчины,10.7\n"
+        "42,Пол: Мужчины,быстро\n"
+        "42,Пол: Женщины,10.7\n"
+        "42,Пол: Мужчины,6.20 м\n"
+        "42,Пол: Мужчины,10.4\n"
+    ).encode("utf-8"))
+
+    report = app.evaluate_protocol(rows)
+
+    results = report["results"]
+    assert [r["row"] for r in results] == list(range(6))
+    assert results[0]["rank"]["prestige"] == 80
+    assert results[1] == {"row": 1, "error": "discipline_id 'x' is not an integer"}
+    assert results[2]["error"] == "result is not a number or time"
+    assert results[3]["error"] == "no normatives for these parameters"
+    assert results[4]["rank"] is None
+    assert results[4]["evaluations"][0]["error"] == "unit mismatch: expected s, got m"
+    assert results[5]["rank"]["prestige"] == 90
+    assert (report["evaluated"], report["errors"]) == (3, 3)
+
+
+def test_evaluate_batch_csv_by_code(client, catalog):
+    data = (
+        "discipline_code,parameters,result\n"
+        f"{catalog['discipline_code']},{catalog['parameter_type']}: Мужчины,10.8\n"
+        f"{catalog['discipline_code']},{catalog['parameter_type']}: Женщины,11.5\n"
+        "NO-SUCH-CODE,Пол: Мужчины,10.8\n"
+    ).encode("utf-8")
+
+    response = client.post("/v_2/evaluate/batch", content=data, headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["discipline_id"] == results[1]["discipline_id"] == catalog["discipline_id"]
+    assert results[0]["rank"]["id"] == catalog["ranks"][f"КМС{catalog['tag']}"]
+    assert results[1]["rank"]["id"] == catalog["ranks"][f"МС{catalog['tag']}"]
+    assert results[2] == {"row": 2, "error": "discipline not found"}
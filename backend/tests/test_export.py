@@ -0,0 +1,71 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("GZIP;q=0.5", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("", False),
+    ("identity", False),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, *;q=0.1", True),
+    ("gzip;q=abc", False),
+])
+def test_accepts_gzip(app, header, expected):
+    assert app.accepts_gzip(header) is expected
+
+
+def test_gzip_chunks_round_trip(app):
+    chunks = [b'{"id": 1}\n', b"", b'{"id": 2}\n' * 1000]
+
+    compressed = list(app._gzip_chunks(iter(chunks)))
+
+    assert len(compressed) == len(chunks) + 1
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+
+
+def export(client, encoding, **params):
+    with client.stream("GET", "/export/normatives", params=params,
+                       headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_export_ndjson(client, catalog):
+    response, raw = export(client, "gzip", sport_id=catalog["sport_id"])
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    items = [json.loads(line) for line in gzip.decompress(raw).splitlines()]
+    assert [item["id"] for item in items] == catalog["normatives"]
+    assert items[0]["parameters"] == {catalog["parameter_type"]: "Мужчины"}
+    assert items[0]["conditions"][catalog["requirement"]] == "10.50"
+
+
+def test_export_csv_without_gzip(client, catalog):
+    first = catalog["normatives"][0]
+
+    response, raw = export(client, "gzip;q=0, identity", sport_id=catalog["sport_id"], format="csv",
+                           after_id=first)
+
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+    rows = list(csv.DictReader(io.StringIO(raw.decode("utf-8"))))
+    assert [int(row["id"]) for row in rows] == catalog["normatives"][1:]
+    assert rows[0]["parameters"] == f"{catalog['parameter_type']}: Мужчины"
+
+
+def test_export_unknown_format(app):
+    client = TestClient(app.app)  # без lifespan: формат проверяется до запроса к БД
+    assert client.get("/export/normatives", params={"format": "xml"}).status_code == 400
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+
+def test_batch_rejects_bad_ids(app):
+    client = TestClient(app.app)  # без lifespan: до БД эти запросы не доходят
+
+    assert client.get("/v_1/normatives/batch", params={"ids": "1,x"}).status_code == 400
+    assert client.post("/v_1/normatives/batch", json={"ids": []}).status_code == 400
+    too_many = list(range(1, app.NORMATIVES_BATCH_MAX + 2))
+    response = client.post("/v_1/normatives/batch", json={"ids": too_many})
+    assert response.status_code == 400
+    assert "Too many ids" in response.json()["detail"]
+
+
+def test_batch_matches_single_lookups(client, catalog):
+    first, second, third = catalog["normatives"]
+    missing = 2_000_000_000
+
+    response = client.get("/v_1/normatives/batch", params=[("ids", f"{third},{first}"), ("ids", f"{missing},{third}")])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["normatives"]) == [str(third), str(first)]  # порядок запроса, без повторов
+    assert body["missing"] == [missing]
+    for nid in (first, third):
+        assert body["normatives"][str(nid)] == client.get(f"/v_1/normative/{nid}").json()
+    assert body["normatives"][str(first)]["conditions"] == {catalog["requirement"]: "10.50", f"Победы {catalog['tag']}": "3"}
+
+
+def test_batch_post_same_as_get(client, catalog):
+    ids = catalog["normatives"]
+
+    posted = client.post("/v_1/normatives/batch", json={"ids": ids})
+    fetched = client.get("/v_1/normatives/batch", params={"ids": ",".join(map(str, ids))})
+
+    assert posted.status_code == 200
+    assert posted.json() == fetched.json()
+    assert posted.json()["missing"] == []
@@ -0,0 +1,68 @@
+def make_row(normative_id, discipline_id, rank_id, **params):
+    return {
+        "sport_name": "Лёгкая атлетика",
+        "normative_id": normative_id,
+        "discipline_id": discipline_id,
+        "discipline_name": f"Дисциплина {discipline_id}",
+        "discipline_code": None,
+        "params": params,
+        "rank_id": rank_id,
+        "rank_short": f"Р{rank_id}",
+        "prestige": rank_id,
+        "conditions": [],
+    }
+
+
+ROWS = [
+    make_row(10, 1, 1, **{"Пол": "Мужчины"}),
+    make_row(11, 1, 2, **{"Пол": "Женщины"}),
+    make_row(12, 2, 1, **{"Пол": "Мужчины"}),
+    make_row(13, 1, 1, **{"Пол": "Женщины"}),
+    make_row(14, 1, 1, **{"Пол": "Мужчины"}),
+]
+
+
+def ids(items):
+    return [item["id"] for item in items]
+
+
+def test_intersect_sorted(app):
+    assert app._intersect_sorted([1, 3, 5, 7], [0, 3, 4, 7, 9]) == [3, 7]
+    assert app._intersect_sorted([2], [0, 1]) == []
+    assert app._intersect_sorted([], [1, 2]) == []
+
+
+def test_union_sorted(app):
+    assert app._union_sorted([[4, 1], [1, 2]]) == [1, 2, 4]
+    assert app._union_sorted([[3, 5]]) == [3, 5]
+    assert app._union_sorted([]) == []
+
+
+def test_filter_intersects_and_keeps_order(app):
+    index = app._SportNormativesIndex(ROWS)
+
+    assert ids(index.filter(None, None, {})) == [10, 11, 12, 13, 14]
+    assert ids(index.filter(1, 1, {})) == [10, 13, 14]
+    assert ids(index.filter(1, 1, {"пол": ["мужчины"]})) == [10, 14]
+    assert ids(index.filter(1, None, {"пол": ["мужчины", "женщины"]})) == [10, 11, 13, 14]
+    assert ids(index.filter(2, 2, {})) == []
+    assert ids(index.filter(None, None, {"пол": ["дети"]})) == []
+
+
+def test_empty_sport(app):
+    index = app._SportNormativesIndex([])
+
+    assert index.sport_name is None
+    assert index.filter(1, None, {}) == []
+
+
+def test_apply_change_drops_sport(app):
+    index = app.NormativesFilterIndex(ttl=60)
+    index._sports = {1: (float("inf"), "a"), 2: (float("inf"), "b")}
+
+    index.apply_change({"ref_sport_types"}, None)
+    assert set(index._sports) == {1, 2}
+    index.apply_change({"normatives"}, 1)
+    assert set(index._sports) == {2}
+    index.apply_change({"ref_disciplines"}, None)
+    assert index._sports == {}
@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+def doc(kind, id, name, code=None, sport_id=None, sport_name=None):
+    return {"kind": kind, "id": id, "name": name, "code": code, "sport_id": sport_id or id, "sport_name": sport_name}
+
+
+ROWS = [
+    doc("sport", 1, "Лёгкая атлетика", sport_name="Лёгкая атлетика"),
+    doc("sport", 2, "Плавание", sport_name="Плавание"),
+    doc("discipline", 10, "бег 100 м", "0020011611Я", 1, "Лёгкая атлетика"),
+    doc("discipline", 11, "Бег 200 м", "0020021611Я", 1, "Лёгкая атлетика"),
+    doc("discipline", 12, "Бег с препятствиями", "0020031611Я", 1, "Лёгкая атлетика"),
+    doc("discipline", 20, "вольный стиль 50 м", "0070011611Я", 2, "Плавание"),
+]
+
+
+@pytest.fixture
+def index(app):
+    index = app.SearchIndex(ttl=3600)
+    index._snapshot = app._SearchSnapshot(ROWS)  # без БД: снимок из готовых строк
+    return index
+
+
+def ids(results):
+    return [(r["type"], r["id"]) for r in results]
+
+
+def test_normalize_search_text(app):
+    assert app.normalize_search_text("  Лёгкая-АТЛЕТИКА (бег)  ") == "легкая атлетика бег"
+    assert app.normalize_search_text(None) == ""
+
+
+def test_exact_word_before_prefix(index):
+    total, results = index.search("бег")
+
+    assert total == 3
+    assert ids(results) == [("discipline", 10), ("discipline", 11), ("discipline", 12)]
+    assert results[0]["sport"] == {"id": 1, "name": "Лёгкая атлетика"}
+
+
+def test_prefix_and_yo(index):
+    total, results = index.search("ЛЕГК")
+
+    assert ids(results) == [("sport", 1)]
+    assert results[0]["score"] == 3  # префикс слова + начало названия
+
+
+def test_typo_matches_by_trigrams(index):
+    total, results = index.search("плаванье")
+
+    assert ids(results) == [("sport", 2)]
+    assert 0.5 <= results[0]["score"] < 2
+
+
+def test_all_words_must_match(index):
+    assert ids(index.search("бег 200")[1]) == [("discipline", 11)]
+    assert index.search("бег вольный") == (0, [])
+    assert index.search("   ") == (0, [])
+
+
+def test_code_and_kind_filter(index):
+    results = index.search("0070011611я")[1]
+    assert ids(results)[0] == ("discipline", 20) and results[0]["score"] == 3  # похожие коды — ниже
+    assert all(r["score"] < 2 for r in results[1:])
+    assert ids(index.search("плавание", kind="discipline")[1]) == []
+    total, results = index.search("бег", limit=1)
+    assert total == 3 and len(results) == 1
+
+
+def test_search_rejects_unknown_type(app):
+    client = TestClient(app.app)  # без lifespan: тип проверяется до обращения к индексу
+
+    assert client.get("/v_2/search", params={"q": "бег", "type": "act"}).status_code == 400
+
+
+def test_search_database(client, catalog):
+    response = client.get("/v_2/search", params={"q": f"тестовый {catalog['tag']}", "type": "sport"})
+
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()["results"]] == [catalog["sport_id"]]
@@ -0,0 +1,107 @@
+import pytest
+
+
+@pytest.mark.parametrize("text, requirement, expected", [
+    ("1:05.3", None, (65.3, "s", "lower")),
+    ("1:02:15", None, (3735.0, "s", "lower")),
+    ("2.05.3", None, (125.3, "s", "lower")),
+    ("1.02.15.0", None, (3735.0, "s", "lower")),
+    ("6,20 м", None, (6.2, "m", "higher")),
+    ("150 см", None, (1.5, "m", "higher")),
+    ("12 очков", None, (12.0, "points", "higher")),
+    ("1-3", None, (3.0, "place", "lower")),
+    ("10.5", "Время", (10.5, "s", "lower")),
+    ("10.5", None, (10.5, None, None)),
+    (7, "Дальность", (7.0, "m", "higher")),
+])
+def test_parse_condition(app, text, requirement, expected):
+    value, unit, direction = app.parse_condition(text, requirement)
+    assert (round(value, 6), unit, direction) == expected
+
+
+@pytest.mark.parametrize("text", ["Чемпионат России", "5 лучших", "1 из 3", ""])
+def test_parse_condition_text(app, text):
+    assert app.parse_condition(text, "Время") is None
+
+
+def row(prestige, text, numeric=None, unit=None, direction=None, requirement="Время", rank_id=None):
+    return {
+        "rank_id": rank_id if rank_id is not None else prestige,
+        "rank_short": f"Р{prestige}",
+        "rank_full": None,
+        "rank_prestige": prestige,
+        "params": {"Пол": "Мужчины"},
+        "requirement_value": requirement,
+        "condition": text,
+        "condition_numeric": numeric,
+        "condition_unit": unit,
+        "condition_direction": direction,
+    }
+
+
+def test_build_from_stored_values(app):
+    rows = [
+        row(90, "10.5", 10.5, "s", "lower"),
+        row(80, "11.0", 11.0, "s", "lower"),
+        row(70, "Чемпионат России"),
+    ]
+    [group] = app.ThresholdIndex.build(rows, stored=True)
+
+    assert (group.direction, group.unit) == ("lower", "s")
+    result = group.evaluate(10.8)
+    assert result["rank"]["prestige"] == 80
+    assert result["next_rank"]["prestige"] == 90
+    assert result["next_rank"]["gap"] == 0.3
+
+
+def test_build_parses_text_without_migration(app):
+    rows = [row(90, "6,50 м", requirement="Дальность"), row(80, "6,20 м", requirement="Дальность")]
+    [group] = app.ThresholdIndex.build(rows, stored=False)
+
+    assert (group.direction, group.unit) == ("higher", "m")
+    assert group.evaluate(6.3)["rank"]["prestige"] == 80
+
+
+def test_reject_unit_mismatch(app):
+    [group] = app.ThresholdIndex.build([
+        row(90, "1:35.81", 95.81, "s", "lower"),
+        row(80, "1:40.00", 100.0, "s", "lower"),
+    ])
+
+    assert group.reject("s") is None
+    assert group.reject("m") == "unit mismatch: expected s, got m"
+    assert group.reject(None) == "unit mismatch: expected s"
+
+
+def test_bare_result_accepted_for_unitless_thresholds(app):
+    [group] = app.ThresholdIndex.build([
+        row(90, "1", 1.0, "place", "lower", requirement="Место"),
+        row(80, "1-3", 3.0, "place", "lower", requirement="Место"),
+    ])
+
+    assert group.reject(None) is None
+
+
+def test_reject_mixed_directions(app):
+    [group] = app.ThresholdIndex.build([
+        row(90, "10.5", 10.5, "s", "lower"),
+        row(80, "6,20 м", 6.2, "m", "higher"),
+    ])
+
+    assert group.direction is None and group.unit is None
+    assert group.reject("s") == "direction unknown"
+    error = group.error("direction unknown")
+    assert error["rank"] is None and error["error"] == "direction unknown"
+
+
+def test_rank_without_prestige_comes_last(app):
+    [group] = app.ThresholdIndex.build([
+        row(None, "12.0", 12.0, "s", "lower", rank_id=8),
+        row(80, "11.0", 11.0, "s", "lower"),
+    ])
+
+    assert group.evaluate(11.5)["rank"]["id"] == 8
+    assert group.evaluate(10.0)["rank"]["prestige"] == 80
+    evaluations = [group.evaluate(13.0), group.evaluate(11.5), group.evaluate(10.0)]
+    ordered = sorted(evaluations, key=app._evaluation_order, reverse=True)
+    assert [e["rank"] and e["rank"]["id"] for e in ordered] == [80, 8, None]